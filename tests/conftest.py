@@ -40,4 +40,5 @@ assert any(app in INSTALLED_APPS for app in ['posts.apps.PostsConfig', 'posts'])
 pytest_plugins = [
     'tests.fixtures.fixture_user',
     'tests.fixtures.fixture_data',
+    'tests.fixtures.fixture_queries',
 ]
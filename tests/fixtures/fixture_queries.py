@@ -0,0 +1,16 @@
+from __future__ import annotations
+
+import pytest
+from posts.tests.budget import QueryBudgetError, check_query_budget
+
+
+@pytest.fixture
+def assert_query_budget(db):
+    """assert_query_budget(client, 'posts:index', ...) - бюджет запросов
+    маршрута и поиск N+1, см. posts/tests/budget.py."""
+    def check(client, name, **options):
+        try:
+            return check_query_budget(client, name, **options)
+        except QueryBudgetError as error:
+            pytest.fail(str(error), pytrace=False)
+    return check
@@ -0,0 +1,13 @@
+from __future__ import annotations
+
+import pytest
+
+
+class TestQueryBudget:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_public_pages_budget(self, user_client, post_with_group, assert_query_budget):
+        assert_query_budget(user_client, 'posts:index')
+        assert_query_budget(user_client, 'posts:group_list', kwargs={'slug': post_with_group.group.slug})
+        assert_query_budget(user_client, 'posts:profile', kwargs={'username': post_with_group.author.username})
+        assert_query_budget(user_client, 'posts:post_detail', kwargs={'post_id': post_with_group.id})
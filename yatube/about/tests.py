@@ -2,12 +2,14 @@ from __future__ import annotations
 
 from http import HTTPStatus
 
+from django.core.cache import cache
 from django.test import Client, TestCase
 
 
 class StaticURLTests(TestCase):
     def setUp(self):
         self.guest_client = Client()
+        cache.clear()
 
     def test_about_author(self):
         response = self.guest_client.get('/about/author/')
@@ -1,11 +1,16 @@
 from __future__ import annotations
 
+from django.utils.decorators import method_decorator
 from django.views.generic.base import TemplateView
 
+from core.cache import page_tags
 
+
+@method_decorator(page_tags('about'), name='dispatch')
 class AboutAuthorView(TemplateView):
     template_name = 'about/author.html'
 
 
+@method_decorator(page_tags('about'), name='dispatch')
 class AboutTechView(TemplateView):
     template_name = 'about/tech.html'
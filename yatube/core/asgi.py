@@ -0,0 +1,29 @@
+"""ASGI-обработчик с отдельным набором маршрутов.
+
+Запросы ASGI разрешаются по settings.ASGI_URLCONF, где читающие
+страницы обслуживаются асинхронными представлениями; WSGI
+по-прежнему использует ROOT_URLCONF и синхронные представления.
+"""
+
+from __future__ import annotations
+
+import django
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler as DjangoASGIHandler
+from django.core.handlers.asgi import ASGIRequest
+
+
+class AsyncViewsRequest(ASGIRequest):
+    def __init__(self, scope, body_file):
+        super().__init__(scope, body_file)
+        self.urlconf = settings.ASGI_URLCONF
+
+
+class ASGIHandler(DjangoASGIHandler):
+    request_class = AsyncViewsRequest
+
+
+def get_asgi_application():
+    """Как django.core.asgi.get_asgi_application, но с ASGI_URLCONF."""
+    django.setup(set_prefix=False)
+    return ASGIHandler()
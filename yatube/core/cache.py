@@ -0,0 +1,84 @@
+"""Версии тегов кеша.
+
+У каждого тега (например 'posts', 'group:4', 'author:7') в кеше
+лежит номер версии. Ключи кешированных фрагментов и страниц
+включают версии своих тегов, поэтому инвалидация - это инкремент
+версии: старые записи просто перестают находиться и вытесняются по
+TTL. Начальное значение версии - время в наносекундах, чтобы после
+вытеснения ключа версии номера не повторялись.
+"""
+
+from __future__ import annotations
+
+import time
+from functools import wraps
+
+from django.core.cache import cache
+from django.db import transaction
+
+VERSION_PREFIX = 'tag-version:'
+
+
+def _key(tag):
+    return f'{VERSION_PREFIX}{tag}'
+
+
+def tag_versions(*tags):
+    """Текущие версии тегов одним обращением к кешу."""
+    keys = [_key(tag) for tag in tags]
+    found = cache.get_many(keys)
+    missing = [key for key in keys if key not in found]
+    if missing:
+        for key in missing:
+            cache.add(key, time.time_ns(), None)
+        found.update(cache.get_many(missing))
+    return [found[key] for key in keys]
+
+
+def version_key(*tags):
+    """Строка версий тегов для ключа кеша."""
+    return '.'.join(str(version) for version in tag_versions(*tags))
+
+
+def bump(*tags):
+    for tag in tags:
+        try:
+            cache.incr(_key(tag))
+        except ValueError:
+            cache.add(_key(tag), time.time_ns(), None)
+
+
+def invalidate(*tags):
+    """Инвалидирует теги сейчас и ещё раз после коммита транзакции.
+
+    Второй инкремент закрывает гонку, когда параллельный запрос успел
+    закешировать данные до коммита под уже новой версией.
+    """
+    tags = tuple(dict.fromkeys(tags))
+    if not tags:
+        return
+    bump(*tags)
+    transaction.on_commit(lambda: bump(*tags))
+
+
+PAGE_TAGS_ATTR = 'page_cache_tags'
+
+
+def tag_page(request, *tags):
+    """Разрешает кешировать ответ целиком под тегами tags.
+
+    Версии снимаются до чтения данных из БД: если пост изменят, пока
+    страница рендерится, запись в кеше сразу окажется устаревшей.
+    """
+    setattr(request, PAGE_TAGS_ATTR, (tags, tag_versions(*tags)))
+
+
+def page_tags(*tags):
+    """Декоратор для представлений с постоянным набором тегов."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            tag_page(request, *tags)
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
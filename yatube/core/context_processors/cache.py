@@ -0,0 +1,10 @@
+from __future__ import annotations
+
+from django.conf import settings
+
+
+def fragment_cache(request):
+    """Таймаут кеша фрагментов, версионируемых своим ключом."""
+    return {
+        'fragment_cache_timeout': settings.FRAGMENT_CACHE_TIMEOUT,
+    }
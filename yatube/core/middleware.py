@@ -0,0 +1,112 @@
+"""Кеш страниц целиком для анонимных GET-запросов.
+
+Кешируются только ответы представлений, вызвавших tag_page(): вместе
+с ответом хранятся его теги и их версии на момент рендеринга.
+Запись отдаётся, пока версии не изменились, поэтому сигналы,
+инвалидирующие фрагменты лент, сбрасывают и страницы.
+
+Как UpdateCacheMiddleware и FetchFromCacheMiddleware Django, кеш
+разделён на два middleware. PageCacheMiddleware стоит в конце списка:
+ему нужен request.user. UpdatePageCacheMiddleware стоит снаружи
+SessionMiddleware, CsrfViewMiddleware и MessageMiddleware и видит
+ответ уже с их cookies - такой ответ в кеш не попадает.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+
+from .cache import PAGE_TAGS_ATTR, tag_versions
+
+PAGE_PREFIX = 'page:'
+# ключ записи, которую PageCacheMiddleware не нашёл и ждёт от ответа
+PAGE_KEY_ATTR = '_page_cache_key'
+
+
+def page_key(request):
+    url = request.build_absolute_uri()
+    return PAGE_PREFIX + hashlib.md5(url.encode()).hexdigest()
+
+
+class HybridMiddleware:
+    """Работает и под WSGI, и под ASGI: при асинхронной цепочке, как
+    django.utils.deprecation.MiddlewareMixin, экземпляр становится
+    корутиной, чтобы запрос не переключался в поток."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self._is_coroutine = None
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+
+class PageCacheMiddleware(HybridMiddleware):
+    """Отдаёт страницу из кеша; на промахе оставляет ключ в запросе."""
+
+    def cacheable(self, request):
+        return (
+            settings.PAGE_CACHE_TIMEOUT
+            and request.method in ('GET', 'HEAD')
+            and not request.user.is_authenticated
+        )
+
+    def cached(self, request):
+        key = page_key(request)
+        entry = cache.get(key)
+        if entry is not None:
+            tags, versions, response = entry
+            if tag_versions(*tags) == versions:
+                response['X-Page-Cache'] = 'hit'
+                return response
+        setattr(request, PAGE_KEY_ATTR, key)
+        return None
+
+    def __call__(self, request):
+        if self._is_coroutine:
+            return self.__acall__(request)
+        if not self.cacheable(request):
+            return self.get_response(request)
+        return self.cached(request) or self.get_response(request)
+
+    async def __acall__(self, request):
+        # request.user ленивый и читает сессию из БД - только в потоке
+        if not await sync_to_async(self.cacheable)(request):
+            return await self.get_response(request)
+        return self.cached(request) or await self.get_response(request)
+
+
+class UpdatePageCacheMiddleware(HybridMiddleware):
+    """Сохраняет ответ, которого не нашёл PageCacheMiddleware."""
+
+    def store(self, request, response):
+        key = getattr(request, PAGE_KEY_ATTR, None)
+        tagged = getattr(request, PAGE_TAGS_ATTR, None)
+        if (
+            key is not None
+            and tagged is not None
+            and response.status_code == 200
+            and not response.streaming
+            and not response.cookies
+        ):
+            response['X-Page-Cache'] = 'miss'
+            tags, versions = tagged
+            cache.set(
+                key, (tags, versions, response), settings.PAGE_CACHE_TIMEOUT,
+            )
+        return response
+
+    def __call__(self, request):
+        if self._is_coroutine:
+            return self.__acall__(request)
+        return self.store(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.store(request, await self.get_response(request))
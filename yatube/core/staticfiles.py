@@ -0,0 +1,271 @@
+"""Статика с хешами в именах, сжатая заранее и отдаваемая из WSGI.
+
+collectstatic кладёт рядом с каждым текстовым файлом его .gz и .br
+версии. StaticFilesApplication оборачивает WSGI-приложение Django и
+отдаёт файлы из STATIC_ROOT сам, выбирая сжатую версию по
+Accept-Encoding (ASGIStaticFilesApplication - то же для ASGI).
+Имена с хешем содержимого никогда не меняются, поэтому кешируются
+браузером навсегда (immutable), остальные - на STATIC_MAX_AGE.
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import mimetypes
+import os
+import posixpath
+from wsgiref.util import FileWrapper
+
+import brotli
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.core.handlers.wsgi import get_path_info
+
+COMPRESSIBLE = {
+    '.css', '.js', '.mjs', '.map', '.json', '.svg', '.txt', '.html',
+    '.xml', '.ico', '.eot', '.ttf', '.otf',
+}
+# расширение -> значение Content-Encoding, от предпочтительного
+ENCODINGS = (('.br', 'br'), ('.gz', 'gzip'))
+# сжатая версия хранится, только если она заметно меньше исходной
+MIN_RATIO = 0.95
+IMMUTABLE_MAX_AGE = 60 * 60 * 24 * 365
+
+
+def compress(content):
+    """Сжатые версии content: расширение -> байты."""
+    compressed = {
+        '.gz': gzip.compress(content, compresslevel=9, mtime=0),
+        '.br': brotli.compress(content, quality=11),
+    }
+    return {
+        extension: data for extension, data in compressed.items()
+        if len(data) < len(content) * MIN_RATIO
+    }
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Manifest-хранилище, которое после хеширования сжимает файлы.
+
+    Файл, которого нет в манифесте (collectstatic не запускался, как в
+    тестах), отдаётся по исходному имени вместо ошибки.
+    """
+
+    manifest_strict = False
+
+    def url(self, name, force=False):
+        try:
+            return super().url(name, force)
+        except ValueError:
+            return FileSystemStorage.url(self, name)
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        names = set(paths) | set(self.hashed_files.values())
+        for name in sorted(names):
+            if os.path.splitext(name)[1].lower() not in COMPRESSIBLE:
+                continue
+            with self.open(name) as file_:
+                content = file_.read()
+            for extension, data in compress(content).items():
+                compressed_name = name + extension
+                if self.exists(compressed_name):
+                    self.delete(compressed_name)
+                self._save(compressed_name, ContentFile(data))
+                yield name, compressed_name, True
+
+
+class StaticFile:
+    """Файл из STATIC_ROOT со всеми сжатыми версиями."""
+
+    def __init__(self, path, immutable):
+        self.content_type = (
+            mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        )
+        if self.content_type.startswith('text/') or self.content_type in (
+            'application/javascript', 'application/json',
+        ):
+            self.content_type += '; charset=utf-8'
+        self.immutable = immutable
+        self.max_age = (
+            IMMUTABLE_MAX_AGE if immutable else settings.STATIC_MAX_AGE
+        )
+        self.variants = {None: self.stat(path)}
+        for extension, encoding in ENCODINGS:
+            if os.path.isfile(path + extension):
+                self.variants[encoding] = self.stat(path + extension)
+
+    @staticmethod
+    def stat(path):
+        stat = os.stat(path)
+        etag = hashlib.md5(
+            f'{path}:{stat.st_size}:{stat.st_mtime_ns}'.encode(),
+        ).hexdigest()
+        return path, stat.st_size, f'"{etag}"'
+
+    def choose(self, accept_encoding):
+        accepted = parse_accept_encoding(accept_encoding)
+        for encoding in self.variants:
+            if encoding is not None and accepted.get(
+                encoding, accepted.get('*', 0),
+            ) > 0:
+                return encoding
+        return None
+
+    def headers(self, encoding):
+        _, size, etag = self.variants[encoding]
+        cache_control = f'public, max-age={self.max_age}'
+        if self.immutable:
+            cache_control += ', immutable'
+        headers = [
+            ('Content-Type', self.content_type),
+            ('Content-Length', str(size)),
+            ('Cache-Control', cache_control),
+            ('ETag', etag),
+        ]
+        if len(self.variants) > 1:
+            headers.append(('Vary', 'Accept-Encoding'))
+        if encoding is not None:
+            headers.append(('Content-Encoding', encoding))
+        return headers
+
+
+def parse_accept_encoding(header):
+    """Accept-Encoding -> {кодирование: q}."""
+    accepted = {}
+    for item in header.split(','):
+        encoding, _, params = item.strip().partition(';')
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if encoding:
+            accepted[encoding.strip().lower()] = quality
+    return accepted
+
+
+class StaticFilesApplication:
+    """WSGI-обёртка, отдающая собранную статику без участия Django.
+
+    Список файлов читается один раз при старте: после collectstatic
+    нужен перезапуск, как и после любого деплоя. Остальные запросы,
+    включая отсутствующие файлы, уходят в приложение.
+    """
+
+    def __init__(self, application, root=None, prefix=None):
+        self.application = application
+        self.root = root or settings.STATIC_ROOT
+        self.prefix = prefix or settings.STATIC_URL
+        if not self.prefix.startswith('/'):
+            self.prefix = '/' + self.prefix
+        self.files = self.scan() if self.root else {}
+
+    def scan(self):
+        storage = CompressedManifestStaticFilesStorage(location=self.root)
+        hashed = set(storage.load_manifest().values())
+        compressed = tuple(extension for extension, _ in ENCODINGS)
+        files = {}
+        for directory, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                if filename.endswith(compressed):
+                    continue
+                path = os.path.join(directory, filename)
+                name = os.path.relpath(path, self.root).replace(os.sep, '/')
+                files[self.prefix + name] = StaticFile(path, name in hashed)
+        return files
+
+    def find(self, path, method):
+        if not path.startswith(self.prefix) or method not in ('GET', 'HEAD'):
+            return None
+        return self.files.get(posixpath.normpath(path))
+
+    def respond(self, static_file, accept_encoding, if_none_match):
+        """(статус, заголовки, путь к отдаваемому файлу или None)."""
+        encoding = static_file.choose(accept_encoding)
+        headers = static_file.headers(encoding)
+        path, _, etag = static_file.variants[encoding]
+        if etag in if_none_match:
+            return '304 Not Modified', [
+                header for header in headers
+                if header[0] not in ('Content-Length', 'Content-Type')
+            ], None
+        return '200 OK', headers, path
+
+    def __call__(self, environ, start_response):
+        static_file = self.find(
+            get_path_info(environ), environ['REQUEST_METHOD'],
+        )
+        if static_file is None:
+            return self.application(environ, start_response)
+        status, headers, path = self.respond(
+            static_file,
+            environ.get('HTTP_ACCEPT_ENCODING', ''),
+            environ.get('HTTP_IF_NONE_MATCH', ''),
+        )
+        start_response(status, headers)
+        if path is None or environ['REQUEST_METHOD'] == 'HEAD':
+            return []
+        file_wrapper = environ.get('wsgi.file_wrapper', FileWrapper)
+        return file_wrapper(open(path, 'rb'))
+
+
+class ASGIStaticFilesApplication(StaticFilesApplication):
+    """То же для ASGI: файл читается кусками в потоке."""
+
+    chunk_size = 64 * 1024
+
+    async def __call__(self, scope, receive, send):
+        static_file = None
+        if scope['type'] == 'http':
+            path = scope['path']
+            root_path = scope.get('root_path', '')
+            if root_path and path.startswith(root_path):
+                path = path[len(root_path):]
+            static_file = self.find(path, scope['method'])
+        if static_file is None:
+            return await self.application(scope, receive, send)
+        request_headers = {
+            name.decode('latin1').lower(): value.decode('latin1')
+            for name, value in scope['headers']
+        }
+        status, headers, path = self.respond(
+            static_file,
+            request_headers.get('accept-encoding', ''),
+            request_headers.get('if-none-match', ''),
+        )
+        await send({
+            'type': 'http.response.start',
+            'status': int(status.split()[0]),
+            'headers': [
+                (name.lower().encode('latin1'), value.encode('latin1'))
+                for name, value in headers
+            ],
+        })
+        if path is None or scope['method'] == 'HEAD':
+            await send({'type': 'http.response.body', 'body': b''})
+            return
+        file_ = await sync_to_async(open, thread_sensitive=False)(path, 'rb')
+        try:
+            read = sync_to_async(file_.read, thread_sensitive=False)
+            chunk = await read(self.chunk_size)
+            while True:
+                following = await read(self.chunk_size)
+                await send({
+                    'type': 'http.response.body',
+                    'body': chunk,
+                    'more_body': bool(following),
+                })
+                if not following:
+                    break
+                chunk = following
+        finally:
+            file_.close()
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import html
+import unicodedata
+
+from django.template.defaultfilters import linebreaksbr
+from django.utils.html import strip_tags
+from django.utils.text import Truncator
+
+
+def fold(value):
+    """Нормализованная форма строки для поиска без учёта регистра.
+
+    NFKC + casefold работают для любого алфавита, в отличие от
+    LIKE/lower() в SQLite, которые понимают только ASCII. Буква «ё»
+    приравнивается к «е», как это обычно делают при поиске.
+    """
+    if not value:
+        return ''
+    return unicodedata.normalize('NFKC', value).casefold().replace('ё', 'е')
+
+
+def plain_text(value):
+    """Текст без HTML-тегов и сущностей."""
+    return html.unescape(strip_tags(value or ''))
+
+
+def fold_plain(value):
+    """fold() текста без разметки: так текст постов индексируется."""
+    return fold(plain_text(value))
+
+
+def excerpt(value, length):
+    """Начало текста без разметки, не длиннее length символов."""
+    return Truncator(plain_text(value).strip()).chars(length)
+
+
+def render_html(value):
+    """Текст поста в HTML: экранирование и <br> вместо переводов строк."""
+    return str(linebreaksbr(value or '', autoescape=True))
+
+
+def prefix_range(field, prefix):
+    """Фильтр «начинается с prefix» в виде диапазона по индексу.
+
+    startswith в SQLite превращается в LIKE, который не использует
+    обычный индекс; сравнение >= и < всегда читается range-сканом.
+    """
+    return {f'{field}__gte': prefix, f'{field}__lt': prefix + '\U0010ffff'}
+
+
+def refold(queryset, source, target, batch_size=500, normalize=fold):
+    """Пакетно пересчитывает target = normalize(source) по возрастанию pk.
+
+    Читает порциями по pk, а не iterator(), чтобы не писать в таблицу,
+    по которой в SQLite ещё открыт курсор. Возвращает число строк.
+    """
+    model = queryset.model
+    last_pk = None
+    total = 0
+    while True:
+        batch = queryset.order_by('pk')
+        if last_pk is not None:
+            batch = batch.filter(pk__gt=last_pk)
+        batch = list(batch.only('pk', source)[:batch_size])
+        if not batch:
+            return total
+        for obj in batch:
+            setattr(obj, target, normalize(getattr(obj, source)))
+        model.objects.bulk_update(batch, [target])
+        last_pk = batch[-1].pk
+        total += len(batch)
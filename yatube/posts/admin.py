@@ -10,6 +10,9 @@ from .models import Comment, Follow, Group, Post
 class PostAdmin(admin.ModelAdmin):
     list_display = ('pk', 'text', 'pub_date', 'author', 'group')
     list_editable = ('group',)
+    # group может быть NULL, автоматический select_related() его не берёт
+    list_select_related = ('author', 'group')
+    show_full_result_count = False
     search_fields = ('text',)
     list_filter = ('pub_date',)
     empty_value_display = '-пусто-'
@@ -17,6 +20,19 @@ class PostAdmin(admin.ModelAdmin):
         models.TextField: {'widget': CKEditorWidget}
     }
 
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        """Список групп читается один раз на страницу, а не на каждую
+        строку list_editable."""
+        formfield = super().formfield_for_foreignkey(
+            db_field, request, **kwargs,
+        )
+        if db_field.name == 'group' and request is not None:
+            choices = getattr(request, '_group_choices', None)
+            if choices is None:
+                choices = request._group_choices = list(formfield.choices)
+            formfield.choices = choices
+        return formfield
+
 
 admin.site.register(Post, PostAdmin)
 admin.site.register(Group)
@@ -25,8 +41,12 @@ admin.site.register(Group)
 @admin.register(Follow)
 class FollowAdmin(admin.ModelAdmin):
     list_display = ('user', 'author')
+    list_select_related = ('user', 'author')
+    show_full_result_count = False
 
 
 @admin.register(Comment)
 class CommentAdmin(admin.ModelAdmin):
     list_display = ('post', 'author', 'text', 'created')
+    list_select_related = ('post', 'author')
+    show_full_result_count = False
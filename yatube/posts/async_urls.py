@@ -0,0 +1,29 @@
+"""Маршруты posts для ASGI: те же адреса и имена, что в posts.urls,
+но читающие страницы обслуживаются posts.async_views.
+"""
+
+from __future__ import annotations
+
+from django.urls import path
+
+from . import async_views, urls
+
+app_name = urls.app_name
+
+ASYNC_VIEWS = {
+    'index': async_views.index,
+    'group_list': async_views.group_posts,
+    'profile': async_views.profile,
+    'post_detail': async_views.post_detail,
+    'follow_index': async_views.follow_index,
+    'post_search': async_views.post_search,
+}
+
+urlpatterns = [
+    path(
+        str(pattern.pattern),
+        ASYNC_VIEWS.get(pattern.name, pattern.callback),
+        name=pattern.name,
+    )
+    for pattern in urls.urlpatterns
+]
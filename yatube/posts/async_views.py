@@ -0,0 +1,188 @@
+"""Асинхронные версии читающих представлений для ASGI (yatube/asgi.py).
+
+Поведение, шаблоны и контекст те же, что у posts.views. Запросы,
+для которых в ORM есть асинхронный интерфейс (aget, aexists,
+acount, async for), выполняются через него. Паджинаторы, ETag-функции
+и рендеринг шаблонов синхронные и могут читать БД, поэтому уходят в
+поток через sync_to_async. Обращения к кешу (locmem, redis) короткие
+и не трогают БД, они остаются в цикле событий.
+"""
+
+from __future__ import annotations
+
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.views import redirect_to_login
+from django.http import Http404
+from django.shortcuts import render
+from django.utils.cache import get_conditional_response, quote_etag
+
+from core.cache import tag_page
+from posts.models import Follow, Group, Post, User
+
+from . import counters
+from .caching import (feed_cache, follow_etag, group_etag, index_etag,
+                      post_etag, post_tags, profile_etag)
+from .feeds import follow_feed
+from .forms import CommentForm
+from .search import search_authors, search_groups, search_posts
+from .views import CARD_FIELDS, PROFILE_FIELDS, comments_page, paginator
+
+
+async def aload_user(request):
+    """request.user, загруженный в потоке: ленивый объект читает сессию
+    и пользователя из БД."""
+    await sync_to_async(lambda: request.user.is_authenticated)()
+    return request.user
+
+
+async def arender(request, template_name, context):
+    return await sync_to_async(render)(request, template_name, context)
+
+
+async def aget_object_or_404(queryset, **kwargs):
+    try:
+        return await queryset.aget(**kwargs)
+    except queryset.model.DoesNotExist:
+        raise Http404(
+            f'No {queryset.model._meta.object_name} matches the given query.',
+        )
+
+
+def condition(etag_func):
+    """django.views.decorators.http.condition(etag_func=...) для
+    асинхронного представления: 304 без вызова представления и
+    заголовок ETag у ответа."""
+    def decorator(view):
+        @wraps(view)
+        async def inner(request, *args, **kwargs):
+            res_etag = await sync_to_async(etag_func)(request, *args, **kwargs)
+            res_etag = quote_etag(res_etag) if res_etag is not None else None
+            response = get_conditional_response(request, etag=res_etag)
+            if response is None:
+                response = await view(request, *args, **kwargs)
+            if request.method in ('GET', 'HEAD') and res_etag:
+                response.headers.setdefault('ETag', res_etag)
+            return response
+        return inner
+    return decorator
+
+
+def login_required(view):
+    """login_required для асинхронного представления."""
+    @wraps(view)
+    async def inner(request, *args, **kwargs):
+        user = await aload_user(request)
+        if not user.is_authenticated:
+            return redirect_to_login(request.get_full_path())
+        return await view(request, *args, **kwargs)
+    return inner
+
+
+@condition(etag_func=index_etag)
+async def index(request):
+    tag_page(request, 'posts')
+    posts = Post.objects.select_related('group', 'author').only(*CARD_FIELDS)
+    count = await counters.atotal_posts()
+    context = {
+        'page_obj': await sync_to_async(paginator)(request, posts, count=count),
+        **feed_cache('posts'),
+    }
+    return await arender(request, 'posts/index.html', context)
+
+
+@condition(etag_func=group_etag)
+async def group_posts(request, slug):
+    group = await aget_object_or_404(Group.objects.all(), slug=slug)
+    tag_page(request, f'group:{group.pk}')
+    posts = group.posts.select_related('author', 'group').only(*CARD_FIELDS)
+    context = {
+        'group': group,
+        'page_obj': await sync_to_async(paginator)(
+            request, posts, count=group.posts_count,
+        ),
+        **feed_cache(f'group:{group.pk}'),
+    }
+    return await arender(request, 'posts/group_list.html', context)
+
+
+@condition(etag_func=profile_etag)
+async def profile(request, username):
+    """Персональная страница авторизованного пользователя."""
+    author = await aget_object_or_404(
+        User.objects.select_related('profile'), username=username,
+    )
+    tag_page(request, f'author:{author.pk}')
+    posts = author.posts.select_related('group').only(*PROFILE_FIELDS)
+    n_posts = (await counters.aauthor_profile(author)).posts_count
+    user = await aload_user(request)
+    following = user.is_authenticated and await Follow.objects.filter(
+        user=user, author=author,
+    ).aexists()
+    context = {
+        'page_obj': await sync_to_async(paginator)(
+            request, posts, count=n_posts,
+        ),
+        'author': author,
+        'n_posts': n_posts,
+        'following': following,
+        **feed_cache(f'author:{author.pk}'),
+    }
+    return await arender(request, 'posts/profile.html', context)
+
+
+@condition(etag_func=post_etag)
+async def post_detail(request, post_id):
+    """Страница с постом пользователя."""
+    post = await aget_object_or_404(
+        Post.objects.select_related('author__profile', 'group'), pk=post_id,
+    )
+    tag_page(request, *post_tags(post))
+    context = {
+        'post': post,
+        'n_posts': (await counters.aauthor_profile(post.author)).posts_count,
+        'form': CommentForm(request.POST or None),
+        'comments': await sync_to_async(comments_page)(
+            post.pk, request.GET.get('comments_after'),
+        ),
+    }
+    return await arender(request, 'posts/post_detail.html', context)
+
+
+@login_required
+@condition(etag_func=follow_etag)
+async def follow_index(request):
+    """Страница со списком постов из подписок пользователя."""
+    post_list_follow, ordering = await sync_to_async(follow_feed)(
+        request.user,
+    )
+    context = {
+        'page_obj': await sync_to_async(paginator)(
+            request, post_list_follow.only(*CARD_FIELDS), ordering=ordering,
+        ),
+        **feed_cache('posts', f'follow:{request.user.pk}'),
+    }
+    return await arender(request, 'posts/follow.html', context)
+
+
+async def post_search(request):
+    """Полнотекстовый поиск по постам и подсказки групп и авторов."""
+    search_req = request.GET.get('s', '').strip()
+    if search_req:
+        posts = search_posts(search_req)
+    else:
+        posts = Post.objects.select_related('group', 'author')
+
+    posts = posts.only(*CARD_FIELDS)
+    context = {
+        'page_obj': await sync_to_async(paginator)(
+            request, posts, ordering=None,
+        ),
+        'search_req': search_req,
+        'groups': [group async for group in search_groups(search_req)],
+        'authors': [
+            author async for author in search_authors(search_req)
+        ],
+    }
+    return await arender(request, 'posts/search.html', context)
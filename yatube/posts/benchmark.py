@@ -0,0 +1,150 @@
+"""Общие инструменты замеров для management-команд бенчмарков."""
+
+from __future__ import annotations
+
+import contextlib
+import statistics
+import tempfile
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings
+
+from . import thumbnails, urls
+from .models import Group, Post
+
+
+def percentile(samples, percent):
+    """Перцентиль по методу ближайшего ранга."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, round(percent / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def summary(samples):
+    """Сводка по замерам в миллисекундах."""
+    return {
+        'count': len(samples),
+        'mean': round(statistics.fmean(samples), 3) if samples else 0.0,
+        'p50': round(percentile(samples, 50), 3),
+        'p95': round(percentile(samples, 95), 3),
+        'p99': round(percentile(samples, 99), 3),
+        'max': round(max(samples, default=0.0), 3),
+    }
+
+
+def measure(func, repeat):
+    """Вызывает func repeat раз и возвращает длительности в мс."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+@contextlib.contextmanager
+def scratch_database(verbosity=0):
+    """Временная тестовая БД, чтобы замеры не трогали рабочие данные."""
+    old_name = connection.creation.create_test_db(
+        verbosity=verbosity, autoclobber=True, keepdb=False,
+    )
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=verbosity)
+
+
+@contextlib.contextmanager
+def scratch_site(**overrides):
+    """Временные БД и MEDIA_ROOT с настройками overrides.
+
+    Пул миниатюр выключен (их создаёт synthetic.generate): его потоки
+    не конкурируют с замерами за БД и не переживают удаление временных
+    БД и каталога. Пул, запущенный раньше, дорабатывает до их удаления.
+    """
+    with scratch_database(), tempfile.TemporaryDirectory() as media:
+        with override_settings(
+            MEDIA_ROOT=media, THUMBNAIL_WORKERS=0, **overrides,
+        ):
+            try:
+                yield
+            finally:
+                thumbnails.drain()
+
+
+def compare(results, baseline, tolerance):
+    """Регрессии results относительно baseline.
+
+    Регрессия - рост p50 больше чем в 1 + tolerance раз или рост
+    числа запросов. Возвращает строки с описанием.
+    """
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        if current['p50'] > previous['p50'] * (1 + tolerance):
+            regressions.append(
+                f'{name}: p50 {previous["p50"]} -> {current["p50"]} мс',
+            )
+        if current['queries'] > previous['queries']:
+            regressions.append(
+                f'{name}: запросов {previous["queries"]} -> '
+                f'{current["queries"]}',
+            )
+    return regressions
+
+
+def route_scenarios():
+    """Сценарии запросов ко всем маршрутам posts.urls на данных generate().
+
+    Возвращает (клиенты по именам, маршрут -> (клиент, метод, kwargs,
+    данные)). Маршрут без сценария - ошибка, чтобы новые адреса не
+    выпадали из замеров.
+    """
+    User = get_user_model()
+    post = Post.objects.order_by('-comments_count').first()
+    group = Group.objects.order_by('-posts_count').first()
+    reader = User.objects.order_by('-profile__following_count').first()
+    stranger = User.objects.exclude(pk=reader.pk).exclude(
+        following__user=reader,
+    ).first()
+    staff = User.objects.create_superuser('benchmark-staff')
+    clients = {}
+    for name, user in (
+        ('anonymous', None), ('reader', reader), ('author', post.author),
+        ('staff', staff),
+    ):
+        clients[name] = Client()
+        if user is not None:
+            clients[name].force_login(user)
+    post_id = {'post_id': post.pk}
+    stranger_name = {'username': stranger.username}
+    scenarios = {
+        'index': ('anonymous', 'get', None, None),
+        'group_list': ('anonymous', 'get', {'slug': group.slug}, None),
+        'profile': (
+            'anonymous', 'get', {'username': post.author.username}, None,
+        ),
+        'post_detail': ('anonymous', 'get', post_id, None),
+        'post_comments': ('anonymous', 'get', post_id, None),
+        'follow_index': ('reader', 'get', None, None),
+        'post_search': ('anonymous', 'get', None, {'s': 'котики'}),
+        'post_create': ('reader', 'get', None, None),
+        'post_edit': ('author', 'get', post_id, None),
+        'add_comment': ('reader', 'post', post_id, {'text': 'Бенчмарк'}),
+        # подписка и отписка чередуются, чтобы каждая что-то меняла
+        'profile_follow': ('reader', 'get', stranger_name, None),
+        'profile_unfollow': ('reader', 'get', stranger_name, None),
+        'query_stats': ('staff', 'get', None, None),
+    }
+    missing = {pattern.name for pattern in urls.urlpatterns} - set(scenarios)
+    if missing:
+        raise CommandError(f'Нет сценария для маршрутов: {missing}')
+    return clients, scenarios
@@ -0,0 +1,99 @@
+"""Теги кеша приложения posts.
+
+'posts'      - любая лента постов (главная, подписки);
+'post:<id>'  - страница поста и её комментарии;
+'author:<id>'- посты автора (профиль);
+'group:<id>' - посты группы;
+'follow:<id>'- состав подписок пользователя
+
+Карточка поста кешируется отдельно, с Post.updated в ключе: когда
+лента сбрасывается тегом, она собирается из готовых карточек, и
+заново рендерятся только изменившиеся посты.
+"""
+
+from __future__ import annotations
+
+import hashlib
+
+from django.conf import settings
+from django.utils import timezone
+
+from core.cache import version_key
+
+from .models import Group, Post, User
+
+
+def post_tags(post, *group_ids):
+    """Теги, которые затрагивает изменение поста."""
+    tags = ['posts', f'post:{post.pk}', f'author:{post.author_id}']
+    for group_id in (post.group_id, *group_ids):
+        if group_id is not None:
+            tags.append(f'group:{group_id}')
+    return tags
+
+
+def touch(posts):
+    """Меняет Post.updated, а с ним и ключ кеша карточек posts.
+
+    Нужно, когда меняется то, что выводит карточка, но не сам пост:
+    имя автора, группа, готовые миниатюры.
+    """
+    return posts.update(updated=timezone.now())
+
+
+def feed_cache(*tags):
+    """Контекст для {% cache %} ленты: таймаут и версия её тегов."""
+    return {
+        'cache_timeout': settings.FEED_CACHE_TIMEOUT,
+        'cache_version': version_key(*tags),
+    }
+
+
+def etag(request, *tags):
+    """ETag страницы: адрес, пользователь и версии тегов её данных.
+
+    Считается по кешу без рендеринга; любое изменение, сбрасывающее
+    кеш страницы, меняет и ETag.
+    """
+    raw = f'{request.get_full_path()}|{request.user.pk}|{version_key(*tags)}'
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+def _viewer_tags(request):
+    # кнопка «Подписаться/Отписаться» зависит от подписок зрителя
+    if request.user.is_authenticated:
+        return (f'follow:{request.user.pk}',)
+    return ()
+
+
+def index_etag(request):
+    return etag(request, 'posts')
+
+
+def group_etag(request, slug):
+    group_id = Group.objects.filter(slug=slug).values_list(
+        'pk', flat=True,
+    ).first()
+    if group_id is None:
+        return None
+    return etag(request, f'group:{group_id}')
+
+
+def profile_etag(request, username):
+    author_id = User.objects.filter(username=username).values_list(
+        'pk', flat=True,
+    ).first()
+    if author_id is None:
+        return None
+    return etag(request, f'author:{author_id}', *_viewer_tags(request))
+
+
+def post_etag(request, post_id):
+    post = Post.objects.filter(pk=post_id).only('author', 'group').first()
+    if post is None:
+        return None
+    return etag(request, *post_tags(post))
+
+
+def follow_etag(request):
+    return etag(request, 'posts', *_viewer_tags(request))
@@ -0,0 +1,148 @@
+"""Денормализованные счётчики: посты автора и группы, комментарии
+поста, подписчики и подписки пользователя. Инкременты делаются
+UPDATE ... SET x = x + 1 в транзакции изменения, сверка - пакетными
+UPDATE с подзапросами только для разошедшихся строк.
+
+Общее число постов для главной хранится в кеше: оно считается
+COUNT(*) раз в TOTAL_POSTS_TIMEOUT, а между пересчётами сдвигается
+инкрементами после коммита.
+"""
+
+from __future__ import annotations
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from core.text import fold
+from users.models import Profile
+
+from .models import Comment, Follow, Group, Post, User
+
+TOTAL_POSTS_KEY = 'counters:total_posts'
+
+
+def change(queryset, field, delta):
+    """Атомарно сдвигает счётчик на delta без чтения строки.
+
+    Ниже нуля счётчик не уходит: такое расхождение чинит сверка.
+    """
+    if delta < 0:
+        queryset = queryset.filter(**{f'{field}__gte': -delta})
+    if delta:
+        queryset.update(**{field: F(field) + delta})
+
+
+def change_profile(user_id, field, delta):
+    change(Profile.objects.filter(user_id=user_id), field, delta)
+
+
+def change_group(group_id, delta):
+    if group_id is not None:
+        change(Group.objects.filter(pk=group_id), 'posts_count', delta)
+
+
+def change_comments(post_id, delta):
+    change(Post.objects.filter(pk=post_id), 'comments_count', delta)
+
+
+def author_profile(author):
+    """Профиль автора; недостающий создаётся с посчитанными счётчиками.
+
+    Профиля может не быть у пользователя, сохранённого в обход сигналов
+    (bulk_create, старые выгрузки), до сверки reconcile_counters.
+    """
+    try:
+        return author.profile
+    except Profile.DoesNotExist:
+        profile, _ = Profile.objects.get_or_create(user=author, defaults={
+            'posts_count': Post.objects.filter(author=author).count(),
+            'followers_count': Follow.objects.filter(author=author).count(),
+            'following_count': Follow.objects.filter(user=author).count(),
+            'username_folded': fold(author.username),
+        })
+        author.profile = profile
+        return profile
+
+
+async def aauthor_profile(author):
+    """author_profile() для асинхронных представлений."""
+    try:
+        return author.profile
+    except Profile.DoesNotExist:
+        return await sync_to_async(author_profile)(author)
+
+
+def total_posts():
+    """Число постов на сайте, посчитанное не чаще раза в таймаут."""
+    total = cache.get(TOTAL_POSTS_KEY)
+    if total is None:
+        total = Post.objects.count()
+        cache.set(TOTAL_POSTS_KEY, total, settings.TOTAL_POSTS_TIMEOUT)
+    return total
+
+
+async def atotal_posts():
+    """total_posts() для асинхронных представлений."""
+    total = await cache.aget(TOTAL_POSTS_KEY)
+    if total is None:
+        total = await Post.objects.acount()
+        await cache.aset(
+            TOTAL_POSTS_KEY, total, settings.TOTAL_POSTS_TIMEOUT,
+        )
+    return total
+
+
+def change_total_posts(delta):
+    def apply():
+        try:
+            cache.incr(TOTAL_POSTS_KEY, delta)
+        except ValueError:
+            # ключа нет: следующий total_posts() посчитает заново
+            pass
+    transaction.on_commit(apply)
+
+
+def _actual(model, field, outer_ref):
+    counted = model.objects.filter(
+        **{field: OuterRef(outer_ref)},
+    ).order_by().values(field).annotate(total=Count('pk')).values('total')
+    return Coalesce(Subquery(counted), 0)
+
+
+# модель со счётчиком, поле счётчика, что считаем, по какому полю,
+# с каким полем модели сравниваем
+RECONCILED = (
+    (Profile, 'posts_count', Post, 'author', 'user_id'),
+    (Profile, 'followers_count', Follow, 'author', 'user_id'),
+    (Profile, 'following_count', Follow, 'user', 'user_id'),
+    (Group, 'posts_count', Post, 'group', 'pk'),
+    (Post, 'comments_count', Comment, 'post', 'pk'),
+)
+
+
+def reconcile():
+    """Создаёт недостающие профили и чинит разошедшиеся счётчики.
+
+    Возвращает словарь «счётчик -> число исправленных строк».
+    """
+    missing = User.objects.filter(profile__isnull=True).values_list(
+        'pk', 'username',
+    )
+    created = Profile.objects.bulk_create(
+        Profile(user_id=user_id, username_folded=fold(username))
+        for user_id, username in missing.iterator()
+    )
+    cache.delete(TOTAL_POSTS_KEY)
+    repaired = {'profiles created': len(created)}
+    for model, counter, counted, field, outer_ref in RECONCILED:
+        actual = _actual(counted, field, outer_ref)
+        drifted = model.objects.annotate(actual=actual).exclude(
+            **{counter: F('actual')},
+        )
+        name = f'{model._meta.model_name}.{counter}'
+        repaired[name] = drifted.update(**{counter: actual})
+    return repaired
@@ -1,40 +1,32 @@
 import collections
-import decimal
 import time
 from typing import Any, Callable
 
 from django.core.management import BaseCommand
-from django.db import connection, reset_queries
+
+from .querystats import record_queries
 
 
 def queries_stat(fn: Callable) -> Callable:
+    """Печатает число, время и самые долгие запросы вызова fn.
+
+    Запросы перехватываются через querystats.record_queries,
+    поэтому DEBUG=True не нужен.
+    """
 
     def wrapper(*args: Any, **kwargs: Any) -> Any:
-        reset_queries()
-        # start_t = time.time()
-        original_return = fn(*args, **kwargs)
-        # print('TOTAL EXECUTION TIME:', time.time() - start_t)
-        queries = connection.queries
-        total_queries_time = decimal.Decimal(0)
-        total_queries_count = 0
-        stats: Any = collections.defaultdict(lambda: dict())
-        for query in queries:
-            total_queries_time += decimal.Decimal(query['time'])
-            total_queries_count += 1
-            if query['sql'] in stats:
-                stats[query['sql']]['time'] += decimal.Decimal(query['time'])
-                stats[query['sql']]['count'] += 1
-            else:
-                stats[query['sql']]['time'] = decimal.Decimal(query['time'])
-                stats[query['sql']]['count'] = 1
-        print(f'TOTAL QUERIES STATS. COUNT: {total_queries_count} TIME: {total_queries_time}')
-        # print('TOP 10 QUERIES BY COUNT')
-        # for sql, stat in sorted(stats.items(), key=lambda elem: elem[1]['count'], reverse=True)[:10]:
-        #     print(stat['count'], sql)
+        with record_queries() as recorder:
+            original_return = fn(*args, **kwargs)
+        stats: Any = collections.defaultdict(
+            lambda: {'time': 0.0, 'count': 0},
+        )
+        for sql, _, duration in recorder.queries:
+            stats[sql]['time'] += duration
+            stats[sql]['count'] += 1
+        print(f'TOTAL QUERIES STATS. COUNT: {recorder.count} TIME: {recorder.time}')
         print('TOP 10 QUERIES BY TIME')
         for sql, stat in sorted(stats.items(), key=lambda elem: elem[1]['time'], reverse=True)[:10]:
-            print(stat['time'], sql)
-        # print('\n')
+            print(stat['time'], stat['count'], sql)
         return original_return
 
     return wrapper
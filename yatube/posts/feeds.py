@@ -0,0 +1,145 @@
+"""Гибридная лента подписок.
+Посты обычных авторов раскладываются при записи (fan-out on write):
+новый пост попадает в TimelineEntry всех подписчиков автора, подписка
+дозаполняет ленту постами автора, отписка их вычищает.
+Авторы, у которых подписчиков не меньше FEED_CELEBRITY_FOLLOWERS,
+считаются «знаменитостями»: их посты не раскладываются, а
+подмешиваются в ленту при чтении (pull).
+Классификация опирается на счётчик Profile.followers_count, который
+обновляется в той же транзакции, что и подписка.
+"""
+
+from __future__ import annotations
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+
+from users.models import Profile
+
+from .models import Follow, Post, TimelineEntry
+
+BATCH_SIZE = 500
+
+# Порядок ленты совпадает с индексом timeline_user_pub_date_idx
+TIMELINE_ORDERING = ('feed_date', 'feed_post')
+
+
+def followers_count(author_id):
+    return Profile.objects.filter(user_id=author_id).values_list(
+        'followers_count', flat=True,
+    ).first() or 0
+
+
+def is_celebrity(author_id):
+    return followers_count(author_id) >= settings.FEED_CELEBRITY_FOLLOWERS
+
+
+def fan_out_post(post):
+    """Раскладывает новый пост по лентам подписчиков автора.
+
+    Посты «знаменитостей» не раскладываются - их читают при запросе.
+    """
+    if is_celebrity(post.author_id):
+        return
+    followers = Follow.objects.filter(
+        author_id=post.author_id,
+    ).values_list('user_id', flat=True)
+    with transaction.atomic():
+        TimelineEntry.objects.bulk_create(
+            (
+                TimelineEntry(
+                    user_id=user_id, post_id=post.pk, pub_date=post.pub_date,
+                )
+                for user_id in followers.iterator()
+            ),
+            batch_size=BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+
+
+def backfill_timeline(user_id, author_id):
+    """Добавляет в ленту пользователя все посты нового автора."""
+    if not is_celebrity(author_id):
+        _push_author_posts(user_id, author_id)
+
+
+def _push_author_posts(user_id, author_id):
+    posts = Post.objects.filter(
+        author_id=author_id,
+    ).values_list('id', 'pub_date')
+    with transaction.atomic():
+        TimelineEntry.objects.bulk_create(
+            (
+                TimelineEntry(
+                    user_id=user_id, post_id=post_id, pub_date=pub_date,
+                )
+                for post_id, pub_date in posts.iterator()
+            ),
+            batch_size=BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+
+
+def prune_timeline(user_id, author_id):
+    """Убирает из ленты пользователя посты автора после отписки."""
+    TimelineEntry.objects.filter(
+        user_id=user_id, post__author_id=author_id,
+    ).delete()
+
+
+def follow_added(user_id, author_id):
+    """Подписка: дозаполняем ленту, если автор не «знаменитость»."""
+    backfill_timeline(user_id, author_id)
+
+
+def follow_removed(user_id, author_id):
+    """Отписка: чистим ленту. Автор, только что опустившийся ниже
+    порога, возвращается в push - ленты его подписчиков дозаполняются."""
+    prune_timeline(user_id, author_id)
+    threshold = settings.FEED_CELEBRITY_FOLLOWERS
+    if followers_count(author_id) != threshold - 1:
+        return
+    followers = Follow.objects.filter(
+        author_id=author_id,
+    ).values_list('user_id', flat=True)
+    for follower_id in followers.iterator():
+        _push_author_posts(follower_id, author_id)
+
+
+def timeline_posts(user):
+    """Посты ленты подписок, упорядоченные по индексу ленты.
+
+    Сортировка идёт по колонкам TimelineEntry, поэтому SQLite читает
+    ленту диапазоном индекса без временной сортировки.
+    """
+    return Post.objects.filter(
+        timeline_entries__user=user,
+    ).annotate(
+        feed_date=F('timeline_entries__pub_date'),
+        feed_post=F('timeline_entries__post_id'),
+    ).select_related('author', 'group').order_by('-feed_date', '-feed_post')
+
+
+def follow_feed(user):
+    """Лента подписок и порядок её курсорной паджинации.
+
+    Если пользователь не читает «знаменитостей», лента целиком берётся
+    из TimelineEntry. Иначе к разложенным постам подмешиваются посты
+    «знаменитостей», на которых он подписан.
+    """
+    pulled = list(
+        Follow.objects.filter(
+            user=user,
+            author__profile__followers_count__gte=(
+                settings.FEED_CELEBRITY_FOLLOWERS
+            ),
+        ).values_list('author_id', flat=True)
+    )
+    if not pulled:
+        return timeline_posts(user), TIMELINE_ORDERING
+    pushed = TimelineEntry.objects.filter(user=user).values('post_id')
+    posts = Post.objects.filter(
+        Q(pk__in=pushed) | Q(author_id__in=pulled),
+    ).select_related('author', 'group').order_by('-pub_date', '-id')
+    return posts, ('pub_date', 'id')
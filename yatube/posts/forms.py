@@ -3,6 +3,7 @@ from __future__ import annotations
 from django.forms import ModelForm
 
 from .models import Comment, Post
+from .uploads import PostImageField
 
 
 class PostForm(ModelForm):
@@ -10,6 +11,7 @@ class PostForm(ModelForm):
     class Meta:
         model = Post
         fields = ('text', 'group', 'image')
+        field_classes = {'image': PostImageField}
         help_texts = {
             'group': 'Выберите группу',
             'text': 'Введите сообщение',
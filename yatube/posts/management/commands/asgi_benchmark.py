@@ -0,0 +1,268 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import queue
+import threading
+import time
+from urllib.parse import urlencode
+from wsgiref.util import setup_testing_defaults
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management import BaseCommand
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from core.asgi import ASGIHandler
+from posts import urls
+from posts.async_urls import ASYNC_VIEWS
+from posts.benchmark import route_scenarios, scratch_site, summary
+from posts.decorator import show_time
+from posts.synthetic import add_size_arguments, generate
+
+HOST = 'localhost'
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает WSGI (синхронные представления, пул из --workers '
+        'потоков) и ASGI (асинхронные представления, один цикл событий) '
+        'под нагрузкой --concurrency одновременных клиентов на временной '
+        'БД: запросов в секунду и p50/p95/p99 задержки по маршрутам с '
+        'асинхронными версиями. --db-delay добавляет задержку каждому '
+        'SQL-запросу, изображая медленную БД.'
+    )
+
+    def add_arguments(self, parser):
+        add_size_arguments(
+            parser, users=200, posts=2000, comments=4000, follows=1000,
+            images=0,
+        )
+        parser.add_argument(
+            '--requests', type=int, default=200,
+            help='запросов к каждому маршруту в каждом режиме',
+        )
+        parser.add_argument('--concurrency', type=int, default=32)
+        parser.add_argument(
+            '--workers', type=int, default=8,
+            help='потоков WSGI-сервера',
+        )
+        parser.add_argument(
+            '--db-delay', type=float, default=0.0,
+            help='задержка каждого SQL-запроса, мс',
+        )
+        parser.add_argument(
+            '--cold', action='store_true',
+            help='очищать кеш перед каждым запросом',
+        )
+        parser.add_argument('--output', help='куда записать JSON')
+
+    @show_time
+    def handle(self, *args, **options):
+        sizes = {
+            name: options[name] for name in (
+                'users', 'groups', 'posts', 'comments', 'follows', 'images',
+            )
+        }
+        # кеш страниц отдал бы оба режима без представлений
+        with scratch_site(
+            QUERY_STATS_SAMPLE_RATE=0, PAGE_CACHE_TIMEOUT=0,
+            ALLOWED_HOSTS=[HOST],
+        ):
+            generate(
+                **sizes, image_ratio=options['image_ratio'],
+                seed=options['seed'],
+            )
+            targets = self.targets()
+            with db_delay(options['db_delay'] / 1000):
+                routes = self.run(targets, options)
+        for name, modes in routes.items():
+            for mode, stats in modes.items():
+                self.stdout.write(
+                    f'{name:<14} {mode} {stats["rps"]:>8} запр/с '
+                    f'p50={stats["p50"]:>8} p95={stats["p95"]:>8} '
+                    f'p99={stats["p99"]:>8} мс ошибок={stats["errors"]}',
+                )
+        if options['output']:
+            report = {
+                'sizes': sizes,
+                'concurrency': options['concurrency'],
+                'workers': options['workers'],
+                'db_delay_ms': options['db_delay'],
+                'cold': options['cold'],
+                'routes': routes,
+            }
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump(report, file, ensure_ascii=False, indent=2)
+
+    def targets(self):
+        """Маршрут -> (путь, query string, заголовок Cookie)."""
+        clients, scenarios = route_scenarios()
+        targets = {}
+        for name in ASYNC_VIEWS:
+            client, _, kwargs, data = scenarios[name]
+            cookies = clients[client].cookies
+            targets[name] = (
+                reverse(f'{urls.app_name}:{name}', kwargs=kwargs),
+                urlencode(data or {}),
+                '; '.join(
+                    f'{key}={morsel.value}' for key, morsel in cookies.items()
+                ),
+            )
+        return targets
+
+    def run(self, targets, options):
+        wsgi = WSGIHandler()
+        with override_settings(ROOT_URLCONF=settings.ASGI_URLCONF):
+            asgi = ASGIHandler()
+        routes = {}
+        for name, target in targets.items():
+            requests = [target] * options['requests']
+            routes[name] = {
+                'wsgi': run_wsgi(
+                    wsgi, requests, options['concurrency'],
+                    options['workers'], options['cold'],
+                ),
+                'asgi': asyncio.run(run_asgi(
+                    asgi, requests, options['concurrency'], options['cold'],
+                )),
+            }
+        return routes
+
+
+class db_delay:
+    """Задержка перед каждым SQL-запросом во всех соединениях."""
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+
+    def wrapper(self, execute, sql, params, many, context):
+        time.sleep(self.seconds)
+        return execute(sql, params, many, context)
+
+    def install(self, sender=None, connection=None, **kwargs):
+        if self.wrapper not in connection.execute_wrappers:
+            connection.execute_wrappers.append(self.wrapper)
+
+    def __enter__(self):
+        if self.seconds:
+            connection_created.connect(self.install)
+            for connection in connections.all():
+                self.install(connection=connection)
+        return self
+
+    def __exit__(self, *exc_info):
+        connection_created.disconnect(self.install)
+
+
+def report(latencies, errors, elapsed):
+    return {
+        **summary(latencies),
+        'rps': round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        'errors': errors,
+    }
+
+
+def run_wsgi(application, requests, concurrency, workers, cold):
+    """concurrency клиентов-потоков, сервер обрабатывает не больше
+    workers запросов одновременно; задержка включает ожидание потока."""
+    pending = queue.SimpleQueue()
+    for request in requests:
+        pending.put(request)
+    slots = threading.BoundedSemaphore(workers)
+    latencies = []
+    errors = []
+
+    def call(path, query, cookie):
+        environ = {
+            'REQUEST_METHOD': 'GET', 'PATH_INFO': path,
+            'QUERY_STRING': query, 'HTTP_COOKIE': cookie,
+            'HTTP_HOST': HOST, 'SERVER_NAME': HOST,
+        }
+        setup_testing_defaults(environ)
+        statuses = []
+        with slots:
+            if cold:
+                cache.clear()
+            body = application(
+                environ, lambda status, headers: statuses.append(status),
+            )
+            for _ in body:
+                pass
+            body.close()
+        return int(statuses[0].split()[0])
+
+    def client():
+        while True:
+            try:
+                request = pending.get_nowait()
+            except queue.Empty:
+                return
+            start = time.perf_counter()
+            try:
+                status = call(*request)
+            except Exception:
+                status = 500
+            latencies.append((time.perf_counter() - start) * 1000)
+            if status >= 400:
+                errors.append(status)
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return report(latencies, len(errors), time.perf_counter() - start)
+
+
+async def run_asgi(application, requests, concurrency, cold):
+    """concurrency клиентов-корутин в одном цикле событий."""
+    pending = list(reversed(requests))
+    latencies = []
+    errors = []
+
+    async def call(path, query, cookie):
+        scope = {
+            'type': 'http', 'asgi': {'version': '3.0'},
+            'http_version': '1.1', 'method': 'GET', 'scheme': 'http',
+            'path': path, 'raw_path': path.encode(), 'root_path': '',
+            'query_string': query.encode(),
+            'headers': [
+                (b'host', HOST.encode()), (b'cookie', cookie.encode()),
+            ],
+            'client': ('127.0.0.1', 0), 'server': (HOST, 80),
+        }
+        statuses = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                statuses.append(message['status'])
+
+        if cold:
+            cache.clear()
+        await application(scope, receive, send)
+        return statuses[0]
+
+    async def client():
+        while pending:
+            request = pending.pop()
+            start = time.perf_counter()
+            try:
+                status = await call(*request)
+            except Exception:
+                status = 500
+            latencies.append((time.perf_counter() - start) * 1000)
+            if status >= 400:
+                errors.append(status)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return report(latencies, len(errors), time.perf_counter() - start)
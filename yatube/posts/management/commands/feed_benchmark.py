@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+from django.contrib.auth import get_user_model
+from django.core.management import BaseCommand
+from django.test.utils import override_settings
+
+from posts import counters, feeds
+from posts.benchmark import measure, scratch_database, summary
+from posts.decorator import show_time
+from posts.models import Follow, Post, TimelineEntry
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает p50/p99 записи и чтения ленты подписок для обычного '
+        'автора (push) и «знаменитости» (pull) на временной БД.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--followers', type=int, default=200)
+        parser.add_argument('--celebrity-followers', type=int, default=2000)
+        parser.add_argument('--threshold', type=int, default=1000)
+        parser.add_argument('--posts', type=int, default=100)
+        parser.add_argument('--repeat', type=int, default=50)
+
+    @show_time
+    def handle(self, *args, **options):
+        with scratch_database():
+            with override_settings(
+                FEED_CELEBRITY_FOLLOWERS=options['threshold'],
+            ):
+                self.run(options)
+
+    def make_author(self, name, followers, posts):
+        author = User.objects.create_user(name)
+        User.objects.bulk_create(
+            User(username=f'{name}-follower-{i}') for i in range(followers)
+        )
+        follower_ids = User.objects.filter(
+            username__startswith=f'{name}-follower-',
+        ).values_list('id', flat=True)
+        Follow.objects.bulk_create(
+            Follow(user_id=user_id, author=author) for user_id in follower_ids
+        )
+        Post.objects.bulk_create(
+            Post(text=f'Пост {name} {i}', author=author) for i in range(posts)
+        )
+        return author, list(follower_ids)
+
+    def run(self, options):
+        repeat = options['repeat']
+        author, followers = self.make_author(
+            'author', options['followers'], options['posts'],
+        )
+        celebrity, _ = self.make_author(
+            'celebrity', options['celebrity_followers'], options['posts'],
+        )
+        # bulk_create обходит сигналы, поэтому счётчики сверяем явно
+        counters.reconcile()
+        for user_id in followers:
+            feeds.backfill_timeline(user_id, author.pk)
+
+        push_reader = User.objects.get(pk=followers[0])
+        hybrid_reader = User.objects.get(pk=followers[1])
+        Follow.objects.create(user=hybrid_reader, author=celebrity)
+
+        def read(reader):
+            return lambda: list(feeds.follow_feed(reader)[0][:10])
+
+        def write(writer):
+            return lambda: Post.objects.create(text='Новый пост', author=writer)
+
+        results = {
+            'write: обычный автор (push)': measure(write(author), repeat),
+            'write: знаменитость (pull)': measure(write(celebrity), repeat),
+        }
+        no_hybrid = feeds.followers_count(celebrity.pk) + 1
+        with override_settings(FEED_CELEBRITY_FOLLOWERS=no_hybrid):
+            results['write: знаменитость без гибрида (push)'] = measure(
+                write(celebrity), repeat,
+            )
+        results['read: только push'] = measure(read(push_reader), repeat)
+        results['read: push + pull'] = measure(read(hybrid_reader), repeat)
+
+        self.stdout.write(
+            f'TimelineEntry: {TimelineEntry.objects.count()} записей',
+        )
+        for name, samples in results.items():
+            stats = summary(samples)
+            self.stdout.write(
+                f'{name:<42} p50={stats["p50"]:>8} мс '
+                f'p99={stats["p99"]:>8} мс',
+            )
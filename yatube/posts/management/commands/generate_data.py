@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+from django.core.management import BaseCommand
+
+from posts.decorator import show_time
+from posts.synthetic import add_size_arguments, generate
+
+
+class Command(BaseCommand):
+    help = (
+        'Создаёт синтетических пользователей, группы, посты, комментарии, '
+        'подписки и картинки в масштабе продакшена.'
+    )
+
+    def add_arguments(self, parser):
+        add_size_arguments(parser)
+
+    @show_time
+    def handle(self, *args, **options):
+        created = generate(
+            users=options['users'],
+            groups=options['groups'],
+            posts=options['posts'],
+            comments=options['comments'],
+            follows=options['follows'],
+            images=options['images'],
+            image_ratio=options['image_ratio'],
+            seed=options['seed'],
+        )
+        for name, count in created.items():
+            self.stdout.write(f'{name}: {count}')
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+from django.core.cache import cache
+from django.core.management import BaseCommand, CommandError
+from django.urls import reverse
+
+from posts import urls
+from posts.benchmark import route_scenarios, scratch_site
+from posts.decorator import show_time
+from posts.queryplans import explain_queries, problems
+from posts.querystats import record_queries
+from posts.synthetic import add_size_arguments, generate
+
+
+class Command(BaseCommand):
+    help = (
+        'Генерирует данные на временной БД, запрашивает каждый маршрут '
+        'posts.urls с холодным кешем и выполняет EXPLAIN QUERY PLAN для '
+        'всех его запросов. Полные проходы по таблицам и сортировки во '
+        'временном B-tree помечаются как кандидаты на индекс.'
+    )
+
+    def add_arguments(self, parser):
+        add_size_arguments(
+            parser, users=200, posts=2000, comments=4000, follows=1000,
+            images=0,
+        )
+        parser.add_argument(
+            '--all', action='store_true',
+            help='печатать планы всех запросов, а не только проблемных',
+        )
+        parser.add_argument(
+            '--strict', action='store_true',
+            help='завершаться ошибкой, если есть проблемные планы',
+        )
+
+    @show_time
+    def handle(self, *args, **options):
+        sizes = {
+            name: options[name] for name in (
+                'users', 'groups', 'posts', 'comments', 'follows', 'images',
+            )
+        }
+        with scratch_site(QUERY_STATS_SAMPLE_RATE=0):
+            generate(
+                **sizes, image_ratio=options['image_ratio'],
+                seed=options['seed'],
+            )
+            flagged = self.advise(options['all'])
+        if not flagged:
+            self.stdout.write('Полных проходов и временных сортировок нет')
+            return
+        self.stdout.write(f'Проблемных запросов: {flagged}')
+        if options['strict']:
+            raise CommandError('Есть запросы без подходящего индекса')
+
+    def advise(self, verbose):
+        """Печатает планы по маршрутам; возвращает число проблемных."""
+        clients, scenarios = route_scenarios()
+        flagged = 0
+        for name, (client, method, kwargs, data) in scenarios.items():
+            url = reverse(f'{urls.app_name}:{name}', kwargs=kwargs)
+            cache.clear()
+            with record_queries() as recorder:
+                getattr(clients[client], method)(url, data)
+            self.stdout.write(self.style.MIGRATE_HEADING(f'{name} {url}'))
+            for sql, plan in explain_queries(recorder.queries):
+                found = problems(plan, sql)
+                flagged += bool(found)
+                if not found and not verbose:
+                    continue
+                self.stdout.write(f'  {sql}')
+                for detail in plan:
+                    line = f'    {detail}'
+                    if detail in found:
+                        line = self.style.WARNING(line + '  <- нужен индекс?')
+                    self.stdout.write(line)
+        return flagged
@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+from django.core.management import BaseCommand
+from django.db import transaction
+
+from posts import media, thumbnails
+from posts.decorator import show_time
+from posts.models import Post
+from posts.storage import image_storage
+
+
+class Command(BaseCommand):
+    help = (
+        'Переносит картинки постов со старыми именами в хранилище по '
+        'содержимому: одинаковые файлы сливаются в один, посты '
+        'переключаются на новые имена, ссылки пересчитываются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='только показать, что куда переедет',
+        )
+
+    @show_time
+    def handle(self, *args, **options):
+        names = Post.objects.exclude(image='').values_list(
+            'image', flat=True,
+        ).distinct().order_by()
+        legacy = [
+            name for name in names.iterator()
+            if not image_storage.is_content_name(name)
+        ]
+        moved = missing = 0
+        for name in legacy:
+            if not image_storage.exists(name):
+                self.stderr.write(f'Нет файла: {name}')
+                missing += 1
+                continue
+            new_name = media.migrate_file(name, dry_run=options['dry_run'])
+            self.stdout.write(f'{name} -> {new_name}')
+            if not options['dry_run']:
+                thumbnails.pregenerate(new_name)
+            moved += 1
+        if not options['dry_run']:
+            with transaction.atomic():
+                repaired = media.reconcile()
+            self.stdout.write(f'Ссылки: {repaired}')
+        self.stdout.write(f'Перенесено: {moved}, без файла: {missing}')
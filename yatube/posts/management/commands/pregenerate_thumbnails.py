@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+from django.core.management import BaseCommand
+
+from posts import thumbnails
+from posts.decorator import show_time
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = (
+        'Создаёт недостающие миниатюры и заглушки для картинок уже '
+        'существующих постов.'
+    )
+
+    @show_time
+    def handle(self, *args, **options):
+        with_image = Post.objects.exclude(image='')
+        no_placeholder = set(with_image.filter(
+            image_placeholder='',
+        ).values_list('image', flat=True))
+        processed = 0
+        names = with_image.values_list('image', flat=True).distinct()
+        for name in names.iterator():
+            if name in no_placeholder or not thumbnails.ready(name):
+                thumbnails.pregenerate(name)
+                processed += 1
+        self.stdout.write(f'Обработано картинок: {processed}')
@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.management import BaseCommand, CommandError
+from django.test import Client
+from django.test.utils import override_settings
+
+from posts.querystats import stats
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Запрашивает адреса в этом процессе с записью всех запросов и '
+        'печатает статистику SQL по представлениям. Статистику живого '
+        'сервера отдаёт /posts/query_stats/ (только для staff).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='*', default=['/'])
+        parser.add_argument('--repeat', type=int, default=1)
+        parser.add_argument('--user', help='войти под этим пользователем')
+        parser.add_argument('--json', action='store_true')
+
+    def handle(self, *args, **options):
+        client = Client()
+        if options['user']:
+            user = User.objects.filter(username=options['user']).first()
+            if user is None:
+                raise CommandError(f'Нет пользователя {options["user"]}')
+            client.force_login(user)
+        stats.reset()
+        with override_settings(QUERY_STATS_SAMPLE_RATE=1):
+            for _ in range(options['repeat']):
+                for path in options['paths']:
+                    client.get(path)
+        snapshot = stats.snapshot()
+        if options['json']:
+            self.stdout.write(json.dumps(snapshot, ensure_ascii=False, indent=2))
+            return
+        for name, view in snapshot['views'].items():
+            self.stdout.write(
+                f'{name}: запросов {view["requests"]}, '
+                f'SQL в среднем {view["avg_queries"]} '
+                f'(макс. {view["max_queries"]}), '
+                f'БД {view["avg_db_time_ms"]} мс',
+            )
+            for duplicate in view['duplicates']:
+                self.stdout.write(
+                    f'  x{duplicate["max_per_request"]} {duplicate["sql"]}',
+                )
+        self.stdout.write('Самые медленные запросы:')
+        for query in snapshot['slowest']:
+            self.stdout.write(
+                f'  {query["time_ms"]} мс {query["view"]}: {query["sql"]}',
+            )
@@ -0,0 +1,21 @@
+from __future__ import annotations
+
+from django.core.management import BaseCommand
+
+from posts import search
+from posts.decorator import show_time
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает нормализованные поисковые колонки и перестраивает '
+        'полнотекстовый индекс постов (SQLite FTS5).'
+    )
+
+    @show_time
+    def handle(self, *args, **options):
+        for column, rows in search.refold_all().items():
+            self.stdout.write(f'{column}: {rows}')
+        if search.fts_available():
+            search.rebuild()
+            self.stdout.write('Индекс постов перестроен')
@@ -0,0 +1,21 @@
+from __future__ import annotations
+
+from django.core.management import BaseCommand
+from django.db import transaction
+
+from posts import counters
+from posts.decorator import show_time
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает денормализованные счётчики постов, комментариев '
+        'и подписок и исправляет разошедшиеся значения.'
+    )
+
+    @show_time
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            repaired = counters.reconcile()
+        for counter, rows in repaired.items():
+            self.stdout.write(f'{counter}: {rows}')
@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+from django.core.management import BaseCommand
+
+from posts import rendering
+from posts.decorator import show_time
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет начало текста (excerpt) и HTML (text_html) постов, '
+        'например после миграции или массовой правки текста.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--missing', action='store_true',
+            help='только посты, у которых excerpt ещё пуст',
+        )
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    @show_time
+    def handle(self, *args, **options):
+        posts = Post.objects.all()
+        if options['missing']:
+            posts = posts.filter(excerpt='')
+        total = rendering.render_all(posts, options['batch_size'])
+        self.stdout.write(f'Обработано постов: {total}')
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import json
+
+from django.core.cache import cache
+from django.core.management import BaseCommand, CommandError
+from django.urls import reverse
+
+from posts import urls
+from posts.benchmark import (compare, measure, route_scenarios,
+                             scratch_site, summary)
+from posts.decorator import show_time
+from posts.querystats import record_queries
+from posts.synthetic import add_size_arguments, generate
+
+
+class Command(BaseCommand):
+    help = (
+        'Генерирует данные на временной БД и замеряет p50/p95/p99 и число '
+        'запросов для каждого маршрута posts.urls. Результат пишется в '
+        'JSON и сравнивается с сохранённым baseline.'
+    )
+
+    def add_arguments(self, parser):
+        add_size_arguments(
+            parser, users=200, posts=2000, comments=4000, follows=1000,
+            images=5,
+        )
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument(
+            '--cold', action='store_true',
+            help='очищать кеш перед каждым запросом',
+        )
+        parser.add_argument('--output', help='куда записать JSON')
+        parser.add_argument('--baseline', help='JSON прошлого прогона')
+        parser.add_argument('--tolerance', type=float, default=0.2)
+
+    @show_time
+    def handle(self, *args, **options):
+        sizes = {
+            name: options[name] for name in (
+                'users', 'groups', 'posts', 'comments', 'follows', 'images',
+            )
+        }
+        with scratch_site(QUERY_STATS_SAMPLE_RATE=0):
+            generate(
+                **sizes, image_ratio=options['image_ratio'],
+                seed=options['seed'],
+            )
+            routes = self.run(options)
+        report = {'sizes': sizes, 'cold': options['cold'], 'routes': routes}
+        for name, stats in routes.items():
+            self.stdout.write(
+                f'{name:<24} p50={stats["p50"]:>8} p95={stats["p95"]:>8} '
+                f'p99={stats["p99"]:>8} мс запросов={stats["queries"]}',
+            )
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump(report, file, ensure_ascii=False, indent=2)
+        if options['baseline']:
+            self.check_baseline(routes, options)
+
+    def check_baseline(self, routes, options):
+        with open(options['baseline'], encoding='utf-8') as file:
+            baseline = json.load(file)
+        regressions = compare(routes, baseline['routes'], options['tolerance'])
+        if regressions:
+            raise CommandError(
+                'Регрессии относительно baseline:\n' + '\n'.join(regressions),
+            )
+        self.stdout.write('Регрессий относительно baseline нет')
+
+    def run(self, options):
+        clients, scenarios = route_scenarios()
+        samples = {name: [] for name in scenarios}
+        queries = dict.fromkeys(scenarios, 0)
+        for _ in range(options['repeat']):
+            for name, (client, method, kwargs, data) in scenarios.items():
+                url = reverse(f'{urls.app_name}:{name}', kwargs=kwargs)
+                if options['cold']:
+                    cache.clear()
+                request = getattr(clients[client], method)
+                with record_queries() as recorder:
+                    samples[name] += measure(lambda: request(url, data), 1)
+                queries[name] = max(queries[name], recorder.count)
+        return {
+            name: {**summary(samples[name]), 'queries': queries[name]}
+            for name in scenarios
+        }
@@ -0,0 +1,113 @@
+"""Счётчики ссылок на файлы картинок.
+
+Одинаковые загрузки хранятся одним файлом (posts.storage), поэтому
+удалять файл вместе с постом нельзя. StoredImage.refs - сколько
+постов ссылается на файл; когда ссылок не остаётся, файл и его
+миниатюры удаляются после коммита. Файлы со старыми именами
+(до хранилища по содержимому) не учитываются и не удаляются.
+"""
+
+from __future__ import annotations
+
+import logging
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+from django.utils import timezone
+from sorl.thumbnail import delete as delete_thumbnails
+from sorl.thumbnail.images import ImageFile
+
+from . import counters
+from .models import Post, StoredImage
+from .storage import image_storage
+
+logger = logging.getLogger(__name__)
+
+
+def acquire(name, count=1):
+    """Ещё count постов ссылаются на файл name."""
+    if not count or not image_storage.is_content_name(name):
+        return
+    stored = StoredImage.objects.filter(name=name)
+    if stored.update(refs=F('refs') + count):
+        return
+    try:
+        with transaction.atomic():
+            StoredImage.objects.create(name=name, refs=count)
+    except IntegrityError:
+        stored.update(refs=F('refs') + count)
+
+
+def release(name):
+    """Пост больше не ссылается на файл name."""
+    if not name or not image_storage.is_content_name(name):
+        return
+    counters.change(StoredImage.objects.filter(name=name), 'refs', -1)
+    transaction.on_commit(lambda: collect(name))
+
+
+def collect(name):
+    """Удаляет файл name с миниатюрами, если на него не осталось ссылок."""
+    deleted, _ = StoredImage.objects.filter(name=name, refs=0).delete()
+    if deleted:
+        try:
+            delete_thumbnails(ImageFile(name, image_storage))
+        except Exception:
+            logger.exception('Не удалось удалить файл %s', name)
+
+
+def reconcile():
+    """Пересчитывает ссылки по постам, например после bulk_create.
+
+    Возвращает число исправленных, созданных и удалённых записей.
+    """
+    actual = dict(
+        Post.objects.exclude(image='').order_by().values('image').annotate(
+            total=Count('pk'),
+        ).values_list('image', 'total'),
+    )
+    actual = {
+        name: total for name, total in actual.items()
+        if image_storage.is_content_name(name)
+    }
+    repaired = 0
+    for stored in StoredImage.objects.filter(name__in=actual).iterator():
+        if stored.refs != actual[stored.name]:
+            stored.refs = actual[stored.name]
+            stored.save(update_fields=['refs'])
+            repaired += 1
+    known = set(StoredImage.objects.filter(
+        name__in=actual,
+    ).values_list('name', flat=True))
+    created = StoredImage.objects.bulk_create(
+        StoredImage(name=name, refs=total)
+        for name, total in actual.items() if name not in known
+    )
+    orphans = StoredImage.objects.exclude(name__in=actual)
+    orphans.update(refs=0)
+    orphaned = list(orphans.values_list('name', flat=True))
+    for name in orphaned:
+        transaction.on_commit(lambda name=name: collect(name))
+    return {
+        'repaired': repaired, 'created': len(created),
+        'orphaned': len(orphaned),
+    }
+
+
+def migrate_file(name, dry_run=False):
+    """Переносит файл со старым именем в хранилище по содержимому.
+
+    Посты переключаются на новое имя, старый файл и его миниатюры
+    удаляются. Возвращает новое имя.
+    """
+    with image_storage.open(name) as source:
+        if dry_run:
+            return image_storage.content_name(name, source)
+        new_name = image_storage.save(name, source)
+    with transaction.atomic():
+        moved = Post.objects.filter(image=name).update(
+            image=new_name, image_placeholder='', updated=timezone.now(),
+        )
+        acquire(new_name, moved)
+    delete_thumbnails(ImageFile(name, image_storage))
+    return new_name
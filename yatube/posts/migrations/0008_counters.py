@@ -0,0 +1,60 @@
+# Generated by Django 4.1 on 2026-10-17 14:52
+from __future__ import annotations
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def actual(model, field):
+    counted = model.objects.filter(
+        **{field: OuterRef('pk' if field in ('group', 'post') else 'user_id')},
+    ).order_by().values(field).annotate(total=Count('pk')).values('total')
+    return Coalesce(Subquery(counted), 0)
+
+
+def fill_counters(apps, schema_editor):
+    """Профили для всех пользователей и начальные значения счётчиков."""
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    Profile = apps.get_model('users', 'Profile')
+    Post = apps.get_model('posts', 'Post')
+    Comment = apps.get_model('posts', 'Comment')
+    Follow = apps.get_model('posts', 'Follow')
+    Group = apps.get_model('posts', 'Group')
+    Profile.objects.bulk_create(
+        Profile(user_id=user_id)
+        for user_id in User.objects.filter(
+            profile__isnull=True,
+        ).values_list('pk', flat=True)
+    )
+    Profile.objects.update(
+        posts_count=actual(Post, 'author'),
+        followers_count=actual(Follow, 'author'),
+        following_count=actual(Follow, 'user'),
+    )
+    Group.objects.update(posts_count=actual(Post, 'group'))
+    Post.objects.update(comments_count=actual(Comment, 'post'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('users', '0001_profile'),
+        ('posts', '0007_timelineentry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='group',
+            name='posts_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Постов в группе'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='comments_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Комментариев'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
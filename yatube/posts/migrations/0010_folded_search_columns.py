@@ -0,0 +1,34 @@
+# Generated by Django 4.1 on 2026-10-17 14:55
+from __future__ import annotations
+
+from django.db import migrations, models
+
+from core.text import refold
+
+
+def fill_folded(apps, schema_editor):
+    Group = apps.get_model('posts', 'Group')
+    Post = apps.get_model('posts', 'Post')
+    refold(Group.objects.all(), 'title', 'title_folded')
+    refold(Post.objects.all(), 'text', 'text_folded')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0009_post_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='group',
+            name='title_folded',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=200, verbose_name='Название для поиска'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='text_folded',
+            field=models.TextField(default='', editable=False, verbose_name='Текст для поиска'),
+        ),
+        migrations.RunPython(fill_folded, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.1 on 2026-10-17 15:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0010_folded_search_columns'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='image_placeholder',
+            field=models.TextField(blank=True, default='', editable=False, verbose_name='Заглушка картинки (data URI)'),
+        ),
+    ]
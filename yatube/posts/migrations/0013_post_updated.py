@@ -0,0 +1,18 @@
+# Generated by Django 4.1 on 2026-10-17 15:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0012_content_addressed_images'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='updated',
+            field=models.DateTimeField(auto_now=True, verbose_name='Изменён'),
+        ),
+    ]
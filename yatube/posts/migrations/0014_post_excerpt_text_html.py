@@ -0,0 +1,32 @@
+# Generated by Django 4.1 on 2026-10-17 15:19
+from __future__ import annotations
+
+from django.db import migrations, models
+
+from posts.rendering import render_all
+
+
+def fill_rendered(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    render_all(Post.objects.all())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0013_post_updated'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='excerpt',
+            field=models.CharField(default='', editable=False, max_length=100, verbose_name='Начало текста'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='text_html',
+            field=models.TextField(default='', editable=False, verbose_name='Текст в HTML'),
+        ),
+        migrations.RunPython(fill_rendered, migrations.RunPython.noop),
+    ]
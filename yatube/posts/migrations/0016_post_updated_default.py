@@ -0,0 +1,19 @@
+# Generated by Django 4.1 on 2026-10-17 15:46
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0015_composite_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='post',
+            name='updated',
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name='Изменён'),
+        ),
+    ]
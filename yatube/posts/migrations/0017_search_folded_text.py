@@ -0,0 +1,109 @@
+# Generated by Django 4.1 on 2026-10-17 16:05
+from __future__ import annotations
+
+import html
+import unicodedata
+
+from django.db import migrations
+from django.utils.html import strip_tags
+
+FTS_TABLE = 'posts_post_fts'
+BATCH_SIZE = 500
+
+
+def index_sql(column):
+    """Индекс FTS5 по колонке column и триггеры, которые его ведут."""
+    return (
+        f"""
+        CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+            {column},
+            content='posts_post',
+            content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2'
+        )
+        """,
+        f"""
+        CREATE TRIGGER {FTS_TABLE}_insert
+        AFTER INSERT ON posts_post BEGIN
+            INSERT INTO {FTS_TABLE}(rowid, {column})
+            VALUES (new.id, new.{column});
+        END
+        """,
+        f"""
+        CREATE TRIGGER {FTS_TABLE}_delete
+        AFTER DELETE ON posts_post BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {column})
+            VALUES ('delete', old.id, old.{column});
+        END
+        """,
+        f"""
+        CREATE TRIGGER {FTS_TABLE}_update
+        AFTER UPDATE OF {column} ON posts_post BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {column})
+            VALUES ('delete', old.id, old.{column});
+            INSERT INTO {FTS_TABLE}(rowid, {column})
+            VALUES (new.id, new.{column});
+        END
+        """,
+    )
+
+
+def fold(value):
+    return unicodedata.normalize('NFKC', value).casefold().replace('ё', 'е')
+
+
+def fold_plain(value):
+    return fold(html.unescape(strip_tags(value)))
+
+
+def refold(Post, normalize):
+    last_pk = 0
+    while True:
+        batch = list(
+            Post.objects.filter(pk__gt=last_pk).order_by('pk').only(
+                'pk', 'text',
+            )[:BATCH_SIZE]
+        )
+        if not batch:
+            return
+        for post in batch:
+            post.text_folded = normalize(post.text or '')
+        Post.objects.bulk_update(batch, ['text_folded'])
+        last_pk = batch[-1].pk
+
+
+def reindex(apps, schema_editor, column, normalize):
+    """Пересчитывает text_folded и строит индекс по column заново."""
+    sqlite = schema_editor.connection.vendor == 'sqlite'
+    if sqlite:
+        for suffix in ('insert', 'delete', 'update'):
+            schema_editor.execute(
+                f'DROP TRIGGER IF EXISTS {FTS_TABLE}_{suffix}',
+            )
+        schema_editor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+    refold(apps.get_model('posts', 'Post'), normalize)
+    if sqlite:
+        for statement in index_sql(column):
+            schema_editor.execute(statement)
+        schema_editor.execute(
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+        )
+
+
+def index_folded_text(apps, schema_editor):
+    reindex(apps, schema_editor, 'text_folded', fold_plain)
+
+
+def index_raw_text(apps, schema_editor):
+    reindex(apps, schema_editor, 'text', fold)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0016_post_updated_default'),
+    ]
+
+    operations = [
+        migrations.RunPython(index_folded_text, index_raw_text),
+    ]
@@ -1,6 +1,8 @@
 from django.contrib.auth import get_user_model
 from django.db import models
+from django.utils import timezone
 
+from .storage import image_storage
 from .validators import validate_not_empty
 
 User = get_user_model()
@@ -21,6 +23,16 @@ class Group(models.Model):
         'Описание группы',
         help_text='Напишите о чём ваша группа'
     )
+    posts_count = models.PositiveIntegerField(
+        'Постов в группе', default=0, editable=False,
+    )
+    title_folded = models.CharField(
+        'Название для поиска',
+        max_length=200,
+        default='',
+        editable=False,
+        db_index=True,
+    )
 
     def __str__(self):
         return self.title
@@ -33,12 +45,18 @@ class Post(models.Model):
         validators=[validate_not_empty]
     )
     pub_date = models.DateTimeField(auto_now_add=True)
+    # версия кеша карточки поста: меняется при сохранении поста и при
+    # изменении его автора, группы или картинки (posts.caching.touch).
+    # Не auto_now: у raw-сохранения из loaddata нужно значение по умолчанию,
+    # а обычные сохранения проставляют время в posts.signals.stamp_updated
+    updated = models.DateTimeField('Изменён', default=timezone.now)
     author = models.ForeignKey(
         User,
         verbose_name='Автор поста',
         help_text='Выберите автора',
         on_delete=models.CASCADE,
-        related_name='posts'
+        related_name='posts',
+        db_index=False,  # покрыт post_author_pub_date_idx
     )
     group = models.ForeignKey(
         Group,
@@ -47,18 +65,53 @@ class Post(models.Model):
         on_delete=models.SET_NULL,
         blank=True,
         null=True,
-        related_name='posts'
+        related_name='posts',
+        db_index=False,  # покрыт post_group_pub_date_idx
     )
     image = models.ImageField(
         'Картинка',
         upload_to='posts/',
+        storage=image_storage,
         blank=True
     )
+    image_placeholder = models.TextField(
+        'Заглушка картинки (data URI)', blank=True, default='',
+        editable=False,
+    )
+    comments_count = models.PositiveIntegerField(
+        'Комментариев', default=0, editable=False,
+    )
+    text_folded = models.TextField(
+        'Текст для поиска', default='', editable=False,
+    )
+    # готовые к выводу формы текста (posts.rendering): лентам хватает
+    # excerpt, и сам text они не читают
+    excerpt = models.CharField(
+        'Начало текста', max_length=100, default='', editable=False,
+    )
+    text_html = models.TextField(
+        'Текст в HTML', default='', editable=False,
+    )
 
     class Meta:
         ordering = ('-pub_date',)
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
+        # индексы повторяют порядок лент (-pub_date, -id): страница
+        # читается проходом по индексу без сортировки во временном B-tree
+        indexes = [
+            models.Index(
+                fields=['-pub_date', '-id'], name='post_pub_date_idx',
+            ),
+            models.Index(
+                fields=['author', '-pub_date', '-id'],
+                name='post_author_pub_date_idx',
+            ),
+            models.Index(
+                fields=['group', '-pub_date', '-id'],
+                name='post_group_pub_date_idx',
+            ),
+        ]
 
     def __str__(self):
         if len(self.text) < 15:
@@ -73,7 +126,8 @@ class Comment(models.Model):
         Post, on_delete=models.CASCADE,
         related_name='comments',
         verbose_name='Пост',
-        help_text='Коммент под этим постом')
+        help_text='Коммент под этим постом',
+        db_index=False)  # покрыт comment_post_created_idx
     author = models.ForeignKey(
         User, on_delete=models.CASCADE,
         related_name='comments',
@@ -90,6 +144,12 @@ class Comment(models.Model):
     class Meta:
         ordering = ('-created',)
         verbose_name_plural = 'Комментарии к постам'
+        indexes = [
+            models.Index(
+                fields=['post', '-created', '-id'],
+                name='comment_post_created_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.text[:15]
@@ -102,13 +162,15 @@ class Follow(models.Model):
         related_name='follower',
         verbose_name='Пользователь',
         help_text='Выберите пользователя',
+        db_index=False,  # покрыт unique_author_user_following
     )
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
         related_name='following',
         verbose_name='Автор для подписки',
-        help_text='ВЫберите на кого хотите подписаться'
+        help_text='ВЫберите на кого хотите подписаться',
+        db_index=False,  # покрыт follow_author_user_idx
     )
 
     class Meta:
@@ -117,6 +179,69 @@ class Follow(models.Model):
                 fields=['user', 'author'], name='unique_author_user_following'
             )
         ]
+        # обратный поиск подписчиков автора (раскладка ленты, счётчики)
+        # читает только индекс
+        indexes = [
+            models.Index(
+                fields=['author', 'user'], name='follow_author_user_idx',
+            ),
+        ]
 
     def __str__(self):
         return f'{self.user} подписался на {self.author}'
+
+
+class StoredImage(models.Model):
+    """Файл картинки в хранилище по содержимому (posts.storage).
+
+    refs - сколько постов ссылается на файл: одинаковые загрузки
+    хранятся один раз, и файл удаляется вместе с последней ссылкой.
+    """
+    name = models.CharField('Имя файла', max_length=100, unique=True)
+    refs = models.PositiveIntegerField('Ссылок', default=0)
+
+    class Meta:
+        verbose_name = 'Файл картинки'
+        verbose_name_plural = 'Файлы картинок'
+
+    def __str__(self):
+        return f'{self.name} ({self.refs})'
+
+
+class TimelineEntry(models.Model):
+    """Запись в ленте подписок пользователя (fan-out on write).
+
+    pub_date копируется из поста, чтобы лента читалась одним
+    проходом по индексу (user, -pub_date, -post).
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+        verbose_name='Читатель',
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name='Пост',
+    )
+    pub_date = models.DateTimeField('Дата публикации поста')
+
+    class Meta:
+        verbose_name = 'Запись ленты подписок'
+        verbose_name_plural = 'Лента подписок'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'post'], name='unique_timeline_user_post'
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date', '-post'],
+                name='timeline_user_pub_date_idx',
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.post} в ленте {self.user}'
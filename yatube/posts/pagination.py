@@ -0,0 +1,235 @@
+"""Курсорная (keyset) паджинация: страница выбирается не через
+OFFSET, а по значению ключа сортировки последней показанной записи,
+поэтому любая страница стоит столько же, сколько первая.
+
+Нумерованные страницы считают число записей по денормализованному
+счётчику вместо COUNT(*) и выводят только окно ссылок вокруг
+текущей страницы.
+"""
+
+from __future__ import annotations
+
+import base64
+import binascii
+import collections.abc
+import json
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import EmptyPage, Page, PageNotAnInteger, Paginator
+
+# окно ссылок: страниц по бокам от текущей и в начале и в конце
+PAGES_ON_EACH_SIDE = 2
+PAGES_ON_ENDS = 1
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class CursorPage(collections.abc.Sequence):
+    """Страница курсорной паджинации, совместимая с шаблонами Page."""
+    cursor_mode = True
+
+    def __init__(self, object_list, paginator, cursor='',
+                 has_next=False, has_previous=False):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.cursor = cursor
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __repr__(self):
+        return f'<CursorPage {self.cursor or "first"}>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    @property
+    def next_cursor(self):
+        """Курсор для перехода к более старым записям."""
+        if not self._has_next or not self.object_list:
+            return ''
+        return self.paginator.encode_cursor(self.object_list[-1])
+
+    @property
+    def previous_cursor(self):
+        """Курсор для перехода к более новым записям."""
+        if not self._has_previous or not self.object_list:
+            return ''
+        return self.paginator.encode_cursor(self.object_list[0])
+
+
+class CursorPaginator:
+    """Паджинатор по составному ключу, по умолчанию (pub_date, id).
+
+    Записи отдаются от новых к старым. Ключ должен быть уникальным,
+    поэтому последним полем всегда идёт первичный ключ.
+    """
+
+    def __init__(self, object_list, per_page, ordering=('pub_date', 'id')):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+        self.ordering = tuple(ordering)
+
+    def encode_cursor(self, obj):
+        # isoformat() сохраняет микросекунды, в отличие от DjangoJSONEncoder
+        values = [getattr(obj, field) for field in self.ordering]
+        raw = json.dumps(values, default=lambda value: value.isoformat())
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        padded = cursor + '=' * (-len(cursor) % 4)
+        try:
+            values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        except (binascii.Error, UnicodeDecodeError, ValueError) as error:
+            raise InvalidCursor(cursor) from error
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise InvalidCursor(cursor)
+        try:
+            return [
+                self._field(field).to_python(value)
+                for field, value in zip(self.ordering, values)
+            ]
+        except ValidationError as error:
+            raise InvalidCursor(cursor) from error
+
+    def _field(self, name):
+        """Поле модели или аннотация queryset для разбора курсора."""
+        annotations = self.object_list.query.annotations
+        if name in annotations:
+            return annotations[name].output_field
+        return self.object_list.model._meta.get_field(name)
+
+    def _seek(self, values, older):
+        """Условие «строго после курсора» в виде, удобном для индекса:
+        f0 <= v0 AND NOT (f0 = v0 AND f1 >= v1) для движения к старым."""
+        first, *rest = self.ordering
+        first_value, *rest_values = values
+        lookup, tie_lookup = ('lte', 'gte') if older else ('gte', 'lte')
+        queryset = self.object_list.filter(
+            **{f'{first}__{lookup}': first_value},
+        )
+        tie = {first: first_value}
+        for field, value in zip(rest[:-1], rest_values[:-1]):
+            tie[field] = value
+        tie[f'{rest[-1]}__{tie_lookup}'] = rest_values[-1]
+        return queryset.exclude(**tie)
+
+    def _order(self, descending):
+        sign = '-' if descending else ''
+        return [f'{sign}{field}' for field in self.ordering]
+
+    def page(self, after=None, before=None):
+        """Страница после курсора after (старее) или перед before (новее).
+
+        Некорректный курсор приводит к InvalidCursor.
+        """
+        limit = self.per_page + 1
+        if before:
+            queryset = self._seek(self.decode_cursor(before), older=False)
+            rows = list(queryset.order_by(*self._order(False))[:limit])
+            has_previous = len(rows) > self.per_page
+            rows = rows[:self.per_page][::-1]
+            return CursorPage(
+                rows, self, cursor=f'b:{before}',
+                has_next=True, has_previous=has_previous,
+            )
+        queryset = self.object_list
+        if after:
+            queryset = self._seek(self.decode_cursor(after), older=True)
+        rows = list(queryset.order_by(*self._order(True))[:limit])
+        return CursorPage(
+            rows[:self.per_page], self, cursor=f'a:{after}' if after else '',
+            has_next=len(rows) > self.per_page, has_previous=bool(after),
+        )
+
+    def get_page(self, after=None, before=None):
+        """Как page(), но при битом курсоре отдаёт первую страницу."""
+        try:
+            return self.page(after=after, before=before)
+        except InvalidCursor:
+            return self.page()
+
+
+class ElidedPage(Page):
+    cursor_mode = False
+
+    @property
+    def page_links(self):
+        """Номера страниц для ссылок, пропуски - Paginator.ELLIPSIS."""
+        return self.paginator.get_elided_page_range(
+            self.number,
+            on_each_side=PAGES_ON_EACH_SIDE, on_ends=PAGES_ON_ENDS,
+        )
+
+
+class EstimatedPaginator(Paginator):
+    """Paginator, которому число записей передают готовым.
+
+    count - оценка, например счётчик постов группы: COUNT(*) не
+    выполняется. Страница читается с одной лишней записью, поэтому
+    has_next всегда точен, а оценка поправляется по тому, что реально
+    нашлось. Если за оценкой записей не оказалось, паджинатор
+    откатывается к точному COUNT(*).
+    """
+
+    def __init__(self, object_list, per_page, count=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.estimate = count
+        if count is not None:
+            self.__dict__['count'] = count
+
+    def _get_page(self, *args, **kwargs):
+        return ElidedPage(*args, **kwargs)
+
+    def _set_count(self, count):
+        self.__dict__['count'] = count
+        self.__dict__.pop('num_pages', None)
+
+    def validate_number(self, number):
+        if self.estimate is None:
+            return super().validate_number(number)
+        # верхнюю границу по оценке не проверяем: её поправит page()
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger('Номер страницы не число')
+        if number < 1:
+            raise EmptyPage('Номер страницы меньше 1')
+        return number
+
+    def page(self, number):
+        if self.estimate is None:
+            return super().page(number)
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        rows = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if not rows and number > 1:
+            # оценка завышена: дальше считаем честно
+            self.estimate = None
+            self.__dict__.pop('count', None)
+            self.__dict__.pop('num_pages', None)
+            raise EmptyPage('На странице нет записей')
+        if len(rows) > self.per_page:
+            self._set_count(max(self.count, bottom + len(rows)))
+        else:
+            self._set_count(bottom + len(rows))
+        return self._get_page(rows[:self.per_page], number, self)
+
+    def get_page(self, number):
+        try:
+            return super().get_page(number)
+        except EmptyPage:
+            return super().get_page(number)
@@ -0,0 +1,66 @@
+"""Планы SQLite-запросов (EXPLAIN QUERY PLAN).
+
+explain() возвращает строки плана запроса, problems() выбирает из
+них признаки отсутствующего индекса: полный проход по таблице
+(SCAN без индекса) и сортировку во временном B-tree. Проход по
+индексу (SCAN ... USING INDEX) полным не считается: так читаются
+ленты с LIMIT в порядке индекса. Не считается и проход запроса без
+WHERE - он читает всю таблицу намеренно (список групп в форме)
+"""
+
+from __future__ import annotations
+
+import re
+
+from django.db import connection
+
+from .querystats import fingerprint
+
+SCAN_RE = re.compile(r'^SCAN (?:TABLE )?(?P<table>\S+)(?P<rest>.*)$')
+WHERE_RE = re.compile(r'\bWHERE\b', re.IGNORECASE)
+TEMP_SORT = 'USE TEMP B-TREE'
+# план имеет смысл только для чтения и изменения по условию
+EXPLAINABLE = ('SELECT', 'UPDATE', 'DELETE')
+
+
+def explainable(sql):
+    return sql.lstrip().upper().startswith(EXPLAINABLE)
+
+
+def explain(sql, params=(), using=connection):
+    """Строки плана запроса без служебных колонок."""
+    with using.cursor() as cursor:
+        cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def is_full_scan(detail):
+    match = SCAN_RE.match(detail)
+    if match is None or match['table'] == 'CONSTANT':
+        return False
+    rest = match['rest']
+    return 'INDEX' not in rest and 'VIRTUAL TABLE' not in rest
+
+
+def problems(plan, sql=None):
+    """Строки плана с полным проходом или временной сортировкой."""
+    filtered = sql is None or WHERE_RE.search(sql) is not None
+    return [
+        detail for detail in plan
+        if (filtered and is_full_scan(detail)) or TEMP_SORT in detail
+    ]
+
+
+def explain_queries(queries, using=connection):
+    """Планы различных запросов из записи QueryRecorder.
+
+    Возвращает список (fingerprint, план) в порядке первого выполнения;
+    повторы запроса с другими параметрами объясняются один раз.
+    """
+    plans = {}
+    for sql, params, _ in queries:
+        key = fingerprint(sql)
+        if key in plans or not explainable(sql):
+            continue
+        plans[key] = explain(sql, params, using)
+    return list(plans.items())
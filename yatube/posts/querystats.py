@@ -0,0 +1,226 @@
+"""Статистика SQL-запросов по представлениям.
+
+QueryRecorder перехватывает запросы через execute_wrapper, поэтому
+работает и при DEBUG=False, в отличие от connection.queries.
+QueryStatsMiddleware записывает долю запросов QUERY_STATS_SAMPLE_RATE
+и складывает итоги в память процесса: по каждому представлению
+число запросов, время в БД, повторяющиеся в одном ответе запросы
+(признак N+1) и самые медленные запросы.
+Под ASGI запросы асинхронного представления идут из потоков
+sync_to_async со своими соединениями, поэтому там запись ведётся
+через contextvar (record_context_queries). Обёртка для этого ставится
+на соединения только в записываемых запросах: при выключенной выборке
+запросы идут без неё.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import heapq
+import random
+import re
+import threading
+import time
+from contextlib import ExitStack, asynccontextmanager, contextmanager
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.urls import Resolver404, resolve
+
+IN_LIST_RE = re.compile(r'IN \((?:%s, )*%s\)')
+WHITESPACE_RE = re.compile(r'\s+')
+
+
+def fingerprint(sql):
+    """SQL без параметров: IN (%s, %s, ...) сворачивается в IN (...)."""
+    sql = IN_LIST_RE.sub('IN (...)', sql)
+    return WHITESPACE_RE.sub(' ', sql).strip()
+
+
+class QueryRecorder:
+    """Собирает (sql, params, время в секундах) выполненных запросов."""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((sql, params, time.perf_counter() - start))
+
+    @property
+    def count(self):
+        return len(self.queries)
+
+    @property
+    def time(self):
+        return sum(duration for _, _, duration in self.queries)
+
+    def fingerprints(self):
+        """Число выполнений каждого вида запроса."""
+        counts = {}
+        for sql, _, _ in self.queries:
+            key = fingerprint(sql)
+            counts[key] = counts.get(key, 0) + 1
+        return counts
+
+
+@contextmanager
+def record_queries():
+    """Записывает запросы ко всем базам внутри блока."""
+    recorder = QueryRecorder()
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(recorder))
+        yield recorder
+
+
+current_recorder = contextvars.ContextVar('current_recorder', default=None)
+
+
+def record_to_current(execute, sql, params, many, context):
+    """Обёртка каждого соединения: пишет в recorder текущего контекста."""
+    recorder = current_recorder.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+    return recorder(execute, sql, params, many, context)
+
+
+def install_context_recorder():
+    """Ставит record_to_current на соединения текущего потока."""
+    for connection in connections.all():
+        if record_to_current not in connection.execute_wrappers:
+            connection.execute_wrappers.insert(0, record_to_current)
+
+
+@asynccontextmanager
+async def record_context_queries():
+    """Записывает запросы этого контекста, в каком бы потоке
+    sync_to_async они ни выполнялись.
+
+    Обёртка ставится в потоке, где выполняются sync_to_async этого
+    запроса, и остаётся на его соединениях.
+    """
+    recorder = QueryRecorder()
+    token = current_recorder.set(recorder)
+    try:
+        await sync_to_async(install_context_recorder)()
+        yield recorder
+    finally:
+        current_recorder.reset(token)
+
+
+class QueryStats:
+    """Потокобезопасные итоги по представлениям."""
+
+    def __init__(self, top=10):
+        self.top = top
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.views = {}
+            self.slowest = []
+
+    def add(self, view_name, recorder):
+        with self.lock:
+            view = self.views.setdefault(view_name, {
+                'requests': 0,
+                'queries': 0,
+                'max_queries': 0,
+                'db_time_ms': 0.0,
+                'duplicates': {},
+            })
+            view['requests'] += 1
+            view['queries'] += recorder.count
+            view['max_queries'] = max(view['max_queries'], recorder.count)
+            view['db_time_ms'] += recorder.time * 1000
+            for sql, times in recorder.fingerprints().items():
+                if times > 1:
+                    duplicates = view['duplicates']
+                    duplicates[sql] = max(duplicates.get(sql, 0), times)
+            for sql, _, duration in recorder.queries:
+                item = (duration, view_name, fingerprint(sql))
+                if len(self.slowest) < self.top:
+                    heapq.heappush(self.slowest, item)
+                elif item > self.slowest[0]:
+                    heapq.heapreplace(self.slowest, item)
+
+    def snapshot(self):
+        """Итоги в виде, пригодном для JSON."""
+        with self.lock:
+            views = {}
+            for name, view in self.views.items():
+                views[name] = {
+                    'requests': view['requests'],
+                    'avg_queries': round(view['queries'] / view['requests'], 2),
+                    'max_queries': view['max_queries'],
+                    'avg_db_time_ms': round(
+                        view['db_time_ms'] / view['requests'], 3,
+                    ),
+                    'duplicates': [
+                        {'sql': sql, 'max_per_request': times}
+                        for sql, times in sorted(
+                            view['duplicates'].items(),
+                            key=lambda item: item[1], reverse=True,
+                        )
+                    ],
+                }
+            slowest = [
+                {'time_ms': round(duration * 1000, 3), 'view': view,
+                 'sql': sql}
+                for duration, view, sql in sorted(self.slowest, reverse=True)
+            ]
+        return {'views': views, 'slowest': slowest}
+
+
+stats = QueryStats(top=settings.QUERY_STATS_TOP)
+
+
+class QueryStatsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self._is_coroutine = None
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def sampled(self):
+        rate = settings.QUERY_STATS_SAMPLE_RATE
+        return rate and random.random() < rate
+
+    def __call__(self, request):
+        if self._is_coroutine:
+            return self.__acall__(request)
+        if not self.sampled():
+            return self.get_response(request)
+        with record_queries() as recorder:
+            response = self.get_response(request)
+        stats.add(self.view_name(request), recorder)
+        return response
+
+    async def __acall__(self, request):
+        if not self.sampled():
+            return await self.get_response(request)
+        async with record_context_queries() as recorder:
+            response = await self.get_response(request)
+        stats.add(self.view_name(request), recorder)
+        return response
+
+    def view_name(self, request):
+        # ответы из кеша страниц отдаются без разрешения адреса
+        match = request.resolver_match
+        if match is None:
+            try:
+                match = resolve(request.path_info)
+            except Resolver404:
+                # не раздуваем итоги адресами, которые не нашлись
+                return '<unresolved>'
+        return match.view_name
@@ -0,0 +1,41 @@
+"""Готовые к выводу формы текста поста.
+
+excerpt и text_html считаются при сохранении (сигнал pre_save), а
+после массовых правок в обход сигналов - пакетно, командой
+render_posts. Ленты выбирают только excerpt и не читают text.
+"""
+
+from __future__ import annotations
+
+from core.text import excerpt, render_html
+
+EXCERPT_LENGTH = 30
+RENDERED_FIELDS = ('excerpt', 'text_html')
+
+
+def render(post):
+    post.excerpt = excerpt(post.text, EXCERPT_LENGTH)
+    post.text_html = render_html(post.text)
+
+
+def render_all(queryset, batch_size=500):
+    """Пакетно пересчитывает excerpt и text_html по возрастанию pk.
+
+    Как и core.text.refold, читает порциями по pk. Возвращает число
+    строк.
+    """
+    model = queryset.model
+    last_pk = None
+    total = 0
+    while True:
+        batch = queryset.order_by('pk')
+        if last_pk is not None:
+            batch = batch.filter(pk__gt=last_pk)
+        batch = list(batch.only('pk', 'text')[:batch_size])
+        if not batch:
+            return total
+        for post in batch:
+            render(post)
+        model.objects.bulk_update(batch, RENDERED_FIELDS)
+        last_pk = batch[-1].pk
+        total += len(batch)
@@ -0,0 +1,192 @@
+"""Полнотекстовый поиск по постам на SQLite FTS5.
+
+posts_post_fts - индекс с внешним содержимым (content=posts_post)
+по колонке text_folded: тексту без разметки в нормализованной форме
+(core.text.fold_plain). Его синхронизируют триггеры на вставку,
+удаление и изменение text_folded. Запрос нормализуется так же,
+поэтому «елка» находит «Ёлка», а теги в текст индекса не попадают.
+Группы и авторы ищутся по нормализованным колонкам *_folded
+диапазоном по индексу.
+"""
+
+from __future__ import annotations
+
+import re
+
+from django.db import connection
+
+from core.text import fold, fold_plain, prefix_range, refold
+from users.models import Profile
+
+from .models import Group, Post
+
+SUGGESTIONS_LIMIT = 5
+
+FTS_TABLE = 'posts_post_fts'
+
+FTS_SQL = (
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        text_folded,
+        content='posts_post',
+        content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_insert
+    AFTER INSERT ON posts_post BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, text_folded)
+        VALUES (new.id, new.text_folded);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_delete
+    AFTER DELETE ON posts_post BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text_folded)
+        VALUES ('delete', old.id, old.text_folded);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_update
+    AFTER UPDATE OF text_folded ON posts_post BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text_folded)
+        VALUES ('delete', old.id, old.text_folded);
+        INSERT INTO {FTS_TABLE}(rowid, text_folded)
+        VALUES (new.id, new.text_folded);
+    END
+    """,
+)
+
+# "фраза в кавычках" или слово, возможно с * на конце
+TOKEN_RE = re.compile(r'"([^"]+)"|(\S+)')
+# от слова остаются только буквы и цифры: прочие символы в FTS5 - синтаксис
+WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def fts_available(using=connection):
+    return using.vendor == 'sqlite'
+
+
+def install(using=connection):
+    """Создаёт индекс и триггеры, если их нет.
+
+    Пересборка таблицы posts_post миграциями SQLite удаляет триггеры,
+    поэтому install() вызывается и после каждого migrate.
+    """
+    if not fts_available(using):
+        return
+    with using.cursor() as cursor:
+        for statement in FTS_SQL:
+            cursor.execute(statement)
+
+
+def rebuild(using=connection):
+    """Полностью перестраивает индекс по содержимому posts_post."""
+    install(using)
+    if not fts_available(using):
+        return
+    with using.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+        )
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')",
+        )
+
+
+def _quote(words):
+    return '"' + ' '.join(words) + '"'
+
+
+def build_query(text):
+    """Переводит запрос пользователя в синтаксис FTS5.
+
+    "несколько слов" в кавычках ищутся как фраза, слово* - как префикс,
+    остальные слова должны встретиться все. Служебные символы FTS5
+    выбрасываются, поэтому запрос не может сломать MATCH. Запрос
+    нормализуется как текст индекса.
+    """
+    terms = []
+    for phrase, word in TOKEN_RE.findall(fold(text)):
+        if phrase:
+            words = WORD_RE.findall(phrase)
+            if words:
+                terms.append(_quote(words))
+            continue
+        words = WORD_RE.findall(word)
+        if not words:
+            continue
+        term = _quote(words)
+        if word.endswith('*'):
+            term += '*'
+        terms.append(term)
+    return ' '.join(terms)
+
+
+def search_posts(text):
+    """Посты, подходящие под запрос, от самых релевантных (bm25)."""
+    posts = Post.objects.select_related('author', 'group')
+    if not fts_available():
+        return posts.filter(text_folded__contains=fold(text))
+    query = build_query(text)
+    if not query:
+        return posts.none()
+    return posts.extra(
+        tables=[FTS_TABLE],
+        where=[f'{FTS_TABLE}.rowid = posts_post.id', f'{FTS_TABLE} MATCH %s'],
+        params=[query],
+        select={'rank': f'{FTS_TABLE}.rank'},
+        order_by=['rank', '-pub_date'],
+    )
+
+
+def search_groups(text):
+    """Группы, название которых начинается с запроса."""
+    prefix = fold(text)
+    if not prefix:
+        return Group.objects.none()
+    return Group.objects.filter(
+        **prefix_range('title_folded', prefix),
+    ).order_by('title_folded')[:SUGGESTIONS_LIMIT]
+
+
+def search_authors(text):
+    """Авторы, имя которых начинается с запроса."""
+    prefix = fold(text)
+    if not prefix:
+        return Profile.objects.none()
+    return Profile.objects.filter(
+        **prefix_range('username_folded', prefix),
+    ).select_related('user').order_by('username_folded')[:SUGGESTIONS_LIMIT]
+
+
+def refold_all():
+    """Пересчитывает нормализованные колонки после массовых правок."""
+    return {
+        'post.text_folded': refold(
+            Post.objects.all(), 'text', 'text_folded', normalize=fold_plain,
+        ),
+        'group.title_folded': refold(
+            Group.objects.all(), 'title', 'title_folded',
+        ),
+        'profile.username_folded': _refold_usernames(),
+    }
+
+
+def _refold_usernames():
+    total = 0
+    last_pk = 0
+    while True:
+        batch = list(
+            Profile.objects.select_related('user').filter(
+                pk__gt=last_pk,
+            ).order_by('pk')[:500]
+        )
+        if not batch:
+            return total
+        for profile in batch:
+            profile.username_folded = fold(profile.user.username)
+        Profile.objects.bulk_update(batch, ['username_folded'])
+        last_pk = batch[-1].pk
+        total += len(batch)
@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+from django.db.models.signals import (post_delete, post_save, pre_delete,
+                                      pre_save)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from core.cache import invalidate
+from core.text import fold, fold_plain
+
+from . import counters, feeds, media, rendering, thumbnails
+from .caching import post_tags, touch
+from .models import Comment, Follow, Group, Post, User
+
+
+@receiver(pre_save, sender=Group)
+def fold_group_title(sender, instance, **kwargs):
+    instance.title_folded = fold(instance.title)
+
+
+@receiver(pre_save, sender=Post)
+def fold_post_text(sender, instance, **kwargs):
+    instance.text_folded = fold_plain(instance.text)
+    rendering.render(instance)
+
+
+@receiver(pre_save, sender=Post)
+def stamp_updated(sender, instance, raw=False, **kwargs):
+    """Как auto_now, но фикстуры сохраняют своё или умолчание."""
+    if not raw:
+        instance.updated = timezone.now()
+
+
+@receiver(pre_save, sender=Post)
+def remember_old_values(sender, instance, raw=False, **kwargs):
+    """Для счётчиков групп и миниатюр запоминаем группу и картинку
+    до редактирования."""
+    instance._old_group_id = None
+    instance._old_image = None
+    if not raw and not instance._state.adding:
+        instance._old_group_id, instance._old_image = Post.objects.filter(
+            pk=instance.pk,
+        ).values_list('group_id', 'image').first() or (None, None)
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, raw=False, **kwargs):
+    """Новый пост увеличивает счётчики и сразу попадает в ленты
+    подписчиков автора."""
+    if raw:
+        return
+    if created:
+        counters.change_total_posts(1)
+        counters.change_profile(instance.author_id, 'posts_count', 1)
+        counters.change_group(instance.group_id, 1)
+        feeds.fan_out_post(instance)
+    elif instance._old_group_id != instance.group_id:
+        counters.change_group(instance._old_group_id, -1)
+        counters.change_group(instance.group_id, 1)
+    if (instance.image.name or '') != (instance._old_image or ''):
+        if instance.image:
+            media.acquire(instance.image.name)
+            thumbnails.schedule(instance.image.name)
+        media.release(instance._old_image)
+    invalidate(*post_tags(instance, instance._old_group_id))
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    counters.change_total_posts(-1)
+    counters.change_profile(instance.author_id, 'posts_count', -1)
+    counters.change_group(instance.group_id, -1)
+    media.release(instance.image.name)
+    invalidate(*post_tags(instance))
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        counters.change_comments(instance.post_id, 1)
+    if not raw:
+        invalidate(f'post:{instance.post_id}')
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    counters.change_comments(instance.post_id, -1)
+    invalidate(f'post:{instance.post_id}')
+
+
+def _group_tags(group):
+    """Название группы выводится в лентах и профилях её авторов."""
+    authors = Post.objects.filter(group=group).values_list(
+        'author_id', flat=True,
+    ).distinct()
+    return ['posts', f'group:{group.pk}'] + [
+        f'author:{author_id}' for author_id in authors
+    ]
+
+
+@receiver(post_save, sender=Group)
+def group_saved(sender, instance, created, raw=False, **kwargs):
+    if not raw and not created:
+        touch(Post.objects.filter(group=instance))
+        invalidate(*_group_tags(instance))
+
+
+@receiver(pre_delete, sender=Group)
+def group_deleted(sender, instance, **kwargs):
+    # после удаления посты уже отвязаны от группы, авторов не найти
+    touch(Post.objects.filter(group=instance))
+    invalidate(*_group_tags(instance))
+
+
+# поля пользователя, которые выводит карточка поста
+AUTHOR_FIELDS = ('username', 'first_name', 'last_name')
+
+
+def _author_names(user):
+    return tuple(getattr(user, field) for field in AUTHOR_FIELDS)
+
+
+@receiver(pre_save, sender=User)
+def remember_author_names(sender, instance, raw=False, update_fields=None,
+                          **kwargs):
+    """Имя автора до сохранения: смена пароля или прав его не меняет,
+    и карточки постов тогда не трогаются."""
+    instance._old_author_names = None
+    fields = AUTHOR_FIELDS if update_fields is None else update_fields
+    if raw or instance._state.adding or set(AUTHOR_FIELDS).isdisjoint(fields):
+        return
+    instance._old_author_names = User.objects.filter(
+        pk=instance.pk,
+    ).values_list(*AUTHOR_FIELDS).first()
+
+
+@receiver(post_save, sender=User)
+def author_saved(sender, instance, created, raw=False, **kwargs):
+    """Новое имя автора должно появиться в карточках его постов.
+
+    Вход пользователя сохраняет только last_login и ничего не сбрасывает.
+    """
+    if raw or created:
+        return
+    old_names = getattr(instance, '_old_author_names', None)
+    if old_names is None or old_names == _author_names(instance):
+        return
+    posts = Post.objects.filter(author=instance)
+    if not touch(posts):
+        return
+    group_ids = posts.exclude(group=None).values_list(
+        'group_id', flat=True,
+    ).distinct()
+    invalidate('posts', f'author:{instance.pk}', *(
+        f'group:{group_id}' for group_id in group_ids
+    ))
+
+
+@receiver(post_save, sender=Follow)
+def follow_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        counters.change_profile(instance.author_id, 'followers_count', 1)
+        counters.change_profile(instance.user_id, 'following_count', 1)
+        feeds.follow_added(instance.user_id, instance.author_id)
+        invalidate(f'follow:{instance.user_id}')
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    counters.change_profile(instance.author_id, 'followers_count', -1)
+    counters.change_profile(instance.user_id, 'following_count', -1)
+    feeds.follow_removed(instance.user_id, instance.author_id)
+    invalidate(f'follow:{instance.user_id}')
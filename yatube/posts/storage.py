@@ -0,0 +1,65 @@
+"""Хранилище картинок постов, адресуемое содержимым.
+
+Имя файла - SHA-256 содержимого, разложенный по вложенным каталогам
+из первых символов хеша: posts/ab/cd/abcd...ef.jpg. Каталоги остаются
+небольшими при любом числе файлов, а одинаковые загрузки получают
+одно имя и хранятся один раз. Сколько постов ссылается на файл,
+считает posts.media.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import posixpath
+import re
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+HASH_NAME = re.compile(r'(^|/)([0-9a-f]{2})/([0-9a-f]{2})/\2\3[0-9a-f]{60}(\.\w+)?$')
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    # уровни вложенности и длина имени каталога
+    shard_depth = 2
+    shard_width = 2
+
+    def content_name(self, name, content):
+        """Имя файла по хешу содержимого в каталоге из upload_to."""
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        digest = digest.hexdigest()
+        shards = [
+            digest[level * self.shard_width:(level + 1) * self.shard_width]
+            for level in range(self.shard_depth)
+        ]
+        extension = os.path.splitext(name)[1].lower()
+        return posixpath.join(
+            posixpath.dirname(name), *shards, digest + extension,
+        )
+
+    def is_content_name(self, name):
+        return bool(HASH_NAME.search(name))
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        return self._save(self.content_name(name, content), content)
+
+    def _save(self, name, content):
+        if self.exists(name):
+            return name
+        saved = super()._save(name, content)
+        if saved != name:
+            # такой же файл успел сохранить параллельный запрос
+            self.delete(saved)
+        return name
+
+
+image_storage = ContentAddressedStorage()
@@ -0,0 +1,202 @@
+"""Синтетические данные в масштабе продакшена.
+
+Популярность авторов и постов распределена по Ципфу: немногие
+авторы пишут и собирают подписчиков больше остальных. Длина постов
+подчиняется закону Парето - много коротких и хвост очень длинных.
+Всё создаётся bulk_create, поэтому сигналы не срабатывают: текст
+для вывода готовится заранее, а после генерации счётчики, ссылки
+на картинки, нормализованные колонки, поисковый индекс и ленты
+пересчитываются явно, а миниатюры создаются сразу.
+"""
+
+from __future__ import annotations
+
+import io
+import itertools
+import random
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.utils import timezone
+from PIL import Image
+
+from . import counters, feeds, media, rendering, search, thumbnails
+from .models import Comment, Follow, Group, Post
+from .storage import image_storage
+
+User = get_user_model()
+
+BATCH_SIZE = 500
+USERNAME_PREFIX = 'synth-'
+IMAGE_DIR = 'posts/synthetic/'
+# средняя длина поста в словах и потолок длинного хвоста
+POST_WORDS = 30
+MAX_POST_WORDS = 3000
+PARETO_ALPHA = 1.5
+ZIPF_EXPONENT = 1.1
+# за какой период разбросаны даты публикации
+HISTORY = timedelta(days=365)
+
+WORDS = (
+    'котики', 'собаки', 'море', 'горы', 'город', 'осень', 'весна', 'лето',
+    'зима', 'кофе', 'книга', 'фильм', 'сериал', 'музыка', 'поезд',
+    'дорога', 'работа', 'отпуск', 'друзья', 'погода', 'дождь', 'солнце',
+    'снег', 'утро', 'вечер', 'ночь', 'прогулка', 'парк', 'река', 'лес',
+    'python', 'django', 'код', 'релиз', 'тесты', 'база', 'запрос',
+)
+
+SIZE_DEFAULTS = {
+    'users': 1000,
+    'groups': 20,
+    'posts': 10000,
+    'comments': 20000,
+    'follows': 5000,
+    'images': 20,
+}
+
+
+def add_size_arguments(parser, **defaults):
+    """Общие для команд параметры объёма данных."""
+    for name, default in {**SIZE_DEFAULTS, **defaults}.items():
+        parser.add_argument(f'--{name}', type=int, default=default)
+    parser.add_argument('--image-ratio', type=float, default=0.1)
+    parser.add_argument('--seed', type=int, default=42)
+
+
+def zipf_choices(rng, population, count):
+    """count элементов population, первые выпадают чаще (Ципф)."""
+    if not population:
+        return []
+    cum_weights = list(itertools.accumulate(
+        1 / (rank + 1) ** ZIPF_EXPONENT for rank in range(len(population))
+    ))
+    return rng.choices(population, cum_weights=cum_weights, k=count)
+
+
+def post_text(rng):
+    length = min(MAX_POST_WORDS, int(POST_WORDS / 3 * rng.paretovariate(
+        PARETO_ALPHA,
+    )))
+    return ' '.join(rng.choices(WORDS, k=max(1, length))).capitalize()
+
+
+def make_images(rng, count):
+    """Несколько разных JPEG, которые делят между собой посты."""
+    names = []
+    for number in range(count):
+        buffer = io.BytesIO()
+        color = tuple(rng.randrange(256) for _ in range(3))
+        Image.new('RGB', (960, 540), color).save(buffer, 'JPEG')
+        names.append(image_storage.save(
+            f'{IMAGE_DIR}{number}.jpg', ContentFile(buffer.getvalue()),
+        ))
+    return names
+
+
+def past_dates(rng, count, now):
+    """Даты публикации за HISTORY по возрастанию."""
+    return sorted(now - HISTORY * rng.random() for _ in range(count))
+
+
+def generate(users, groups, posts, comments, follows, images,
+             image_ratio=0.1, seed=42):
+    """Создаёт данные и возвращает число созданных объектов по типам."""
+    rng = random.Random(seed)
+    now = timezone.now()
+    offset = User.objects.filter(username__startswith=USERNAME_PREFIX).count()
+    password = make_password(None)
+    with transaction.atomic():
+        created_users = User.objects.bulk_create(
+            (
+                User(username=f'{USERNAME_PREFIX}{offset + number}',
+                     password=password)
+                for number in range(users)
+            ),
+            batch_size=BATCH_SIZE,
+        )
+        created_groups = Group.objects.bulk_create(
+            (
+                Group(
+                    title=f'Группа {offset + number}',
+                    slug=f'{USERNAME_PREFIX}{offset + number}',
+                    description=post_text(rng),
+                )
+                for number in range(groups)
+            ),
+            batch_size=BATCH_SIZE,
+        )
+        image_names = make_images(rng, images)
+        authors = rng.sample(created_users, len(created_users))
+        new_posts = [
+            Post(
+                text=post_text(rng),
+                author=author,
+                group=rng.choice(created_groups + [None]),
+                image=(
+                    rng.choice(image_names)
+                    if image_names and rng.random() < image_ratio else ''
+                ),
+            )
+            for author in zipf_choices(rng, authors, posts)
+        ]
+        for post in new_posts:
+            rendering.render(post)
+        created_posts = Post.objects.bulk_create(
+            new_posts, batch_size=BATCH_SIZE,
+        )
+        # auto_now_add ставит всем постам текущее время,
+        # разброс дат сохраняется отдельным проходом
+        for post, pub_date in zip(
+            created_posts, past_dates(rng, len(created_posts), now),
+        ):
+            post.pub_date = pub_date
+        Post.objects.bulk_update(
+            created_posts, ['pub_date'], batch_size=BATCH_SIZE,
+        )
+        # обсуждают в основном свежие посты
+        recent_first = created_posts[::-1]
+        created_comments = Comment.objects.bulk_create(
+            (
+                Comment(
+                    post=post, author=rng.choice(created_users),
+                    text=post_text(rng),
+                )
+                for post in zipf_choices(rng, recent_first, comments)
+            ),
+            batch_size=BATCH_SIZE,
+        )
+        for comment in created_comments:
+            comment.created = comment.post.pub_date + (
+                now - comment.post.pub_date
+            ) * rng.random()
+        Comment.objects.bulk_update(
+            created_comments, ['created'], batch_size=BATCH_SIZE,
+        )
+        pairs = set()
+        for author in zipf_choices(rng, authors, follows):
+            user = rng.choice(created_users)
+            if user != author:
+                pairs.add((user.pk, author.pk))
+        Follow.objects.bulk_create(
+            (Follow(user_id=user, author_id=author) for user, author in pairs),
+            batch_size=BATCH_SIZE, ignore_conflicts=True,
+        )
+        counters.reconcile()
+        media.reconcile()
+        search.refold_all()
+        search.rebuild()
+        for user_id, author_id in pairs:
+            feeds.backfill_timeline(user_id, author_id)
+        for name in image_names:
+            thumbnails.pregenerate(name)
+    return {
+        'users': len(created_users),
+        'groups': len(created_groups),
+        'posts': len(created_posts),
+        'comments': len(created_comments),
+        'follows': len(pairs),
+        'images': len(image_names),
+    }
@@ -0,0 +1,24 @@
+from __future__ import annotations
+
+from django import template
+
+from posts import thumbnails
+
+register = template.Library()
+
+
+@register.inclusion_tag('includes/post_image.html')
+def post_image(post, name, lazy=True):
+    """<picture> с заранее созданными миниатюрами, см. posts.thumbnails"""
+    return {'image': thumbnails.responsive(post, name), 'lazy': lazy}
+
+
+@register.simple_tag
+def prefetch_thumbnails(posts, name):
+    """Одна пачка обращений к key-value store на всю страницу постов.
+
+    Ставится перед циклом по page_obj; post_image внутри цикла
+    берёт найденное без обращений к кешу.
+    """
+    thumbnails.prefetch(posts, name)
+    return ''
@@ -0,0 +1,94 @@
+"""Бюджеты SQL-запросов для маршрутов и поиск N+1.
+
+Бюджет - максимум запросов на холодном кеше для авторизованного
+клиента. Кроме превышения бюджета ошибкой считается повторение
+одного и того же по форме SELECT внутри ответа: так выглядит N+1.
+Хелперы используют и posts/tests (QueryBudgetMixin), и tests/
+(фикстура assert_query_budget)
+"""
+
+from __future__ import annotations
+
+from django.core.cache import cache
+from django.urls import reverse
+
+from posts.querystats import fingerprint, record_queries
+
+QUERY_BUDGETS = {
+    'posts:index': 4,
+    'posts:group_list': 6,
+    'posts:profile': 7,
+    'posts:post_detail': 5,
+    'posts:follow_index': 5,
+    'posts:post_search': 6,
+    'posts:post_create': 5,
+    'posts:post_edit': 6,
+    'posts:add_comment': 7,
+    'posts:post_comments': 3,
+    'posts:profile_follow': 15,
+    'posts:profile_unfollow': 11,
+    'posts:query_stats': 2,
+}
+
+# имена, которых нет в QUERY_BUDGETS, например страницы админки
+EXTRA_BUDGETS = {
+    'admin:posts_post_changelist': 6,
+    'admin:posts_comment_changelist': 4,
+    'admin:posts_follow_changelist': 4,
+}
+
+
+class QueryBudgetError(AssertionError):
+    pass
+
+
+def repeated_selects(queries):
+    """Формы SELECT, выполненные больше одного раза."""
+    counts = {}
+    for sql, _, _ in queries:
+        if sql.lstrip().upper().startswith('SELECT'):
+            shape = fingerprint(sql)
+            counts[shape] = counts.get(shape, 0) + 1
+    return {shape: times for shape, times in counts.items() if times > 1}
+
+
+def budget_report(label, budget, queries):
+    """Текст ошибки или None, если запросы укладываются в бюджет."""
+    repeated = repeated_selects(queries)
+    if len(queries) <= budget and not repeated:
+        return None
+    lines = [f'{label}: {len(queries)} запросов при бюджете {budget}']
+    for shape, times in repeated.items():
+        lines.append(f'  N+1? x{times}: {shape}')
+    lines.append('  Все запросы:')
+    for number, (sql, params, _) in enumerate(queries, 1):
+        lines.append(f'  {number:>3}. {sql} {params!r}')
+    return '\n'.join(lines)
+
+
+def check_query_budget(client, name, kwargs=None, method='get', data=None,
+                       budget=None):
+    """Запрашивает маршрут name и проверяет его запросы.
+
+    Кеш очищается перед запросом: бюджет считается для худшего случая.
+    """
+    if budget is None:
+        budget = {**QUERY_BUDGETS, **EXTRA_BUDGETS}[name]
+    url = reverse(name, kwargs=kwargs)
+    cache.clear()
+    with record_queries() as recorder:
+        response = getattr(client, method)(url, data or {})
+    report = budget_report(f'{method.upper()} {url}', budget, recorder.queries)
+    if report:
+        raise QueryBudgetError(report)
+    return response
+
+
+class QueryBudgetMixin:
+    """assertQueryBudget для TestCase."""
+
+    def assertQueryBudget(self, client, name, **options):
+        try:
+            return check_query_budget(client, name, **options)
+        except QueryBudgetError as error:
+            self.fail(str(error))
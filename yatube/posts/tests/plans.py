@@ -0,0 +1,65 @@
+"""Снимки планов запросов по маршрутам.
+
+capture_plans запрашивает маршрут на холодном кеше и записывает
+SQL каждого его запроса вместе с планом SQLite. Снимки хранятся в
+query_plans.json рядом с тестами; регрессией считается появление в
+плане полного прохода по таблице или временной сортировки, которых
+в снимке не было. Любые другие изменения плана допустимы.
+Перезаписать снимки: QUERY_PLANS_UPDATE=1 python manage.py test.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+
+from django.core.cache import cache
+from django.urls import reverse
+
+from posts.queryplans import explain_queries, problems
+from posts.querystats import record_queries
+
+SNAPSHOT_PATH = os.path.join(os.path.dirname(__file__), 'query_plans.json')
+UPDATE = os.environ.get('QUERY_PLANS_UPDATE') == '1'
+
+
+def capture_plans(client, name, kwargs=None, method='get', data=None):
+    """Запросы маршрута name: [{'sql': ..., 'plan': [...]}, ...]."""
+    url = reverse(name, kwargs=kwargs)
+    cache.clear()
+    with record_queries() as recorder:
+        getattr(client, method)(url, data or {})
+    return [
+        {'sql': sql, 'plan': plan}
+        for sql, plan in explain_queries(recorder.queries)
+    ]
+
+
+def load_snapshots(path=SNAPSHOT_PATH):
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)
+
+
+def save_snapshots(snapshots, path=SNAPSHOT_PATH):
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(snapshots, file, ensure_ascii=False, indent=2, sort_keys=True)
+        file.write('\n')
+
+
+def plan_regressions(name, captured, snapshot):
+    """Строки с новыми полными проходами и сортировками маршрута name.
+
+    Запрос, которого нет в снимке, сравнивается с пустым планом: у
+    нового запроса проблемных строк быть не должно.
+    """
+    known = {query['sql']: query['plan'] for query in snapshot or ()}
+    regressions = []
+    for query in captured:
+        sql = query['sql']
+        before = set(problems(known.get(sql, []), sql))
+        for detail in problems(query['plan'], sql):
+            if detail not in before:
+                regressions.append(f'{name}: {detail}\n    {sql}')
+    return regressions
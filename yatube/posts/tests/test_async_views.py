@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import asyncio
+from http import HTTPStatus
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import AsyncClient, Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts import async_views
+from posts.models import Comment, Follow, Group, Post
+from posts.querystats import stats
+from users.models import Profile
+
+User = get_user_model()
+
+
+@override_settings(ROOT_URLCONF='yatube.asgi_urls')
+class AsyncViewsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='async-author')
+        cls.reader = User.objects.create_user(username='async-reader')
+        cls.group = Group.objects.create(slug='async', title='Асинхронная')
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text='Асинхронный пост',
+        )
+        Comment.objects.create(
+            post=cls.post, author=cls.reader, text='Асинхронный отзыв',
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.async_client = AsyncClient()
+
+    def pages(self):
+        return {
+            'posts:index': None,
+            'posts:group_list': {'slug': self.group.slug},
+            'posts:profile': {'username': self.author.username},
+            'posts:post_detail': {'post_id': self.post.pk},
+            'posts:post_search': None,
+        }
+
+    async def test_pages_served_by_async_views(self):
+        for name, kwargs in self.pages().items():
+            with self.subTest(name=name):
+                response = await self.async_client.get(
+                    reverse(name, kwargs=kwargs),
+                )
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+                self.assertTrue(
+                    asyncio.iscoroutinefunction(response.resolver_match.func),
+                )
+                self.assertContains(response, 'Асинхронн')
+
+    async def test_same_html_as_sync_views(self):
+        """Страницы совпадают с ответами синхронных представлений."""
+        for name, kwargs in self.pages().items():
+            with self.subTest(name=name):
+                url = reverse(name, kwargs=kwargs)
+                cache.clear()
+                with self.settings(ROOT_URLCONF='yatube.urls'):
+                    expected = await sync_to_async(Client().get)(url)
+                cache.clear()
+                actual = await self.async_client.get(url)
+                self.assertEqual(actual.content, expected.content)
+                # версии тегов после cache.clear() новые, поэтому ETag
+                # сравнивать нельзя, но он должен быть
+                self.assertTrue(actual.has_header('ETag'))
+
+    async def test_follow_index(self):
+        url = reverse('posts:follow_index')
+        response = await self.async_client.get(url)
+        self.assertRedirects(
+            response, f'{reverse("users:login")}?next={url}',
+            fetch_redirect_response=False,
+        )
+        await sync_to_async(self.async_client.force_login)(self.reader)
+        response = await self.async_client.get(url)
+        self.assertContains(response, 'Асинхронный пост')
+
+    async def test_missing_objects(self):
+        urls = (
+            reverse('posts:group_list', kwargs={'slug': 'missing'}),
+            reverse('posts:profile', kwargs={'username': 'missing'}),
+            reverse('posts:post_detail', kwargs={'post_id': 0}),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = await self.async_client.get(url)
+                self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    async def test_pages_without_profile(self):
+        await Profile.objects.filter(user=self.author).adelete()
+        for name in ('posts:profile', 'posts:post_detail'):
+            with self.subTest(name=name):
+                response = await self.async_client.get(
+                    reverse(name, kwargs=self.pages()[name]),
+                )
+                self.assertEqual(response.context['n_posts'], 1)
+
+    async def test_not_modified_and_page_cache(self):
+        url = reverse('posts:index')
+        first = await self.async_client.get(url)
+        self.assertEqual(first['X-Page-Cache'], 'miss')
+        second = await self.async_client.get(url)
+        self.assertEqual(second['X-Page-Cache'], 'hit')
+        response = await self.async_client.get(
+            url, **{'If-None-Match': first['ETag']},
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+    @override_settings(QUERY_STATS_SAMPLE_RATE=1)
+    async def test_query_stats_recorded(self):
+        """Запросы из потоков sync_to_async попадают в статистику."""
+        stats.reset()
+        await self.async_client.get(
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+        )
+        view = stats.snapshot()['views']['posts:group_list']
+        self.assertGreater(view['max_queries'], 0)
+
+    @override_settings(QUERY_STATS_SAMPLE_RATE=0)
+    async def test_no_recorder_without_sampling(self):
+        """Без выборки обёртка запросов на соединения не ставится."""
+        with mock.patch(
+            'posts.querystats.install_context_recorder',
+        ) as install:
+            response = await self.async_client.get(reverse('posts:index'))
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        install.assert_not_called()
+
+    def test_every_async_view_routed(self):
+        from posts.async_urls import ASYNC_VIEWS
+        self.assertEqual(
+            set(ASYNC_VIEWS.values()),
+            {
+                async_views.index, async_views.group_posts,
+                async_views.profile, async_views.post_detail,
+                async_views.follow_index, async_views.post_search,
+            },
+        )
@@ -1,10 +1,16 @@
 from __future__ import annotations
 
+from http import HTTPStatus
+from unittest import mock
+
 from django.contrib.auth import get_user_model
 from django.core.cache import cache
+from django.middleware.csrf import get_token
 from django.test import Client, TestCase
 from django.urls import reverse
 
+from core.cache import tag_page
+from posts import views
 from posts.models import Group, Post
 
 from .factories import post_create
@@ -29,12 +35,13 @@ class CacheTests(TestCase):
     def test_cach_in_index_page(self):
         response = self.authorized_client.get(reverse('posts:index'))
         with_cache = response.content
-        Post.objects.all().delete()
+        # update() обходит сигналы - страница остаётся из кеша
+        Post.objects.update(text='Изменённый текст', excerpt='Изменённый')
         response = self.authorized_client.get(reverse('posts:index'))
-        after_clearing_the_base = response.content
+        after_silent_update = response.content
         self.assertEqual(
             with_cache,
-            after_clearing_the_base,
+            after_silent_update,
         )
         cache.clear()
         response = self.authorized_client.get(reverse('posts:index'))
@@ -43,3 +50,259 @@ class CacheTests(TestCase):
             with_cache,
             after_clearing_the_cache,
         )
+
+    def test_delete_invalidates_feeds(self):
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.user.username}),
+        )
+        for url in urls:
+            self.assertContains(self.authorized_client.get(url), 'article')
+        Post.objects.get(pk=self.post.pk).delete()
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.authorized_client.get(url)
+                self.assertNotContains(response, self.post.text)
+
+    def test_edit_invalidates_old_and_new_group(self):
+        other = Group.objects.create(slug='other-slug', title='Другая')
+        old_url = reverse('posts:group_list', kwargs={'slug': self.group.slug})
+        new_url = reverse('posts:group_list', kwargs={'slug': other.slug})
+        self.authorized_client.get(old_url)
+        self.authorized_client.get(new_url)
+        post = Post.objects.get(pk=self.post.pk)
+        post.group = other
+        post.save()
+        self.assertNotContains(
+            self.authorized_client.get(old_url), self.post.text,
+        )
+        self.assertContains(
+            self.authorized_client.get(new_url), self.post.text,
+        )
+
+    def test_follow_invalidates_follow_feed(self):
+        url = reverse('posts:follow_index')
+        reader = Client()
+        follower = User.objects.create_user(username='Reader')
+        reader.force_login(follower)
+        self.assertNotContains(reader.get(url), self.post.text)
+        reader.get(reverse(
+            'posts:profile_follow', kwargs={'username': self.user.username},
+        ))
+        self.assertContains(reader.get(url), self.post.text)
+
+
+class PageCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='PageAuthor')
+        cls.group = Group.objects.create(
+            slug='page-group', title='Группа страниц',
+        )
+        cls.post = post_create(cls.user, cls.group)
+        cls.urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': cls.group.slug}),
+            reverse('posts:profile', kwargs={'username': cls.user.username}),
+            reverse('posts:post_detail', kwargs={'post_id': cls.post.pk}),
+            reverse('about:author'),
+            reverse('about:tech'),
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.author_client = Client()
+        self.author_client.force_login(self.user)
+
+    def test_anonymous_pages_served_from_cache(self):
+        for url in self.urls:
+            with self.subTest(url=url):
+                self.assertEqual(
+                    self.client.get(url)['X-Page-Cache'], 'miss',
+                )
+                self.assertEqual(self.client.get(url)['X-Page-Cache'], 'hit')
+
+    def test_authorized_pages_not_cached(self):
+        for url in self.urls:
+            with self.subTest(url=url):
+                self.author_client.get(url)
+                response = self.author_client.get(url)
+                self.assertFalse(response.has_header('X-Page-Cache'))
+
+    def test_page_with_cookies_not_cached(self):
+        """Страница, получившая cookie от CsrfViewMiddleware, не кешируется."""
+        def tag_with_token(request, *tags):
+            get_token(request)
+            tag_page(request, *tags)
+
+        url = reverse('posts:index')
+        with mock.patch.object(views, 'tag_page', side_effect=tag_with_token):
+            response = self.client.get(url)
+        self.assertIn('csrftoken', response.cookies)
+        self.assertFalse(response.has_header('X-Page-Cache'))
+        self.assertEqual(Client().get(url)['X-Page-Cache'], 'miss')
+
+    def test_silent_update_keeps_cached_page(self):
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        self.client.get(url)
+        Post.objects.filter(pk=self.post.pk).update(excerpt='Тихая правка')
+        self.assertNotContains(self.client.get(url), 'Тихая правка')
+
+    def test_add_comment_purges_post_page(self):
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        self.client.get(url)
+        self.author_client.post(
+            reverse('posts:add_comment', kwargs={'post_id': self.post.pk}),
+            {'text': 'Новый комментарий'},
+        )
+        response = self.client.get(url)
+        self.assertEqual(response['X-Page-Cache'], 'miss')
+        self.assertContains(response, 'Новый комментарий')
+
+    def test_post_edit_purges_feeds(self):
+        for url in self.urls:
+            self.client.get(url)
+        self.author_client.post(
+            reverse('posts:post_edit', kwargs={'post_id': self.post.pk}),
+            {'text': 'Отредактировано', 'group': self.group.pk},
+        )
+        for url in self.urls[:4]:
+            with self.subTest(url=url):
+                self.assertContains(self.client.get(url), 'Отредактировано')
+
+    def test_group_change_purges_post_page(self):
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        self.client.get(url)
+        group = Group.objects.get(pk=self.group.pk)
+        group.title = 'Переименованная'
+        group.save()
+        self.assertContains(self.client.get(url), 'Переименованная')
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='EtagAuthor')
+        cls.reader = User.objects.create_user(username='EtagReader')
+        cls.group = Group.objects.create(slug='etag-group', title='Группа')
+        cls.post = post_create(cls.user, cls.group)
+
+    def setUp(self):
+        cache.clear()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+        self.urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.user.username}),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+            reverse('posts:follow_index'),
+        )
+
+    def revalidate(self, url):
+        etag = self.reader_client.get(url)['ETag']
+        return self.reader_client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    def test_unchanged_pages_return_304(self):
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.revalidate(url)
+                self.assertEqual(
+                    response.status_code, HTTPStatus.NOT_MODIFIED,
+                )
+
+    def test_new_comment_changes_etag(self):
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        etag = self.reader_client.get(url)['ETag']
+        self.reader_client.post(
+            reverse('posts:add_comment', kwargs={'post_id': self.post.pk}),
+            {'text': 'Комментарий'},
+        )
+        response = self.reader_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_follow_changes_profile_and_feed_etags(self):
+        urls = self.urls[2], self.urls[4]
+        etags = [self.reader_client.get(url)['ETag'] for url in urls]
+        self.reader_client.get(reverse(
+            'posts:profile_follow', kwargs={'username': self.user.username},
+        ))
+        for url, etag in zip(urls, etags):
+            with self.subTest(url=url):
+                response = self.reader_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag,
+                )
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_etag_depends_on_user(self):
+        url = reverse('posts:index')
+        etag = self.client.get(url)['ETag']
+        response = self.reader_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_page_cache_hit_revalidates(self):
+        url = reverse('posts:index')
+        etag = self.client.get(url)['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+
+class PostFragmentCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='Writer')
+        cls.group = Group.objects.create(slug='doll-slug', title='Матрёшки')
+        cls.post = Post.objects.create(
+            author=cls.user, group=cls.group, text='Первый пост',
+        )
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        cache.clear()
+
+    def index(self):
+        return self.client.get(reverse('posts:index'))
+
+    def test_feed_reassembled_from_cached_cards(self):
+        """Новый пост сбрасывает ленту, но не карточки других постов."""
+        self.index()
+        Post.objects.filter(pk=self.post.pk).update(excerpt='Тихая правка')
+        Post.objects.create(author=self.user, text='Второй пост')
+        response = self.index()
+        self.assertContains(response, 'Второй пост')
+        self.assertContains(response, 'Первый пост')
+        self.assertNotContains(response, 'Тихая правка')
+
+    def test_saved_post_card_rerendered(self):
+        self.index()
+        post = Post.objects.get(pk=self.post.pk)
+        post.text = 'Правка'
+        post.save()
+        self.assertContains(self.index(), 'Правка')
+
+    def test_author_rename_touches_cards(self):
+        self.index()
+        self.user.first_name, self.user.last_name = 'Лев', 'Толстой'
+        self.user.save()
+        self.assertContains(self.index(), 'Автор: Лев Толстой')
+
+    def test_login_does_not_touch_cards(self):
+        updated = Post.objects.get(pk=self.post.pk).updated
+        self.user.save(update_fields=['last_login'])
+        self.assertEqual(Post.objects.get(pk=self.post.pk).updated, updated)
+
+    def test_save_without_rename_does_not_touch_cards(self):
+        """Смена пароля и прочие правки без имени карточки не трогают."""
+        updated = Post.objects.get(pk=self.post.pk).updated
+        self.user.set_password('new-password')
+        self.user.save()
+        self.user.is_staff = True
+        self.user.save()
+        self.assertEqual(Post.objects.get(pk=self.post.pk).updated, updated)
+
+    def test_group_rename_touches_cards(self):
+        self.index()
+        self.group.title = 'Неваляшки'
+        self.group.save()
+        self.assertContains(self.index(), 'все записи группы Неваляшки')
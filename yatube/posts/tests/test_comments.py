@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+from datetime import timedelta
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from posts import views
+from posts.models import Comment, Post
+
+User = get_user_model()
+COMMENTS = views.COMMENTS_LIMIT + 5
+
+
+class CommentPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='talker')
+        cls.post = Post.objects.create(author=cls.author, text='Обсуждаем')
+        comments = Comment.objects.bulk_create(
+            Comment(post=cls.post, author=cls.author, text=f'Реплика {number}')
+            for number in range(COMMENTS)
+        )
+        # часть комментариев с одинаковым временем проверяет ничьи по id
+        now = timezone.now()
+        for number, comment in enumerate(comments):
+            comment.created = now - timedelta(minutes=number // 2)
+        Comment.objects.bulk_update(comments, ['created'])
+
+    def setUp(self):
+        cache.clear()
+
+    def detail(self, **params):
+        return self.client.get(
+            reverse('posts:post_detail', args=[self.post.pk]), params,
+        )
+
+    def test_first_chunk_on_post_page(self):
+        """На странице поста только первая порция, новые сверху."""
+        comments = self.detail().context['comments']
+        self.assertEqual(len(comments), views.COMMENTS_LIMIT)
+        self.assertTrue(comments.has_next())
+        expected = Comment.objects.order_by('-created', '-id')[:1].get()
+        self.assertEqual(comments[0], expected)
+
+    def test_partial_returns_rest_once(self):
+        """Фрагмент отдаёт оставшиеся комментарии без повторов."""
+        first = self.detail().context['comments']
+        response = self.client.get(
+            reverse('posts:post_comments', args=[self.post.pk]),
+            {'after': first.next_cursor},
+        )
+        self.assertTemplateUsed(response, 'includes/comment_list.html')
+        self.assertNotContains(response, '<html')
+        rest = response.context['comments']
+        self.assertFalse(rest.has_next())
+        self.assertNotContains(response, 'comments-more')
+        seen = [comment.pk for comment in first] + [
+            comment.pk for comment in rest
+        ]
+        self.assertEqual(len(seen), COMMENTS)
+        self.assertCountEqual(
+            seen, Comment.objects.values_list('pk', flat=True),
+        )
+
+    def test_more_link_without_js(self):
+        """Ссылка «Показать ещё» работает и без JS."""
+        response = self.detail()
+        cursor = response.context['comments'].next_cursor
+        self.assertContains(response, f'?comments_after={cursor}')
+        self.assertContains(response, f'?after={cursor}')
+        second = self.detail(comments_after=cursor).context['comments']
+        self.assertEqual(len(second), COMMENTS - views.COMMENTS_LIMIT)
+
+    def test_partial_for_missing_post(self):
+        """Фрагмент несуществующего поста - 404, и он не кешируется."""
+        url = reverse('posts:post_comments', args=[0])
+        for _ in range(2):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+        post = Post.objects.create(author=self.author, text='Без отзывов')
+        response = self.client.get(
+            reverse('posts:post_comments', args=[post.pk]),
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
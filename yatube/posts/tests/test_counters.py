@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post
+from users.models import Profile
+
+from .factories import post_create
+
+User = get_user_model()
+
+
+class CounterTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user('counter_author')
+        cls.reader = User.objects.create_user('counter_reader')
+        cls.group = Group.objects.create(slug='counter-group')
+        cls.group_2 = Group.objects.create(slug='counter-group-2')
+
+    def setUp(self):
+        self.author_client = Client()
+        self.author_client.force_login(CounterTests.author)
+        self.reader_client = Client()
+        self.reader_client.force_login(CounterTests.reader)
+
+        cache.clear()
+
+    def profile(self, user):
+        return Profile.objects.get(user=user)
+
+    def test_post_counters_follow_create_edit_delete(self):
+        """Счётчики постов автора и групп меняются вместе с постами."""
+        post = post_create(self.author, self.group)
+        self.assertEqual(self.profile(self.author).posts_count, 1)
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.posts_count, 1)
+
+        self.author_client.post(
+            reverse('posts:post_edit', args=[post.pk]),
+            data={'text': 'Другая группа', 'group': self.group_2.pk},
+        )
+        self.group.refresh_from_db()
+        self.group_2.refresh_from_db()
+        self.assertEqual(self.group.posts_count, 0)
+        self.assertEqual(self.group_2.posts_count, 1)
+
+        Post.objects.filter(pk=post.pk).delete()
+        self.assertEqual(self.profile(self.author).posts_count, 0)
+        self.group_2.refresh_from_db()
+        self.assertEqual(self.group_2.posts_count, 0)
+
+    def test_comment_and_follow_counters(self):
+        """Счётчики комментариев и подписок меняются через views."""
+        post = post_create(self.author, self.group)
+        self.reader_client.post(
+            reverse('posts:add_comment', args=[post.pk]),
+            data={'text': 'Комментарий'},
+        )
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+
+        self.reader_client.get(
+            reverse('posts:profile_follow', args=[self.author.username]),
+        )
+        self.assertEqual(self.profile(self.author).followers_count, 1)
+        self.assertEqual(self.profile(self.reader).following_count, 1)
+        self.reader_client.get(
+            reverse('posts:profile_unfollow', args=[self.author.username]),
+        )
+        self.assertEqual(self.profile(self.author).followers_count, 0)
+        self.assertEqual(self.profile(self.reader).following_count, 0)
+
+    def test_profile_page_uses_counter(self):
+        """Страница профиля показывает счётчик без COUNT по постам."""
+        post_create(self.author, self.group)
+        response = self.reader_client.get(
+            reverse('posts:profile', args=[self.author.username]),
+        )
+        self.assertEqual(response.context['n_posts'], 1)
+
+    def test_raw_saved_user_gets_profile(self):
+        """Пользователь из фикстуры (raw-сохранение) получает профиль."""
+        user = User(username='Фикстурный')
+        user.save_base(raw=True)
+        self.assertEqual(self.profile(user).username_folded, 'фикстурный')
+
+    def test_pages_without_profile(self):
+        """Недостающий профиль создаётся по месту с верными счётчиками."""
+        post = post_create(self.author, self.group)
+        Profile.objects.filter(user=self.author).delete()
+        pages = (
+            reverse('posts:profile', args=[self.author.username]),
+            reverse('posts:post_detail', args=[post.pk]),
+        )
+        for url in pages:
+            with self.subTest(url=url):
+                response = self.reader_client.get(url)
+                self.assertEqual(response.context['n_posts'], 1)
+        self.assertEqual(self.profile(self.author).posts_count, 1)
+
+    def test_reconcile_command_repairs_drift(self):
+        """Команда сверки чинит разошедшиеся счётчики."""
+        post = post_create(self.author, self.group)
+        Comment.objects.bulk_create([
+            Comment(post=post, author=self.reader, text='Мимо сигналов'),
+        ])
+        Follow.objects.bulk_create([
+            Follow(user=self.reader, author=self.author),
+        ])
+        Profile.objects.filter(user=self.author).update(posts_count=42)
+        Profile.objects.filter(user=self.reader).delete()
+
+        call_command('reconcile_counters', stdout=StringIO())
+
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+        self.assertEqual(self.profile(self.author).posts_count, 1)
+        self.assertEqual(self.profile(self.author).followers_count, 1)
+        self.assertEqual(self.profile(self.reader).following_count, 1)
+        self.assertEqual(
+            self.profile(self.reader).username_folded, 'counter_reader',
+        )
@@ -12,6 +12,7 @@ from django.urls import reverse
 
 from posts.forms import PostForm
 from posts.models import Comment, Group, Post
+from posts.storage import image_storage
 
 from .factories import post_create
 
@@ -19,7 +20,7 @@ User = get_user_model()
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
 
 
-@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, THUMBNAIL_WORKERS=0)
 class PostCreateFormTests(TestCase):
     @classmethod
     def setUpClass(cls):
@@ -76,7 +77,9 @@ class PostCreateFormTests(TestCase):
                 author=PostCreateFormTests.post.author,
                 group=PostCreateFormTests.group.id,
                 text='Новый пост с новым текстом',
-                image='posts/Picture_for_post.gif',
+                image=image_storage.content_name(
+                    'posts/Picture_for_post.gif', self.uploaded,
+                ),
             ).exists(),
         )
 
@@ -1,6 +1,9 @@
 from __future__ import annotations
 
+import json
+
 from django.contrib.auth import get_user_model
+from django.core import serializers
 from django.core.cache import cache
 from django.test import TestCase
 
@@ -85,3 +88,24 @@ class PostModelTest(TestCase):
 
     def test_models_have_correct__str__(self):
         self.assertEqual(PostModelTest.group.title, str(PostModelTest.group))
+
+    def test_updated_on_save(self):
+        """Сохранение поста сдвигает updated, как auto_now."""
+        post = PostModelTest.post
+        before = post.updated
+        post.save()
+        self.assertGreater(post.updated, before)
+
+    def test_fixture_without_updated(self):
+        """Пост из старой выгрузки без updated загружается."""
+        fixture = json.dumps([{
+            'model': 'posts.post',
+            'pk': 1000,
+            'fields': {
+                'text': 'Из выгрузки', 'author': PostModelTest.user.pk,
+                'pub_date': '2022-07-01T00:00:00Z',
+            },
+        }])
+        for obj in serializers.deserialize('json', fixture):
+            obj.save()
+        self.assertIsNotNone(Post.objects.get(pk=1000).updated)
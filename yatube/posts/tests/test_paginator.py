@@ -2,9 +2,13 @@ from __future__ import annotations
 
 from django.contrib.auth import get_user_model
 from django.core.cache import cache
-from django.test import Client, TestCase
+from django.test import Client, SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
 
 from posts.models import Group, Post
+from posts import counters
+from posts.pagination import CursorPage, EstimatedPaginator
+from posts.querystats import record_queries
 
 from .factories import url_rev
 
@@ -53,3 +57,121 @@ class PaginatorViewsTest(TestCase):
                     ),
                     number_of_posts,
                 )
+
+
+@override_settings(POSTS_PAGINATION_MODE='cursor')
+class CursorPaginatorViewsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user('cursor_author')
+        Post.objects.bulk_create(
+            Post(text=f'Пост {i}', author=cls.author) for i in range(14)
+        )
+        # одинаковое время публикации проверяет разбор ничьих по id
+        Post.objects.update(pub_date=timezone.now())
+
+    def setUp(self):
+        self.client = Client()
+        cache.clear()
+
+    def test_cursor_pages_cover_all_posts_once(self):
+        """Курсорные страницы «старее» отдают все посты без повторов."""
+        url = url_rev('posts:profile', username=self.author.username)
+        first_page = self.client.get(url).context['page_obj']
+        self.assertIsInstance(first_page, CursorPage)
+        self.assertEqual(len(first_page), 10)
+        self.assertTrue(first_page.has_next())
+        self.assertFalse(first_page.has_previous())
+
+        second_page = self.client.get(
+            url, {'after': first_page.next_cursor},
+        ).context['page_obj']
+        self.assertEqual(len(second_page), 4)
+        self.assertFalse(second_page.has_next())
+        seen = [post.pk for post in first_page] + [
+            post.pk for post in second_page
+        ]
+        self.assertCountEqual(seen, Post.objects.values_list('pk', flat=True))
+
+        back_page = self.client.get(
+            url, {'before': second_page.previous_cursor},
+        ).context['page_obj']
+        self.assertEqual(
+            [post.pk for post in back_page],
+            [post.pk for post in first_page],
+        )
+
+    def test_broken_cursor_returns_first_page(self):
+        """Битый курсор не ломает страницу."""
+        response = self.client.get(url_rev('posts:index'), {'after': '%%%'})
+        self.assertEqual(len(response.context['page_obj']), 10)
+
+
+class EstimatedPaginatorTests(SimpleTestCase):
+    def test_elided_page_links(self):
+        """Выводится окно ссылок вокруг текущей страницы, а не все."""
+        page = EstimatedPaginator(list(range(300)), 10, count=300).page(15)
+        ellipsis = page.paginator.ELLIPSIS
+        self.assertEqual(
+            list(page.page_links),
+            [1, ellipsis, 13, 14, 15, 16, 17, ellipsis, 30],
+        )
+
+    def test_underestimated_count_corrected(self):
+        paginator = EstimatedPaginator(list(range(25)), 10, count=3)
+        page = paginator.get_page(2)
+        self.assertEqual(list(page), list(range(10, 20)))
+        self.assertTrue(page.has_next())
+        self.assertEqual(paginator.count, 21)
+
+    def test_overestimated_count_falls_back_to_exact(self):
+        paginator = EstimatedPaginator(list(range(25)), 10, count=1000)
+        page = paginator.get_page(50)
+        self.assertEqual(page.number, 3)
+        self.assertEqual(list(page), list(range(20, 25)))
+        self.assertFalse(page.has_next())
+
+    def test_last_page_count_exact(self):
+        paginator = EstimatedPaginator(list(range(25)), 10, count=40)
+        self.assertFalse(paginator.get_page(3).has_next())
+        self.assertEqual(paginator.count, 25)
+
+
+class CountedPaginationViewsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('counted_author')
+        cls.group = Group.objects.create(title='Счёт', slug='counted')
+        for number in range(3):
+            Post.objects.create(
+                text=f'Пост {number}', author=cls.author, group=cls.group,
+            )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_feeds_use_counters_not_count(self):
+        """Группа, профиль и главная не выполняют COUNT(*) на запрос."""
+        counters.total_posts()
+        urls = (
+            url_rev('posts:index'),
+            url_rev('posts:group_list', slug=self.group.slug),
+            url_rev('posts:profile', username=self.author.username),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                with record_queries() as recorder:
+                    self.client.get(url)
+                self.assertFalse([
+                    sql for sql, _, _ in recorder.queries if 'COUNT(' in sql
+                ])
+
+    def test_total_posts_incremented_after_commit(self):
+        total = counters.total_posts()
+        with self.captureOnCommitCallbacks(execute=True):
+            post = Post.objects.create(text='Ещё', author=self.author)
+        self.assertEqual(counters.total_posts(), total + 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            post.delete()
+        self.assertEqual(counters.total_posts(), total)
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+
+from posts.models import Comment, Follow, Group, Post
+
+from .budget import EXTRA_BUDGETS, QUERY_BUDGETS, QueryBudgetMixin
+
+User = get_user_model()
+
+
+class QueryBudgetTests(QueryBudgetMixin, TestCase):
+    """Запросы маршрутов не растут с числом постов и комментариев."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create_superuser(
+            'reader', 'reader@example.com', 'password',
+        )
+        cls.authors = [
+            User.objects.create_user(f'author{number}') for number in range(3)
+        ]
+        cls.groups = [
+            Group.objects.create(slug=f'group-{number}', title=f'Гр {number}')
+            for number in range(3)
+        ]
+        cls.posts = [
+            Post.objects.create(
+                text=f'Пост номер {number}', author=author, group=group,
+            )
+            for number, (author, group) in enumerate(
+                zip(cls.authors, cls.groups),
+            )
+        ]
+        cls.post = cls.posts[0]
+        for author in cls.authors:
+            Comment.objects.create(
+                post=cls.post, author=author, text='Комментарий',
+            )
+            Follow.objects.create(user=cls.reader, author=author)
+        cls.stranger = User.objects.create_user('stranger')
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.reader)
+        self.author_client = Client()
+        self.author_client.force_login(self.post.author)
+
+    def test_every_route_has_budget(self):
+        from posts.urls import app_name, urlpatterns
+        names = {f'{app_name}:{pattern.name}' for pattern in urlpatterns}
+        self.assertEqual(names, set(QUERY_BUDGETS))
+
+    def test_read_routes(self):
+        post_id = {'post_id': self.post.pk}
+        routes = (
+            ('posts:index', None),
+            ('posts:group_list', {'slug': self.groups[0].slug}),
+            ('posts:profile', {'username': self.post.author.username}),
+            ('posts:post_detail', post_id),
+            ('posts:post_comments', post_id),
+            ('posts:follow_index', None),
+            ('posts:post_create', None),
+            ('posts:query_stats', None),
+        )
+        for name, kwargs in routes:
+            with self.subTest(name=name):
+                self.assertQueryBudget(self.client, name, kwargs=kwargs)
+        self.assertQueryBudget(
+            self.author_client, 'posts:post_edit', kwargs=post_id,
+        )
+
+    def test_search(self):
+        self.assertQueryBudget(
+            self.client, 'posts:post_search', data={'s': 'пост'},
+        )
+
+    def test_write_routes(self):
+        self.assertQueryBudget(
+            self.client, 'posts:add_comment', method='post',
+            kwargs={'post_id': self.post.pk}, data={'text': 'Ещё один'},
+        )
+        username = {'username': self.stranger.username}
+        self.assertQueryBudget(
+            self.client, 'posts:profile_follow', kwargs=username,
+        )
+        self.assertQueryBudget(
+            self.client, 'posts:profile_unfollow', kwargs=username,
+        )
+
+    def test_admin_changelists(self):
+        for name in EXTRA_BUDGETS:
+            with self.subTest(name=name):
+                self.assertQueryBudget(self.client, name)
@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.tokens import default_token_generator
+from django.test import Client, TestCase
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from about import urls as about_urls
+from posts import urls as posts_urls
+from posts.models import Comment, Follow, Group, Post
+from posts.queryplans import explain, problems
+from users import urls as users_urls
+
+from .plans import (UPDATE, capture_plans, load_snapshots, plan_regressions,
+                    save_snapshots)
+
+User = get_user_model()
+
+
+def plan_of(queryset):
+    sql, params = queryset.query.sql_with_params()
+    return explain(sql, params)
+
+
+class QueryPlanTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='planner')
+        cls.group = Group.objects.create(slug='plans', title='Планы')
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text='Текст',
+        )
+
+    def test_problems(self):
+        plan = [
+            'SCAN posts_post',
+            'SCAN posts_post USING INDEX post_pub_date_idx',
+            'SCAN posts_post_fts VIRTUAL TABLE INDEX 0:M1',
+            'SCAN CONSTANT ROW',
+            'USE TEMP B-TREE FOR ORDER BY',
+        ]
+        self.assertEqual(
+            problems(plan), ['SCAN posts_post', 'USE TEMP B-TREE FOR ORDER BY'],
+        )
+        self.assertEqual(
+            problems(['SCAN posts_group'], 'SELECT * FROM posts_group'), [],
+        )
+
+    def test_feeds_use_composite_indexes(self):
+        """Ленты и комментарии читаются по индексу без сортировки."""
+        cases = {
+            'post_pub_date_idx': Post.objects.order_by('-pub_date', '-id'),
+            'post_author_pub_date_idx': self.author.posts.order_by(
+                '-pub_date', '-id',
+            ),
+            'post_group_pub_date_idx': self.group.posts.order_by(
+                '-pub_date', '-id',
+            ),
+            'comment_post_created_idx': Comment.objects.filter(
+                post=self.post,
+            ).order_by('-created', '-id'),
+            'follow_author_user_idx': Follow.objects.filter(
+                author=self.author,
+            ).values_list('user_id'),
+        }
+        for index, queryset in cases.items():
+            with self.subTest(index=index):
+                plan = plan_of(queryset[:10])
+                self.assertIn(index, ' '.join(plan))
+                self.assertEqual(problems(plan), [])
+
+
+class QueryPlanSnapshotTests(TestCase):
+    """Планы запросов маршрутов не хуже сохранённых снимков."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create_superuser(
+            'plan-reader', 'reader@example.com', 'password',
+        )
+        cls.authors = [
+            User.objects.create_user(f'plan-author{number}')
+            for number in range(3)
+        ]
+        cls.group = Group.objects.create(slug='plan-group', title='Планы')
+        cls.posts = [
+            Post.objects.create(
+                text=f'Пост про планы {number}', author=author,
+                group=cls.group,
+            )
+            for number, author in enumerate(cls.authors)
+        ]
+        cls.post = cls.posts[0]
+        for author in cls.authors:
+            Comment.objects.create(
+                post=cls.post, author=author, text='Комментарий',
+            )
+            Follow.objects.create(user=cls.reader, author=author)
+        cls.stranger = User.objects.create_user('plan-stranger')
+
+    def scenarios(self):
+        """Маршрут -> (клиент, метод, kwargs, данные)."""
+        post_id = {'post_id': self.post.pk}
+        stranger = {'username': self.stranger.username}
+        reset = {
+            'uidb64': urlsafe_base64_encode(force_bytes(self.reader.pk)),
+            'token': default_token_generator.make_token(self.reader),
+        }
+        return {
+            'posts:index': ('guest', 'get', None, None),
+            'posts:group_list': ('guest', 'get', {'slug': 'plan-group'}, None),
+            'posts:profile': (
+                'guest', 'get', {'username': self.post.author.username}, None,
+            ),
+            'posts:post_detail': ('guest', 'get', post_id, None),
+            'posts:post_comments': ('guest', 'get', post_id, None),
+            'posts:follow_index': ('reader', 'get', None, None),
+            'posts:post_search': ('guest', 'get', None, {'s': 'планы'}),
+            'posts:post_create': ('reader', 'get', None, None),
+            'posts:post_edit': ('author', 'get', post_id, None),
+            'posts:add_comment': ('reader', 'post', post_id, {'text': 'Ещё'}),
+            'posts:profile_follow': ('reader', 'get', stranger, None),
+            'posts:profile_unfollow': ('reader', 'get', stranger, None),
+            'posts:query_stats': ('reader', 'get', None, None),
+            'users:signup': ('guest', 'get', None, None),
+            'users:login': ('guest', 'get', None, None),
+            'users:logout': ('author', 'get', None, None),
+            'users:password_reset_form': ('guest', 'get', None, None),
+            'users:reset': ('guest', 'get', reset, None),
+            'users:password_reset_done': ('guest', 'get', None, None),
+            'users:reset_done': ('guest', 'get', None, None),
+            'users:password_change': ('reader', 'get', None, None),
+            'users:password_change_done': ('reader', 'get', None, None),
+            'about:author': ('guest', 'get', None, None),
+            'about:tech': ('guest', 'get', None, None),
+        }
+
+    def clients(self):
+        clients = {'guest': Client(), 'reader': Client(), 'author': Client()}
+        clients['reader'].force_login(self.reader)
+        clients['author'].force_login(self.post.author)
+        return clients
+
+    def test_every_route_has_scenario(self):
+        names = {
+            f'{urls.app_name}:{pattern.name}'
+            for urls in (posts_urls, users_urls, about_urls)
+            for pattern in urls.urlpatterns
+        }
+        self.assertEqual(names, set(self.scenarios()))
+
+    def test_plans_match_snapshots(self):
+        snapshots = load_snapshots()
+        captured = {}
+        regressions = []
+        for name, (client, method, kwargs, data) in self.scenarios().items():
+            # logout завершает сессию, поэтому клиенты свои у каждого маршрута
+            captured[name] = capture_plans(
+                self.clients()[client], name, kwargs, method, data,
+            )
+            if name not in snapshots and not UPDATE:
+                regressions.append(f'{name}: нет снимка плана')
+                continue
+            regressions += plan_regressions(
+                name, captured[name], snapshots.get(name),
+            )
+        if UPDATE:
+            save_snapshots(captured)
+            return
+        if regressions:
+            self.fail(
+                'Планы запросов ухудшились (снимки обновляются с '
+                'QUERY_PLANS_UPDATE=1):\n' + '\n'.join(regressions),
+            )
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+from http import HTTPStatus
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Group, Post
+from posts.querystats import fingerprint, record_queries, stats
+
+from .factories import post_create
+
+User = get_user_model()
+
+
+@override_settings(QUERY_STATS_SAMPLE_RATE=1)
+class QueryStatsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='StatsAuthor')
+        cls.staff = User.objects.create_user(username='Staff', is_staff=True)
+        cls.group = Group.objects.create(slug='stats-group')
+        cls.post = post_create(cls.user, cls.group)
+
+    def setUp(self):
+        cache.clear()
+        stats.reset()
+        self.staff_client = Client()
+        self.staff_client.force_login(self.staff)
+
+    def test_fingerprint_folds_in_lists(self):
+        self.assertEqual(
+            fingerprint('SELECT 1 WHERE id IN (%s, %s, %s)'),
+            fingerprint('SELECT 1\n WHERE id IN (%s)'),
+        )
+
+    def test_recorder_works_without_debug(self):
+        with record_queries() as recorder:
+            list(Group.objects.all())
+        self.assertEqual(recorder.count, 1)
+
+    def test_middleware_aggregates_by_view(self):
+        self.client.get(reverse('posts:index'))
+        self.client.get(reverse('posts:index'))
+        view = stats.snapshot()['views']['posts:index']
+        self.assertEqual(view['requests'], 2)
+        self.assertGreater(view['max_queries'], 0)
+
+    @override_settings(QUERY_STATS_SAMPLE_RATE=0)
+    def test_sampling_disabled(self):
+        self.client.get(reverse('posts:index'))
+        self.assertEqual(stats.snapshot()['views'], {})
+
+    def test_duplicates_reported(self):
+        with record_queries() as recorder:
+            for group in Group.objects.all():
+                Post.objects.filter(group=group).first()
+            Post.objects.filter(group=self.group).first()
+        stats.add('loop', recorder)
+        view = stats.snapshot()['views']['loop']
+        self.assertEqual(view['duplicates'][0]['max_per_request'], 2)
+
+    def test_endpoint_is_staff_only(self):
+        url = reverse('posts:query_stats')
+        author_client = Client()
+        author_client.force_login(self.user)
+        self.assertEqual(
+            author_client.get(url).status_code, HTTPStatus.FOUND,
+        )
+        response = self.staff_client.get(url)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertIn('views', response.json())
+
+    def test_command_prints_report(self):
+        out = StringIO()
+        call_command('query_stats', '/', '--repeat', '2', stdout=out)
+        self.assertIn('posts:index: запросов 2', out.getvalue())
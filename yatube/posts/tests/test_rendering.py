@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from core.text import excerpt
+from posts.models import Group, Post
+from posts.querystats import record_queries
+
+User = get_user_model()
+
+TEXT = '<p>Первая строка &amp; разметка</p>\nвторая строка, которая не влезет'
+
+
+class RenderedTextTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='renderer')
+        cls.group = Group.objects.create(slug='rendered', title='Группа')
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text=TEXT,
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.author)
+
+    def test_excerpt(self):
+        self.assertEqual(excerpt('<b>Коротко</b>', 30), 'Коротко')
+        self.assertEqual(excerpt('слово ' * 10, 10), 'слово сло…')
+
+    def test_rendered_on_save(self):
+        """excerpt - текст без разметки, text_html - экранированный HTML."""
+        self.assertEqual(self.post.excerpt, 'Первая строка & разметка\nвтор…')
+        self.assertEqual(
+            self.post.text_html,
+            '&lt;p&gt;Первая строка &amp;amp; разметка&lt;/p&gt;<br>'
+            'вторая строка, которая не влезет',
+        )
+
+    def test_render_posts_backfills(self):
+        Post.objects.update(excerpt='', text_html='')
+        call_command('render_posts', '--missing', stdout=StringIO())
+        post = Post.objects.get(pk=self.post.pk)
+        self.assertEqual(post.excerpt, self.post.excerpt)
+        self.assertEqual(post.text_html, self.post.text_html)
+
+    def test_feeds_do_not_read_text(self):
+        """Ленты выбирают excerpt и не читают полный текст."""
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.author}),
+            reverse('posts:post_search'),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                cache.clear()
+                with record_queries() as recorder:
+                    response = self.client.get(url)
+                self.assertContains(response, 'Первая строка')
+                for sql, _, _ in recorder.queries:
+                    self.assertNotIn('"posts_post"."text"', sql)
+                    self.assertNotIn('"posts_post"."text_folded"', sql)
@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Group, Post
+from posts.search import build_query
+from users.models import Profile
+
+User = get_user_model()
+
+
+class PostSearchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user('search_author')
+        cls.cats = Post.objects.create(
+            author=cls.author, text='Котики из приюта ищут дом',
+        )
+        cls.dogs = Post.objects.create(
+            author=cls.author, text='Собаки и котики живут дружно',
+        )
+        cls.films = Post.objects.create(
+            author=cls.author, text='Фильмы о котиках и собаках',
+        )
+
+    def setUp(self):
+        self.guest_client = Client()
+        cache.clear()
+
+    def search(self, query):
+        response = self.guest_client.get(
+            reverse('posts:post_search'), {'s': query},
+        )
+        return list(response.context['page_obj'])
+
+    def test_cyrillic_search_ignores_case(self):
+        """Кириллица ищется без учёта регистра."""
+        self.assertCountEqual(self.search('КОТИКИ'), [self.cats, self.dogs])
+
+    def test_phrase_and_prefix_queries(self):
+        """Фраза в кавычках и префиксный поиск."""
+        self.assertEqual(self.search('"котики из приюта"'), [self.cats])
+        self.assertCountEqual(
+            self.search('котик*'), [self.cats, self.dogs, self.films],
+        )
+        self.assertCountEqual(
+            self.search('котик* собак*'), [self.dogs, self.films],
+        )
+
+    def test_results_ranked_by_relevance(self):
+        """Более релевантный пост идёт первым, даже если он старше."""
+        cats = Post.objects.get(pk=self.cats.pk)
+        cats.text = 'Котики, котики и ещё раз котики'
+        cats.save()
+        self.assertEqual(self.search('котики')[0], self.cats)
+
+    def test_index_follows_updates_and_deletes(self):
+        """Индекс синхронизируется при изменении и удалении постов."""
+        films = Post.objects.get(pk=self.films.pk)
+        films.text = 'Сериалы'
+        films.save()
+        self.assertEqual(self.search('сериалы'), [self.films])
+        films.delete()
+        self.assertEqual(self.search('сериалы'), [])
+
+    def test_search_by_folded_text(self):
+        """Индекс строится по тексту без разметки, «ё» равна «е»."""
+        tree = Post.objects.create(
+            author=self.author, text='<b>Ёлка</b> в лесу',
+        )
+        self.assertEqual(self.search('елка'), [tree])
+        self.assertEqual(self.search('ЁЛКА'), [tree])
+        self.assertEqual(self.search('b'), [])
+
+    def test_fts_syntax_in_query_is_harmless(self):
+        """Служебные символы FTS5 в запросе не ломают поиск."""
+        self.assertEqual(build_query('NEAR( "а"  OR:*'), '"near" "а" "or"*')
+        self.assertEqual(self.search('^-:()'), [])
+
+
+class FoldedLookupTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user('ЁжикВТумане')
+        cls.group = Group.objects.create(title='Ёлки и Палки', slug='trees')
+
+    def setUp(self):
+        self.guest_client = Client()
+        cache.clear()
+
+    def test_folded_columns_follow_writes(self):
+        """Нормализованные колонки заполняются при сохранении."""
+        self.assertEqual(self.group.title_folded, 'елки и палки')
+        self.assertEqual(self.author.profile.username_folded, 'ежиквтумане')
+        self.author.username = 'ДругоеИмя'
+        self.author.save()
+        self.assertEqual(
+            Profile.objects.get(user=self.author).username_folded,
+            'другоеимя',
+        )
+
+    def test_search_suggests_groups_and_authors(self):
+        """Группы и авторы находятся по началу названия в любом регистре."""
+        response = self.guest_client.get(
+            reverse('posts:post_search'), {'s': 'ЕЛКИ'},
+        )
+        self.assertEqual(list(response.context['groups']), [self.group])
+        response = self.guest_client.get(
+            reverse('posts:post_search'), {'s': 'ёжик'},
+        )
+        self.assertEqual(
+            [profile.user for profile in response.context['authors']],
+            [self.author],
+        )
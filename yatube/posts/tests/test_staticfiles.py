@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import asyncio
+import gzip
+import os
+import shutil
+import tempfile
+from wsgiref.util import setup_testing_defaults
+
+import brotli
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+
+from core.staticfiles import (ASGIStaticFilesApplication,
+                              StaticFilesApplication, parse_accept_encoding)
+
+TEMP_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SOURCE_DIR = os.path.join(TEMP_ROOT, 'source')
+STATIC_ROOT = os.path.join(TEMP_ROOT, 'collected')
+CSS = b'body { color: #333; }\n' * 200
+
+
+def passthrough(environ, start_response):
+    start_response('404 Not Found', [('Content-Type', 'text/plain')])
+    return [b'django']
+
+
+async def asgi_passthrough(scope, receive, send):
+    await send({'type': 'http.response.start', 'status': 404, 'headers': []})
+    await send({'type': 'http.response.body', 'body': b'django'})
+
+
+@override_settings(STATICFILES_DIRS=[SOURCE_DIR], STATIC_ROOT=STATIC_ROOT)
+class StaticPipelineTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        os.makedirs(os.path.join(SOURCE_DIR, 'css'))
+        with open(os.path.join(SOURCE_DIR, 'css', 'site.css'), 'wb') as file_:
+            file_.write(CSS)
+        call_command('collectstatic', interactive=False, verbosity=0)
+        cls.url = staticfiles_storage.url('css/site.css')
+        cls.app = StaticFilesApplication(passthrough)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_ROOT)
+
+    def request(self, path, **headers):
+        environ = {'PATH_INFO': path, **headers}
+        setup_testing_defaults(environ)
+        response = {}
+
+        def start_response(status, headers):
+            response['status'] = status
+            response['headers'] = dict(headers)
+
+        body = b''.join(self.app(environ, start_response))
+        return response['status'], response['headers'], body
+
+    def test_collectstatic_hashes_and_compresses(self):
+        """Имя получает хеш содержимого, рядом лежат .gz и .br версии."""
+        self.assertRegex(self.url, r'^/static/css/site\.[0-9a-f]{12}\.css$')
+        hashed = os.path.join(STATIC_ROOT, self.url[len('/static/'):])
+        with gzip.open(hashed + '.gz') as file_:
+            self.assertEqual(file_.read(), CSS)
+        with open(hashed + '.br', 'rb') as file_:
+            self.assertEqual(brotli.decompress(file_.read()), CSS)
+
+    def test_compressed_version_negotiated(self):
+        """Сжатая версия отдаётся по Accept-Encoding с вечным кешем."""
+        status, headers, body = self.request(
+            self.url, HTTP_ACCEPT_ENCODING='br;q=0, gzip, deflate',
+        )
+        self.assertEqual(status, '200 OK')
+        self.assertEqual(headers['Content-Encoding'], 'gzip')
+        self.assertEqual(headers['Vary'], 'Accept-Encoding')
+        self.assertIn('immutable', headers['Cache-Control'])
+        self.assertEqual(int(headers['Content-Length']), len(body))
+        self.assertEqual(gzip.decompress(body), CSS)
+
+    def test_identity_without_accept_encoding(self):
+        status, headers, body = self.request(self.url)
+        self.assertNotIn('Content-Encoding', headers)
+        self.assertEqual(body, CSS)
+
+    def test_unhashed_name_cached_briefly(self):
+        _, headers, _ = self.request('/static/css/site.css')
+        self.assertEqual(
+            headers['Cache-Control'], f'public, max-age={settings.STATIC_MAX_AGE}',
+        )
+
+    def test_not_modified(self):
+        _, headers, _ = self.request(self.url)
+        status, _, body = self.request(
+            self.url, HTTP_IF_NONE_MATCH=headers['ETag'],
+        )
+        self.assertEqual(status, '304 Not Modified')
+        self.assertEqual(body, b'')
+
+    def test_other_paths_passed_to_application(self):
+        for path in ('/', '/static/css/missing.css', '/static/../settings.py'):
+            with self.subTest(path=path):
+                self.assertEqual(self.request(path)[2], b'django')
+
+    def test_parse_accept_encoding(self):
+        self.assertEqual(
+            parse_accept_encoding('gzip;q=0.5, br, identity;q=x'),
+            {'gzip': 0.5, 'br': 1.0, 'identity': 0.0},
+        )
+
+    def asgi_request(self, path, headers=()):
+        app = ASGIStaticFilesApplication(asgi_passthrough)
+        scope = {
+            'type': 'http', 'method': 'GET', 'path': path, 'root_path': '',
+            'headers': [
+                (name.encode(), value.encode()) for name, value in headers
+            ],
+        }
+        messages = []
+
+        async def send(message):
+            messages.append(message)
+
+        asyncio.run(app(scope, None, send))
+        start, *body = messages
+        return (
+            start['status'],
+            {name.decode(): value.decode() for name, value in start['headers']},
+            b''.join(message['body'] for message in body),
+        )
+
+    def test_asgi_application(self):
+        status, headers, body = self.asgi_request(
+            self.url, [('accept-encoding', 'gzip')],
+        )
+        self.assertEqual(status, 200)
+        self.assertEqual(headers['content-encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(body), CSS)
+        status, _, body = self.asgi_request(
+            self.url,
+            [('accept-encoding', 'gzip'), ('if-none-match', headers['etag'])],
+        )
+        self.assertEqual((status, body), (304, b''))
+        self.assertEqual(self.asgi_request('/about/')[2], b'django')
@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import io
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from posts import media
+from posts.models import Post, StoredImage
+from posts.storage import image_storage
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def png(color, name='picture.PNG'):
+    buffer = io.BytesIO()
+    Image.new('RGB', (8, 8), color).save(buffer, 'PNG')
+    return SimpleUploadedFile(name, buffer.getvalue(), 'image/png')
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, THUMBNAIL_WORKERS=0)
+class ContentAddressedStorageTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='collector')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT)
+
+    def setUp(self):
+        cache.clear()
+
+    def create(self, image):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Post.objects.create(
+                text='Пост', author=self.author, image=image,
+            )
+
+    def refs(self, name):
+        stored = StoredImage.objects.filter(name=name).first()
+        return stored.refs if stored else 0
+
+    def test_name_is_sharded_content_hash(self):
+        """Имя - хеш содержимого, разложенный по каталогам."""
+        post = self.create(png('red'))
+        directory, first, second, filename = post.image.name.split('/')
+        self.assertEqual(directory, 'posts')
+        self.assertTrue(filename.startswith(first + second))
+        self.assertEqual(len(filename), 64 + len('.png'))
+        self.assertTrue(image_storage.is_content_name(post.image.name))
+
+    def test_identical_uploads_stored_once(self):
+        """Одинаковые загрузки - один файл с двумя ссылками."""
+        first = self.create(png('green', 'one.png'))
+        second = self.create(png('green', 'two.png'))
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertEqual(self.refs(first.image.name), 2)
+        self.assertNotEqual(
+            self.create(png('blue')).image.name, first.image.name,
+        )
+
+    def test_file_deleted_with_last_reference(self):
+        """Файл удаляется, когда на него не ссылается ни один пост."""
+        first = self.create(png('yellow'))
+        second = self.create(png('yellow'))
+        name = first.image.name
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertTrue(image_storage.exists(name))
+        self.assertEqual(self.refs(name), 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+        self.assertFalse(image_storage.exists(name))
+        self.assertFalse(StoredImage.objects.filter(name=name).exists())
+
+    def test_replaced_image_released(self):
+        """Замена картинки освобождает старый файл."""
+        post = self.create(png('white'))
+        old_name = post.image.name
+        post.image = png('black')
+        with self.captureOnCommitCallbacks(execute=True):
+            post.save()
+        self.assertFalse(image_storage.exists(old_name))
+        self.assertEqual(self.refs(post.image.name), 1)
+
+    def test_migrate_media(self):
+        """Старые файлы переезжают, одинаковые сливаются в один."""
+        content = png('purple').read()
+        legacy = [
+            FileSystemStorage().save(name, ContentFile(content))
+            for name in ('posts/old.png', 'posts/copy.png')
+        ]
+        posts = [self.create('') for _ in legacy]
+        for post, name in zip(posts, legacy):
+            Post.objects.filter(pk=post.pk).update(image=name)
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('migrate_media', stdout=StringIO())
+        names = set(Post.objects.filter(
+            pk__in=[post.pk for post in posts],
+        ).values_list('image', flat=True))
+        self.assertEqual(len(names), 1)
+        name = names.pop()
+        self.assertTrue(image_storage.is_content_name(name))
+        self.assertEqual(self.refs(name), 2)
+        for old_name in legacy:
+            self.assertFalse(image_storage.exists(old_name))
+
+    def test_reconcile(self):
+        """Сверка чинит ссылки после bulk_create."""
+        name = image_storage.save('posts/bulk.png', png('orange'))
+        Post.objects.bulk_create(
+            Post(text='Пост', author=self.author, image=name)
+            for _ in range(3)
+        )
+        media.reconcile()
+        self.assertEqual(self.refs(name), 3)
@@ -2,10 +2,11 @@ from __future__ import annotations
 
 from django.contrib.auth import get_user_model
 from django.core.cache import cache
-from django.test import Client, TestCase
+from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 
-from posts.models import Follow, Group, Post
+from posts import feeds
+from posts.models import Follow, Group, Post, TimelineEntry
 
 from .factories import post_create
 
@@ -65,3 +66,87 @@ class SubscriptionTests(TestCase):
             SubscriptionTests.follower_post,
             response.context['page_obj'],
         )
+
+
+class TimelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user('timeline_author')
+        cls.reader = User.objects.create_user('timeline_reader')
+        cls.group = Group.objects.create(slug='timeline-group')
+        cls.old_post = post_create(cls.author, cls.group)
+
+    def setUp(self):
+        self.reader_client = Client()
+        self.reader_client.force_login(TimelineTests.reader)
+        self.author_client = Client()
+        self.author_client.force_login(TimelineTests.author)
+
+        cache.clear()
+
+    def timeline(self):
+        return TimelineEntry.objects.filter(user=self.reader)
+
+    def test_follow_backfills_and_unfollow_prunes_timeline(self):
+        """Подписка дозаполняет ленту, отписка её вычищает."""
+        self.reader_client.get(
+            reverse('posts:profile_follow', args=[self.author.username]),
+        )
+        self.assertEqual(
+            list(self.timeline().values_list('post', flat=True)),
+            [self.old_post.pk],
+        )
+        self.reader_client.get(
+            reverse('posts:profile_unfollow', args=[self.author.username]),
+        )
+        self.assertFalse(self.timeline().exists())
+
+    def test_new_post_fans_out_to_followers(self):
+        """Новый пост автора попадает в ленту подписчика."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.author_client.post(
+            reverse('posts:post_create'), data={'text': 'Свежий пост'},
+        )
+        new_post = Post.objects.get(text='Свежий пост')
+        entry = self.timeline().get(post=new_post)
+        self.assertEqual(entry.pub_date, new_post.pub_date)
+        response = self.reader_client.get(reverse('posts:follow_index'))
+        self.assertEqual(response.context['page_obj'][0], new_post)
+
+
+@override_settings(FEED_CELEBRITY_FOLLOWERS=2)
+class HybridFeedTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.celebrity = User.objects.create_user('celebrity')
+        cls.reader = User.objects.create_user('celebrity_reader')
+        cls.fan = User.objects.create_user('celebrity_fan')
+        cls.group = Group.objects.create(slug='hybrid-group')
+
+    def setUp(self):
+        self.reader_client = Client()
+        self.reader_client.force_login(HybridFeedTests.reader)
+
+        cache.clear()
+
+    def test_celebrity_posts_are_pulled_at_read_time(self):
+        """Посты «знаменитости» не раскладываются, но видны в ленте."""
+        Follow.objects.create(user=self.reader, author=self.celebrity)
+        Follow.objects.create(user=self.fan, author=self.celebrity)
+        post = post_create(self.celebrity, self.group)
+        self.assertFalse(TimelineEntry.objects.filter(post=post).exists())
+        response = self.reader_client.get(reverse('posts:follow_index'))
+        self.assertIn(post, response.context['page_obj'])
+
+    def test_author_below_threshold_returns_to_push(self):
+        """После отписки ниже порога ленты подписчиков дозаполняются."""
+        Follow.objects.create(user=self.reader, author=self.celebrity)
+        Follow.objects.create(user=self.fan, author=self.celebrity)
+        post = post_create(self.celebrity, self.group)
+        Follow.objects.filter(user=self.fan).delete()
+        self.assertFalse(feeds.is_celebrity(self.celebrity.pk))
+        self.assertTrue(
+            TimelineEntry.objects.filter(user=self.reader, post=post).exists(),
+        )
@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.test import TestCase, override_settings
+
+from posts import counters
+from posts.benchmark import compare
+from posts.models import Comment, Post, TimelineEntry
+from posts.synthetic import generate
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class SyntheticDataTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.created = generate(
+            users=20, groups=3, posts=200, comments=100, follows=40,
+            images=2, image_ratio=0.5, seed=1,
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT)
+
+    def test_counts(self):
+        self.assertEqual(Post.objects.count(), 200)
+        self.assertEqual(Comment.objects.count(), 100)
+        self.assertTrue(Post.objects.exclude(image='').exists())
+
+    def test_derived_data_is_consistent(self):
+        repaired = counters.reconcile()
+        self.assertFalse(any(repaired.values()))
+        self.assertTrue(TimelineEntry.objects.exists())
+
+    def test_power_law_shapes(self):
+        lengths = sorted(len(text) for text in Post.objects.values_list(
+            'text', flat=True,
+        ))
+        median = lengths[len(lengths) // 2]
+        self.assertGreater(lengths[-1], median * 5)
+        self.assertGreater(
+            Post.objects.dates('pub_date', 'month').count(), 1,
+        )
+
+    def test_compare_with_baseline(self):
+        baseline = {'index': {'p50': 10.0, 'queries': 4}}
+        self.assertEqual(
+            compare({'index': {'p50': 11.0, 'queries': 4}}, baseline, 0.2),
+            [],
+        )
+        regressions = compare(
+            {'index': {'p50': 13.0, 'queries': 5}}, baseline, 0.2,
+        )
+        self.assertEqual(len(regressions), 2)
@@ -0,0 +1,193 @@
+from __future__ import annotations
+
+import io
+import shutil
+import tempfile
+import time
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from posts import thumbnails
+from posts.models import Post
+from posts.querystats import record_queries
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def jpeg(name='picture.jpg'):
+    buffer = io.BytesIO()
+    Image.new('RGB', (1200, 800), (10, 120, 200)).save(buffer, 'JPEG')
+    return SimpleUploadedFile(name, buffer.getvalue(), 'image/jpeg')
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, THUMBNAIL_WORKERS=0)
+class ThumbnailPipelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='photographer')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.author)
+
+    def lookup(self, post, alias='card-960-jpeg'):
+        geometry, options = thumbnails.GEOMETRIES[alias]
+        return thumbnails.backend.lookup(post.image, geometry, **options)
+
+    def create(self, text, image):
+        """Пост с картинкой и готовыми миниатюрами."""
+        post = Post.objects.create(text=text, author=self.author, image=image)
+        thumbnails.pregenerate(post.image.name)
+        return post
+
+    def test_form_upload_queued_after_commit(self):
+        with mock.patch.object(thumbnails, 'submit') as submit:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.post(reverse('posts:post_create'), {
+                    'text': 'С картинкой', 'image': jpeg(),
+                })
+        post = Post.objects.get(text='С картинкой')
+        submit.assert_called_once_with(post.image.name)
+        thumbnails.pregenerate(post.image.name)
+        thumbnail = self.lookup(post)
+        self.assertIsNotNone(thumbnail)
+        self.assertEqual((thumbnail.width, thumbnail.height), (960, 339))
+
+    def test_templates_never_generate(self):
+        post = self.create('Готово', jpeg('ready.jpg'))
+        with mock.patch.object(
+            thumbnails.backend, 'get_thumbnail',
+            side_effect=AssertionError('генерация во время рендеринга'),
+        ):
+            response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, self.lookup(post).url)
+
+    def test_missing_thumbnail_queued_and_original_shown(self):
+        post = Post.objects.create(
+            text='Без миниатюры', author=self.author, image=jpeg('raw.jpg'),
+        )
+        with mock.patch.object(thumbnails, 'submit') as submit:
+            response = self.client.get(
+                reverse('posts:post_detail', kwargs={'post_id': post.pk}),
+            )
+        submit.assert_called_once_with(post.image.name)
+        self.assertContains(response, post.image.url)
+
+    def test_edit_without_new_image_does_not_schedule(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            post = Post.objects.create(
+                text='Текст', author=self.author, image=jpeg('same.jpg'),
+            )
+        with mock.patch.object(thumbnails, 'schedule') as schedule:
+            post.text = 'Новый текст'
+            post.save()
+        schedule.assert_not_called()
+
+    def test_feed_page_resolves_thumbnails_in_one_batch(self):
+        for number in range(4):
+            self.create(f'Пост {number}', jpeg(f'batch{number}.jpg'))
+        cache.clear()
+        with record_queries() as recorder:
+            with mock.patch.object(
+                thumbnails.default.kvstore, '_get_raw',
+                side_effect=AssertionError('поштучный запрос к kvstore'),
+            ):
+                response = self.client.get(reverse('posts:index'))
+        kvstore_queries = [
+            sql for sql, _, _ in recorder.queries
+            if 'thumbnail_kvstore' in sql
+        ]
+        self.assertEqual(len(kvstore_queries), 1)
+        for post in Post.objects.all():
+            self.assertContains(response, self.lookup(post).url)
+
+    def test_feed_emits_responsive_picture(self):
+        post = self.create('Адаптивная', jpeg('responsive.jpg'))
+        post.refresh_from_db()
+        self.assertTrue(
+            post.image_placeholder.startswith('data:image/webp;base64,'),
+        )
+        content = self.client.get(reverse('posts:index')).content.decode()
+        webp = self.lookup(post, 'card-480-webp')
+        self.assertIn('type="image/webp"', content)
+        self.assertIn(f'{webp.url} 480w', content)
+        self.assertIn('1440w', content)
+        self.assertIn('loading="lazy"', content)
+        self.assertIn('width="960" height="339"', content)
+        self.assertIn(post.image_placeholder, content)
+
+    def test_pregenerate_refreshes_cached_pages(self):
+        post = Post.objects.create(
+            text='Сначала оригинал', author=self.author,
+            image=jpeg('late.jpg'),
+        )
+        guest = Client()
+        url = reverse('posts:post_detail', kwargs={'post_id': post.pk})
+        with mock.patch.object(thumbnails, 'submit'):
+            self.assertNotContains(guest.get(url), 'srcset')
+        with self.captureOnCommitCallbacks(execute=True):
+            thumbnails.pregenerate(post.image.name)
+        self.assertContains(guest.get(url), 'srcset')
+
+    def test_backfill_command(self):
+        post = Post.objects.create(
+            text='Старый пост', author=self.author, image=jpeg('old.jpg'),
+        )
+        out = StringIO()
+        call_command('pregenerate_thumbnails', stdout=out)
+        self.assertIn('Обработано картинок: 1', out.getvalue())
+        self.assertTrue(thumbnails.ready(post.image.name))
+
+    def test_drain_waits_for_pool(self):
+        """drain() возвращается, только когда очередь пула пуста."""
+        done = []
+
+        def pregenerate(name):
+            time.sleep(0.05)
+            done.append(name)
+
+        with override_settings(THUMBNAIL_WORKERS=2), mock.patch.object(
+            thumbnails, 'pregenerate', side_effect=pregenerate,
+        ):
+            for name in ('first.jpg', 'second.jpg', 'third.jpg'):
+                thumbnails.submit(name)
+            thumbnails.drain()
+        self.assertCountEqual(done, ['first.jpg', 'second.jpg', 'third.jpg'])
+
+    def test_requests_never_generate_without_pool(self):
+        """Без пула запрос только показывает исходную картинку."""
+        post = Post.objects.create(
+            text='Без пула', author=self.author, image=jpeg('nopool.jpg'),
+        )
+        with mock.patch.object(thumbnails, 'pregenerate') as pregenerate:
+            response = self.client.get(reverse('posts:index'))
+        pregenerate.assert_not_called()
+        self.assertContains(response, post.image.url)
+
+    def test_failed_image_not_resubmitted(self):
+        """Упавшая картинка не ставится снова, пока её не повторит команда."""
+        self.addCleanup(thumbnails._failed.discard, 'broken.jpg')
+        with override_settings(THUMBNAIL_WORKERS=2), mock.patch.object(
+            thumbnails, 'pregenerate', side_effect=FileNotFoundError,
+        ) as pregenerate, self.assertLogs(thumbnails.logger, 'ERROR'):
+            thumbnails.submit('broken.jpg')
+            thumbnails.drain()
+            thumbnails.submit('broken.jpg')
+            thumbnails.drain()
+        pregenerate.assert_called_once_with('broken.jpg')
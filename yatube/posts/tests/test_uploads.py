@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import io
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from posts.models import Post
+from posts.uploads import EXIF_ORIENTATION
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def jpeg(size=(40, 20), orientation=None, name='photo.jpg'):
+    buffer = io.BytesIO()
+    image = Image.new('RGB', size, (200, 30, 30))
+    exif = Image.Exif()
+    if orientation:
+        exif[EXIF_ORIENTATION] = orientation
+    image.save(buffer, 'JPEG', exif=exif.tobytes())
+    return SimpleUploadedFile(name, buffer.getvalue(), 'image/jpeg')
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, THUMBNAIL_WORKERS=0)
+class UploadPipelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='uploader')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.author)
+
+    def create(self, image):
+        return self.client.post(
+            reverse('posts:post_create'),
+            {'text': 'Пост с картинкой', 'image': image},
+        )
+
+    def stored(self):
+        post = Post.objects.get(author=self.author)
+        with post.image.open() as file_, Image.open(file_) as image:
+            image.load()
+            return post, image
+
+    @override_settings(POST_IMAGE_MAX_BYTES=1024)
+    def test_too_many_bytes_rejected(self):
+        """Файл больше лимита отклоняется, не дочитываясь до конца."""
+        response = self.create(SimpleUploadedFile(
+            'big.jpg', b'\xff' * 64 * 1024, 'image/jpeg',
+        ))
+        self.assertFormError(
+            response.context['form'], 'image', 'Файл больше 1,0\xa0КБ',
+        )
+        self.assertFalse(Post.objects.exists())
+
+    @override_settings(POST_IMAGE_MAX_PIXELS=100)
+    def test_too_many_pixels_rejected(self):
+        """Картинка с лишними пикселями отклоняется по заголовку."""
+        response = self.create(jpeg(size=(20, 20)))
+        self.assertEqual(
+            response.context['form'].errors['image'][0].split()[:2],
+            ['Картинка', 'больше'],
+        )
+        self.assertFalse(Post.objects.exists())
+
+    def test_orientation_applied_and_exif_stripped(self):
+        """Поворот из EXIF применяется, метаданные не сохраняются."""
+        # 6 - повернуть на 90° по часовой стрелке
+        self.create(jpeg(size=(40, 20), orientation=6, name='rotated.jpg'))
+        post, image = self.stored()
+        self.assertEqual(image.size, (20, 40))
+        self.assertNotIn('exif', image.info)
+        self.assertTrue(post.image.name.endswith('.jpg'))
+
+    @override_settings(POST_IMAGE_MAX_SIDE=64)
+    def test_large_original_downscaled(self):
+        """Оригинал уменьшается до POST_IMAGE_MAX_SIDE по длинной стороне."""
+        self.create(jpeg(size=(256, 128)))
+        _, image = self.stored()
+        self.assertEqual(image.size, (64, 32))
+        self.assertEqual(image.format, 'JPEG')
+
+    def test_small_clean_image_kept(self):
+        """Маленькую картинку без метаданных незачем пересохранять."""
+        buffer = io.BytesIO()
+        Image.new('RGB', (30, 10)).save(buffer, 'PNG')
+        content = buffer.getvalue()
+        self.create(SimpleUploadedFile('plain.png', content, 'image/png'))
+        post = Post.objects.get(author=self.author)
+        with post.image.open() as file_:
+            self.assertEqual(file_.read(), content)
@@ -20,7 +20,7 @@ User = get_user_model()
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
 
 
-@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, THUMBNAIL_WORKERS=0)
 class PostPagesTests(TestCase):
     @classmethod
     def setUpClass(cls):
@@ -74,7 +74,7 @@ class PostPagesTests(TestCase):
             with self.subTest(url=url):
                 response = self.authorized_client.get(url)
                 post = response.context['page_obj'][0]
-                self.assertEqual(post.image, 'posts/picture_for_post.gif')
+                self.assertEqual(post.image, self.post.image.name)
 
     def test_post_detail_page_show_correct_context(self):
         """Ожидаемый контекст post_detail -
@@ -0,0 +1,323 @@
+"""Миниатюры картинок постов готовятся заранее.
+
+После сохранения поста с новой картинкой все размеры из GEOMETRIES
+создаются в пуле потоков вне запроса. Шаблоны только ищут готовую
+миниатюру в key-value store sorl и никогда не декодируют картинку
+сами: пока миниатюры нет, выводится исходная картинка, а генерация
+ставится в очередь. Миниатюры страницы ищутся пачкой: один get_many
+кеша и не больше одного запроса к БД на всю страницу.
+
+Картинка в вёрстке описывается набором из RESPONSIVE: несколько
+ширин в WebP и JPEG для srcset и крошечная заглушка (LQIP) в поле
+Post.image_placeholder, которая видна, пока грузится картинка.
+"""
+
+from __future__ import annotations
+
+import base64
+import io
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections, transaction
+from PIL import Image
+from sorl.thumbnail import default
+from sorl.thumbnail.base import ThumbnailBackend
+from sorl.thumbnail.conf import defaults as sorl_defaults
+from sorl.thumbnail.conf import settings as sorl_settings
+from sorl.thumbnail.images import ImageFile, deserialize_image_file
+from sorl.thumbnail.kvstores.base import add_prefix
+from sorl.thumbnail.kvstores.cached_db_kvstore import EMPTY_VALUE
+from sorl.thumbnail.kvstores.cached_db_kvstore import KVStore as CachedDBKVStore
+from sorl.thumbnail.models import KVStore as KVStoreModel
+
+from core.cache import invalidate
+
+from .caching import post_tags, touch
+from .models import Post
+from .storage import image_storage
+
+logger = logging.getLogger(__name__)
+
+# адаптивные наборы: размер в вёрстке, ширины для srcset, форматы
+# от предпочтительного к запасному и атрибут sizes
+RESPONSIVE = {
+    'card': {
+        'size': (960, 339),
+        'widths': (480, 960, 1440),
+        'formats': ('WEBP', 'JPEG'),
+        'sizes': '(max-width: 960px) 100vw, 960px',
+    },
+}
+MIME_TYPES = {'WEBP': 'image/webp', 'JPEG': 'image/jpeg'}
+PLACEHOLDER_SIZE = 16
+
+
+def variant(name, width, image_format):
+    return f'{name}-{width}-{image_format.lower()}'
+
+
+def _geometries():
+    geometries = {}
+    for name, spec in RESPONSIVE.items():
+        base_width, base_height = spec['size']
+        for image_format in spec['formats']:
+            for width in spec['widths']:
+                height = round(width * base_height / base_width)
+                geometries[variant(name, width, image_format)] = (
+                    f'{width}x{height}',
+                    {'crop': 'center', 'upscale': True, 'format': image_format},
+                )
+    return geometries
+
+
+# все миниатюры, которые выводят шаблоны: имя -> (геометрия, опции sorl)
+GEOMETRIES = _geometries()
+
+
+class PrecomputedBackend(ThumbnailBackend):
+    """ThumbnailBackend, умеющий найти миниатюру, не создавая её."""
+
+    def thumbnail_file(self, file_, geometry_string, **options):
+        """ImageFile миниатюры с тем же именем, что дал бы get_thumbnail."""
+        source = ImageFile(file_)
+        if sorl_settings.THUMBNAIL_PRESERVE_FORMAT:
+            options.setdefault('format', self._get_format(source))
+        for key, value in self.default_options.items():
+            options.setdefault(key, value)
+        for key, attr in self.extra_options:
+            value = getattr(sorl_settings, attr)
+            if value != getattr(sorl_defaults, attr):
+                options.setdefault(key, value)
+        name = self._get_thumbnail_filename(source, geometry_string, options)
+        return ImageFile(name, default.storage)
+
+    def lookup(self, file_, geometry_string, **options):
+        """Готовая миниатюра или None."""
+        thumbnail = self.thumbnail_file(file_, geometry_string, **options)
+        return lookup_many([thumbnail]).get(thumbnail.key)
+
+
+backend = PrecomputedBackend()
+
+_executor = None
+_pending: set[str] = set()
+# картинки, миниатюры которых создать не удалось: запросы их больше не
+# ставят в очередь, повторяет только команда pregenerate_thumbnails
+_failed: set[str] = set()
+_lock = threading.Lock()
+
+
+def executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.THUMBNAIL_WORKERS,
+                thread_name_prefix='thumbnails',
+            )
+    return _executor
+
+
+def drain():
+    """Дожидается миниатюр из очереди и останавливает пул.
+
+    Следующий submit() создаст пул заново. Вызывается перед удалением
+    временных БД и MEDIA_ROOT, иначе потоки пула пишут в них после.
+    """
+    global _executor
+    with _lock:
+        pool, _executor = _executor, None
+    if pool is not None:
+        pool.shutdown(wait=True)
+
+
+def source(name):
+    """Картинка поста по имени: ключи миниатюр sorl зависят от хранилища."""
+    return ImageFile(name, image_storage)
+
+
+def placeholder(name):
+    """Крошечная WebP-версия картинки в виде data URI."""
+    with image_storage.open(name) as file_, Image.open(file_) as image:
+        image.draft('RGB', (PLACEHOLDER_SIZE * 4, PLACEHOLDER_SIZE * 4))
+        image = image.convert('RGB')
+        image.thumbnail((PLACEHOLDER_SIZE, PLACEHOLDER_SIZE))
+        buffer = io.BytesIO()
+        image.save(buffer, 'WEBP', quality=30)
+    encoded = base64.b64encode(buffer.getvalue()).decode()
+    return f'data:image/webp;base64,{encoded}'
+
+
+def pregenerate(name):
+    """Создаёт все миниатюры и заглушку картинки name.
+
+    Закешированные страницы с её постами показывали исходную картинку,
+    поэтому их теги инвалидируются.
+    """
+    for geometry, options in GEOMETRIES.values():
+        backend.get_thumbnail(source(name), geometry, **options)
+    posts = Post.objects.filter(image=name)
+    posts.update(image_placeholder=placeholder(name))
+    touch(posts)
+    for post in posts.only('author', 'group'):
+        invalidate(*post_tags(post))
+    with _lock:
+        _failed.discard(name)
+
+
+def _work(name):
+    try:
+        pregenerate(name)
+    except Exception:
+        logger.exception('Не удалось создать миниатюры %s', name)
+        with _lock:
+            _failed.add(name)
+    finally:
+        with _lock:
+            _pending.discard(name)
+        # у потока пула своё соединение с БД (kvstore sorl)
+        connections.close_all()
+
+
+def submit(name):
+    """Ставит картинку в очередь пула, если её там ещё нет.
+
+    Без пула (THUMBNAIL_WORKERS = 0) миниатюры не создаются в запросе:
+    их создаёт команда pregenerate_thumbnails. Она же повторяет картинки,
+    на которых пул уже споткнулся.
+    """
+    if not settings.THUMBNAIL_WORKERS:
+        return
+    with _lock:
+        if name in _pending or name in _failed:
+            return
+        _pending.add(name)
+    executor().submit(_work, name)
+
+
+def schedule(name):
+    """Ставит миниатюры в очередь после коммита транзакции с картинкой."""
+    transaction.on_commit(lambda: submit(name))
+
+
+def lookup_many(image_files):
+    """Записи key-value store sorl для image_files пачкой: key -> ImageFile.
+
+    Повторяет логику cached_db KVStore (кеш, затем БД, отсутствие тоже
+    кешируется), но одним get_many и одним запросом вместо пары на файл.
+    """
+    kvstore = default.kvstore
+    if not isinstance(kvstore, CachedDBKVStore):
+        found = {image.key: kvstore.get(image) for image in image_files}
+        return {key: image for key, image in found.items() if image}
+    keys = {add_prefix(image.key): image.key for image in image_files}
+    values = kvstore.cache.get_many(keys)
+    missing = [key for key in keys if key not in values]
+    if missing:
+        stored = dict(KVStoreModel.objects.filter(
+            key__in=missing,
+        ).values_list('key', 'value'))
+        fetched = {key: stored.get(key, EMPTY_VALUE) for key in missing}
+        kvstore.cache.set_many(
+            fetched, sorl_settings.THUMBNAIL_CACHE_TIMEOUT,
+        )
+        values.update(fetched)
+    return {
+        keys[key]: deserialize_image_file(value)
+        for key, value in values.items() if value != EMPTY_VALUE
+    }
+
+
+def ready(name):
+    """Все ли миниатюры картинки name уже созданы."""
+    files = [
+        backend.thumbnail_file(source(name), geometry, **options)
+        for geometry, options in GEOMETRIES.values()
+    ]
+    return len(lookup_many(files)) == len(files)
+
+
+def resolve_many(files, aliases):
+    """Готовые миниатюры: имя картинки -> {alias: ImageFile или None}.
+
+    Отсутствующие миниатюры ставятся в очередь, запрос их не ждёт.
+    """
+    files = [file_ for file_ in files if file_]
+    wanted = {}
+    for file_ in files:
+        for alias in aliases:
+            geometry, options = GEOMETRIES[alias]
+            wanted[file_.name, alias] = backend.thumbnail_file(
+                file_, geometry, **options,
+            )
+    found = lookup_many(wanted.values())
+    resolved = {}
+    for file_ in files:
+        resolved[file_.name] = {
+            alias: found.get(wanted[file_.name, alias].key)
+            for alias in aliases
+        }
+        if None in resolved[file_.name].values():
+            submit(file_.name)
+    return resolved
+
+
+def aliases(name):
+    spec = RESPONSIVE[name]
+    return [
+        variant(name, width, image_format)
+        for image_format in spec['formats'] for width in spec['widths']
+    ]
+
+
+def prefetch(posts, name):
+    """Находит миниатюры набора name для всех постов страницы пачкой."""
+    images = [post.image for post in posts if post.image]
+    resolved = resolve_many(images, aliases(name))
+    for image in images:
+        image.prefetched_thumbnails = {
+            **getattr(image, 'prefetched_thumbnails', {}),
+            **resolved[image.name],
+        }
+
+
+def responsive(post, name):
+    """Всё для <picture> картинки поста или None, если картинки нет.
+
+    Пока готовы не все миниатюры, выводится исходная картинка без
+    srcset в тех же размерах.
+    """
+    image = post.image
+    if not image:
+        return None
+    spec = RESPONSIVE[name]
+    names = aliases(name)
+    prefetched = getattr(image, 'prefetched_thumbnails', {})
+    if not all(alias in prefetched for alias in names):
+        prefetched = resolve_many([image], names)[image.name]
+    width, height = spec['size']
+    context = {
+        'src': image.url,
+        'width': width,
+        'height': height,
+        'sizes': spec['sizes'],
+        'placeholder': post.image_placeholder,
+        'sources': [],
+    }
+    if None in prefetched.values():
+        return context
+    for image_format in spec['formats']:
+        srcset = ', '.join(
+            f'{prefetched[variant(name, w, image_format)].url} {w}w'
+            for w in spec['widths']
+        )
+        context['sources'].append({
+            'type': MIME_TYPES[image_format], 'srcset': srcset,
+        })
+    fallback = spec['formats'][-1]
+    context['src'] = prefetched[variant(name, width, fallback)].url
+    context['srcset'] = context['sources'].pop()['srcset']
+    return context
@@ -0,0 +1,149 @@
+"""Приём картинок постов.
+
+UploadLimitHandler стоит первым в FILE_UPLOAD_HANDLERS: он считает
+байты каждого файла и перестаёт передавать данные дальше, как только
+превышен POST_IMAGE_MAX_BYTES, поэтому на диск не пишется больше
+лимита, а в память - больше одного чанка. Остальное делает поле
+PostImageField: число пикселей проверяется по заголовку до
+декодирования, затем картинка поворачивается по EXIF, теряет
+метаданные и уменьшается до POST_IMAGE_MAX_SIDE.
+"""
+
+from __future__ import annotations
+
+import os
+import tempfile
+
+from django import forms
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler
+from django.template.defaultfilters import filesizeformat
+from PIL import Image, ImageOps
+
+# форматы, которые пересохраняем; прочие только проверяются
+SAVE_OPTIONS = {
+    'JPEG': {'quality': 85, 'optimize': True, 'progressive': True},
+    'PNG': {'optimize': True},
+    'WEBP': {'quality': 85},
+    'GIF': {},
+}
+EXIF_ORIENTATION = 0x0112
+
+
+class OversizedUpload(UploadedFile):
+    """Файл, приём которого оборван на лимите: содержимого нет,
+    size - сколько байт успело прийти."""
+
+    too_large = True
+
+    def __init__(self, name, content_type, size):
+        super().__init__(
+            file=None, name=name, content_type=content_type, size=size,
+        )
+
+
+class UploadLimitHandler(FileUploadHandler):
+    def new_file(self, field_name, file_name, content_type, *args, **kwargs):
+        super().new_file(field_name, file_name, content_type, *args, **kwargs)
+        self.received = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > settings.POST_IMAGE_MAX_BYTES:
+            # следующие обработчики (запись во временный файл) данных
+            # больше не получат
+            return None
+        return raw_data
+
+    def file_complete(self, file_size):
+        if self.received > settings.POST_IMAGE_MAX_BYTES:
+            return OversizedUpload(
+                self.file_name, self.content_type, self.received,
+            )
+        return None
+
+
+def check_limits(uploaded):
+    """Проверяет байты и пиксели по заголовку, не декодируя картинку."""
+    if not uploaded:
+        return
+    max_bytes = settings.POST_IMAGE_MAX_BYTES
+    if getattr(uploaded, 'too_large', False) or uploaded.size > max_bytes:
+        raise forms.ValidationError(
+            'Файл больше %(limit)s',
+            code='file_too_large',
+            params={'limit': filesizeformat(max_bytes)},
+        )
+    try:
+        uploaded.seek(0)
+        with Image.open(uploaded) as image:
+            width, height = image.size
+    except Exception:
+        # не картинка: ошибку покажет ImageField
+        return
+    if width * height > settings.POST_IMAGE_MAX_PIXELS:
+        raise forms.ValidationError(
+            'Картинка больше %(limit)s мегапикселей',
+            code='too_many_pixels',
+            params={'limit': settings.POST_IMAGE_MAX_PIXELS // 10 ** 6},
+        )
+
+
+def needs_processing(image):
+    max_side = settings.POST_IMAGE_MAX_SIDE
+    return (
+        max(image.size) > max_side
+        or image.getexif().get(EXIF_ORIENTATION, 1) != 1
+        or 'exif' in image.info
+    )
+
+
+def process_image(uploaded):
+    """Пересохраняет проверенную картинку повёрнутой, без метаданных и
+    не больше POST_IMAGE_MAX_SIDE, если это нужно.
+
+    Результат пишется во временный файл с тем же именем и в том же
+    формате. Анимации и незнакомые форматы остаются как есть.
+    """
+    uploaded.seek(0)
+    with Image.open(uploaded) as image:
+        image_format = image.format
+        if (
+            image_format not in SAVE_OPTIONS
+            or getattr(image, 'is_animated', False)
+            or not needs_processing(image)
+        ):
+            uploaded.seek(0)
+            return uploaded
+        max_side = settings.POST_IMAGE_MAX_SIDE
+        # JPEG декодируется сразу в уменьшенном масштабе
+        image.draft(image.mode, (max_side, max_side))
+        icc_profile = image.info.get('icc_profile')
+        processed = ImageOps.exif_transpose(image)
+        processed.thumbnail((max_side, max_side), Image.LANCZOS)
+        # большой результат сам уходит из памяти на диск
+        result = UploadedFile(
+            tempfile.SpooledTemporaryFile(
+                max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE,
+            ),
+            os.path.basename(uploaded.name), uploaded.content_type,
+        )
+        options = dict(SAVE_OPTIONS[image_format])
+        if icc_profile:
+            options['icc_profile'] = icc_profile
+        processed.save(result, image_format, **options)
+    result.size = result.tell()
+    result.seek(0)
+    return result
+
+
+class PostImageField(forms.ImageField):
+    """ImageField с лимитами POST_IMAGE_* и нормализацией картинки."""
+
+    def to_python(self, data):
+        check_limits(data)
+        uploaded = super().to_python(data)
+        if uploaded is None:
+            return None
+        return process_image(uploaded)
@@ -24,10 +24,15 @@ urlpatterns = [
         'posts/<int:post_id>/comment/',
         views.add_comment, name='add_comment',
     ),
+    path(
+        'posts/<int:post_id>/comments/',
+        views.post_comments, name='post_comments',
+    ),
     path('group/<slug:slug>/', views.group_posts, name='group_list'),
     path('profile/<str:username>/', views.profile, name='profile'),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
     path('create/', views.post_create, name='post_create'),
     path('posts/post_search/', views.post_search, name='post_search'),
+    path('posts/query_stats/', views.query_stats, name='query_stats'),
     path('', views.index, name='index'),
 ]
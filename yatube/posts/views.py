@@ -1,50 +1,102 @@
 from __future__ import annotations
 
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
+from django.db import transaction
+from django.http import Http404, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
+from django.views.decorators.http import condition
 
-from posts.models import Follow, Group, Post, User
+from core.cache import tag_page
+from posts.models import Comment, Follow, Group, Post, User
 
+from . import counters
+from .caching import (feed_cache, follow_etag, group_etag, index_etag,
+                      post_etag, post_tags, profile_etag)
+from .feeds import follow_feed
 from .forms import CommentForm, PostForm
+from .pagination import CursorPaginator, EstimatedPaginator
+from .querystats import stats
+from .search import search_authors, search_groups, search_posts
 
 # from .decorator import queries_stat
 
 SELECT_LIMIT = 10  # Количество постов на страницу
-
-
-def paginator(request, posts):
-    """Настраиваем Paginator"""
-    paginator = Paginator(posts, SELECT_LIMIT)
+COMMENTS_LIMIT = 20  # Комментариев в одной порции
+COMMENT_ORDERING = ('created', 'id')
+
+# Поля карточек лент (includes/post.html): полный text и его поисковая
+# копия не читаются, карточке хватает готового excerpt
+CARD_FIELDS = (
+    'pub_date', 'updated', 'excerpt', 'image', 'image_placeholder',
+    'author__username', 'author__first_name', 'author__last_name',
+    'group__slug', 'group__title',
+)
+# В профиле пост выводится целиком, но уже готовым HTML
+PROFILE_FIELDS = (
+    'pub_date', 'updated', 'text_html', 'image', 'image_placeholder',
+    'author', 'group__slug', 'group__title',
+)
+
+
+def paginator(request, posts, ordering=('pub_date', 'id'), count=None):
+    """Настраиваем Paginator.
+
+    Запросы с параметрами after/before (или все запросы при
+    POSTS_PAGINATION_MODE = 'cursor') обслуживаются курсорной
+    паджинацией по ordering без COUNT(*) и OFFSET. Выдача без
+    ключевого порядка (ordering=None) всегда нумеруется страницами.
+    count - известное заранее число записей (счётчик) вместо COUNT(*).
+    """
+    after = request.GET.get('after')
+    before = request.GET.get('before')
+    cursor_mode = (
+        after or before or settings.POSTS_PAGINATION_MODE == 'cursor'
+    )
+    if ordering and cursor_mode:
+        cursor_paginator = CursorPaginator(posts, SELECT_LIMIT, ordering)
+        return cursor_paginator.get_page(after=after, before=before)
+    paginator = EstimatedPaginator(posts, SELECT_LIMIT, count=count)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
     return page_obj
 
 
 # @queries_stat
+@condition(etag_func=index_etag)
 def index(request):
-    posts = Post.objects.prefetch_related('group', 'author')
+    tag_page(request, 'posts')
+    posts = Post.objects.select_related('group', 'author').only(*CARD_FIELDS)
     context = {
-        'page_obj': paginator(request, posts),
+        'page_obj': paginator(request, posts, count=counters.total_posts()),
+        **feed_cache('posts'),
     }
     return render(request, 'posts/index.html', context)
 
 
+@condition(etag_func=group_etag)
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.select_related('author')
+    tag_page(request, f'group:{group.pk}')
+    posts = group.posts.select_related('author', 'group').only(*CARD_FIELDS)
     context = {
         'group': group,
-        'page_obj': paginator(request, posts),
+        'page_obj': paginator(request, posts, count=group.posts_count),
+        **feed_cache(f'group:{group.pk}'),
     }
     return render(request, 'posts/group_list.html', context)
 
 
+@condition(etag_func=profile_etag)
 def profile(request, username):
     """Персональная страница авторизованного пользователя."""
-    author = get_object_or_404(User, username=username)
-    posts = author.posts.select_related('group')
-    n_posts = posts.count()
+    author = get_object_or_404(
+        User.objects.select_related('profile'), username=username,
+    )
+    tag_page(request, f'author:{author.pk}')
+    posts = author.posts.select_related('group').only(*PROFILE_FIELDS)
+    n_posts = counters.author_profile(author).posts_count
     following = (
         request.user.is_authenticated
         and Follow.objects.filter(
@@ -53,20 +105,40 @@ def profile(request, username):
         ).exists()
     )
     context = {
-        'page_obj': paginator(request, posts),
+        'page_obj': paginator(request, posts, count=n_posts),
         'author': author,
         'n_posts': n_posts,
         'following': following,
+        **feed_cache(f'author:{author.pk}'),
     }
     return render(request, 'posts/profile.html', context)
 
 
+def comments_page(post_id, after=None):
+    """Порция комментариев поста от новых к старым после курсора after."""
+    comments = Comment.objects.filter(post_id=post_id).select_related(
+        'author',
+    ).only('created', 'text', 'author__username')
+    return CursorPaginator(
+        comments, COMMENTS_LIMIT, COMMENT_ORDERING,
+    ).get_page(after=after)
+
+
+@condition(etag_func=post_etag)
 def post_detail(request, post_id):
-    """Страница с постом пользователя."""
-    post = get_object_or_404(Post, pk=post_id)
-    n_posts = post.author.posts.count()
+    """Страница с постом пользователя.
+
+    Выводится первая порция комментариев, следующие подгружаются
+    post_comments по мере прокрутки (без JS - переходом по ссылке
+    с comments_after).
+    """
+    post = get_object_or_404(
+        Post.objects.select_related('author__profile', 'group'), pk=post_id,
+    )
+    tag_page(request, *post_tags(post))
+    n_posts = counters.author_profile(post.author).posts_count
     form = CommentForm(request.POST or None)
-    comments = post.comments.all()
+    comments = comments_page(post.pk, request.GET.get('comments_after'))
     context = {
         'post': post,
         'n_posts': n_posts,
@@ -77,6 +149,7 @@ def post_detail(request, post_id):
 
 
 @login_required
+@transaction.atomic
 def post_create(request):
     """Страница создания постов для авторизованных пользователей."""
     form = PostForm(request.POST or None, files=request.FILES or None)
@@ -93,11 +166,12 @@ def post_create(request):
 
 
 @login_required
+@transaction.atomic
 def post_edit(request, post_id):
     """Страница редактирования постов для авторизованных пользователей."""
     post = get_object_or_404(Post, id=post_id)
 
-    if request.user != post.author:
+    if request.user.pk != post.author_id:
         return redirect('posts:post_detail', post_id=post.id)
 
     form = PostForm(
@@ -116,7 +190,22 @@ def post_edit(request, post_id):
     return render(request, 'posts/create_post.html', context)
 
 
+def post_comments(request, post_id):
+    """Следующая порция комментариев поста HTML-фрагментом."""
+    comments = comments_page(post_id, request.GET.get('after'))
+    # у непустой порции пост точно есть: проверяется только пустая
+    if not comments and not Post.objects.filter(pk=post_id).exists():
+        raise Http404
+    tag_page(request, f'post:{post_id}')
+    context = {
+        'post_id': post_id,
+        'comments': comments,
+    }
+    return render(request, 'includes/comment_list.html', context)
+
+
 @login_required
+@transaction.atomic
 def add_comment(request, post_id):
     """Добавление комментариев к посту."""
     post = get_object_or_404(Post, id=post_id)
@@ -130,18 +219,25 @@ def add_comment(request, post_id):
 
 
 @login_required
+@condition(etag_func=follow_etag)
 def follow_index(request):
-    """Страница со списком постов из подписок пользователя."""
-    post_list_follow = Post.objects.filter(
-        author__following__user=request.user,
-    )
+    """Страница со списком постов из подписок пользователя.
+
+    Посты обычных авторов читаются из материализованной ленты
+    TimelineEntry, посты «знаменитостей» подмешиваются при чтении.
+    """
+    post_list_follow, ordering = follow_feed(request.user)
     context = {
-        'page_obj': paginator(request, post_list_follow),
+        'page_obj': paginator(
+            request, post_list_follow.only(*CARD_FIELDS), ordering=ordering,
+        ),
+        **feed_cache('posts', f'follow:{request.user.pk}'),
     }
     return render(request, 'posts/follow.html', context)
 
 
 @login_required
+@transaction.atomic
 def profile_follow(request, username):
     """Подписка на автора со страницы его профиля."""
     author = get_object_or_404(User, username=username)
@@ -152,6 +248,7 @@ def profile_follow(request, username):
 
 
 @login_required
+@transaction.atomic
 def profile_unfollow(request, username):
     """Отписка от автора."""
     author = get_object_or_404(User, username=username)
@@ -163,14 +260,29 @@ def profile_unfollow(request, username):
 
 
 def post_search(request):
-    search_req = request.GET.get('s', '')
-    search_req = search_req.title()
+    """Полнотекстовый поиск по постам с ранжированием bm25
+    и подсказки групп и авторов по началу названия."""
+    search_req = request.GET.get('s', '').strip()
     if search_req:
-        posts = Post.objects.filter(text__icontains=search_req)
+        posts = search_posts(search_req)
     else:
         posts = Post.objects.select_related('group', 'author')
 
-    return render(
-        request, 'posts/index.html',
-        {'page_obj': paginator(request, posts)},
-    )
+    posts = posts.only(*CARD_FIELDS)
+    context = {
+        'page_obj': paginator(request, posts, ordering=None),
+        'search_req': search_req,
+        'groups': search_groups(search_req),
+        'authors': search_authors(search_req),
+    }
+    return render(request, 'posts/search.html', context)
+
+
+@staff_member_required
+def query_stats(request):
+    """Накопленная статистика SQL-запросов; POST сбрасывает её."""
+    if request.method == 'POST':
+        stats.reset()
+    return JsonResponse(stats.snapshot(), json_dumps_params={
+        'ensure_ascii': False, 'indent': 2,
+    })
@@ -1,3 +1,14 @@
-# from django.contrib import admin
-# Register your models here.
 from __future__ import annotations
+
+from django.contrib import admin
+
+from .models import Profile
+
+
+@admin.register(Profile)
+class ProfileAdmin(admin.ModelAdmin):
+    list_display = (
+        'user', 'posts_count', 'followers_count', 'following_count',
+    )
+    list_select_related = ('user',)
+    search_fields = ('user__username',)
@@ -0,0 +1,39 @@
+# Generated by Django 4.1 on 2026-10-17 14:55
+from __future__ import annotations
+
+from django.db import migrations, models
+
+from core.text import fold
+
+
+def fill_folded(apps, schema_editor):
+    Profile = apps.get_model('users', 'Profile')
+    last_pk = 0
+    while True:
+        batch = list(
+            Profile.objects.select_related('user').filter(
+                pk__gt=last_pk,
+            ).order_by('pk')[:500]
+        )
+        if not batch:
+            return
+        for profile in batch:
+            profile.username_folded = fold(profile.user.username)
+        Profile.objects.bulk_update(batch, ['username_folded'])
+        last_pk = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_profile'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='username_folded',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=150, verbose_name='Имя пользователя для поиска'),
+        ),
+        migrations.RunPython(fill_folded, migrations.RunPython.noop),
+    ]
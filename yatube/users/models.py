@@ -1,3 +1,41 @@
-# from django.db import models
-# Create your models here.
 from __future__ import annotations
+
+from django.contrib.auth import get_user_model
+from django.db import models
+
+User = get_user_model()
+
+
+class Profile(models.Model):
+    """Денормализованные данные пользователя.
+
+    Счётчики поддерживаются сигналами приложения posts в той же
+    транзакции, что и изменение данных; расхождения чинит команда
+    reconcile_counters. username_folded - имя в нормализованном
+    регистре для поиска по индексу.
+    """
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        related_name='profile',
+        verbose_name='Пользователь',
+    )
+    posts_count = models.PositiveIntegerField('Постов', default=0)
+    followers_count = models.PositiveIntegerField(
+        'Подписчиков', default=0, db_index=True,
+    )
+    following_count = models.PositiveIntegerField('Подписок', default=0)
+    username_folded = models.CharField(
+        'Имя пользователя для поиска',
+        max_length=150,
+        default='',
+        editable=False,
+        db_index=True,
+    )
+
+    class Meta:
+        verbose_name = 'Профиль'
+        verbose_name_plural = 'Профили'
+
+    def __str__(self):
+        return f'Профиль {self.user}'
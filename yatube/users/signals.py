@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from core.text import fold
+
+from .models import Profile, User
+
+
+@receiver(post_save, sender=User)
+def sync_profile(sender, instance, created, raw=False, update_fields=None,
+                 **kwargs):
+    """У каждого нового пользователя сразу есть строка профиля,
+    а нормализованное имя следует за username."""
+    if raw:
+        # пользователям из loaddata профиль тоже нужен, а счётчики
+        # их постов и подписок выставит reconcile_counters
+        Profile.objects.update_or_create(
+            user=instance,
+            defaults={'username_folded': fold(instance.username)},
+        )
+    elif created:
+        Profile.objects.create(
+            user=instance, username_folded=fold(instance.username),
+        )
+    elif update_fields is None or 'username' in update_fields:
+        Profile.objects.filter(user=instance).update(
+            username_folded=fold(instance.username),
+        )
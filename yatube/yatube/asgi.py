@@ -0,0 +1,20 @@
+"""
+ASGI config for yatube project.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/4.1/howto/deployment/asgi/
+"""
+from __future__ import annotations
+
+import os
+
+from core.asgi import get_asgi_application
+from core.staticfiles import ASGIStaticFilesApplication
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+
+# читающие страницы posts обслуживаются асинхронными представлениями
+# (settings.ASGI_URLCONF), собранная статика отдаётся до Django
+application = ASGIStaticFilesApplication(get_asgi_application())
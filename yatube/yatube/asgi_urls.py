@@ -0,0 +1,19 @@
+"""Корневые маршруты для ASGI (yatube/asgi.py): как yatube.urls, но
+posts подключается с асинхронными представлениями.
+"""
+
+from __future__ import annotations
+
+from django.urls import include, path
+
+from . import urls
+
+urlpatterns = [
+    path('', include('posts.async_urls', namespace='posts'))
+    if getattr(pattern, 'namespace', None) == 'posts' else pattern
+    for pattern in urls.urlpatterns
+]
+
+handler404 = urls.handler404
+handler403 = urls.handler403
+handler500 = urls.handler500
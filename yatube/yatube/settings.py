@@ -56,16 +56,24 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    # 304 и для страниц, отданных из кеша PageCacheMiddleware
+    'django.middleware.http.ConditionalGetMiddleware',
+    # снаружи middleware, которые ставят cookies (core.middleware)
+    'core.middleware.UpdatePageCacheMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'posts.querystats.QueryStatsMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.middleware.PageCacheMiddleware',
     # 'debug_toolbar.middleware.DebugToolbarMiddleware',
 ]
 
 ROOT_URLCONF = 'yatube.urls'
+# маршруты ASGI (yatube/asgi.py): читающие страницы posts асинхронные
+ASGI_URLCONF = 'yatube.asgi_urls'
 
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
 TEMPLATES = [
@@ -80,12 +88,14 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
                 'core.context_processors.year.year',
+                'core.context_processors.cache.fragment_cache',
             ],
         },
     },
 ]
 
 WSGI_APPLICATION = 'yatube.wsgi.application'
+ASGI_APPLICATION = 'yatube.asgi.application'
 
 
 # Database
@@ -136,8 +146,13 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/2.2/howto/static-files/
 
 STATIC_URL = '/static/'
-# STATIC_ROOT = os.path.join(BASE_DIR, "static")
+STATIC_ROOT = os.path.join(BASE_DIR, 'collected_static')
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
+# collectstatic добавляет в имена хеш содержимого и сжимает файлы в
+# .gz и .br, а core.staticfiles отдаёт их из WSGI-приложения; файлы
+# без хеша кешируются на STATIC_MAX_AGE
+STATICFILES_STORAGE = 'core.staticfiles.CompressedManifestStaticFilesStorage'
+STATIC_MAX_AGE = 60 * 60
 
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
@@ -149,6 +164,17 @@ EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Загрузки сразу пишутся во временный файл, а UploadLimitHandler обрывает
+# приём файла больше POST_IMAGE_MAX_BYTES (posts.uploads)
+FILE_UPLOAD_HANDLERS = [
+    'posts.uploads.UploadLimitHandler',
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+POST_IMAGE_MAX_BYTES = 10 * 1024 * 1024
+POST_IMAGE_MAX_PIXELS = 40_000_000
+# Длинная сторона хранимого оригинала
+POST_IMAGE_MAX_SIDE = 2048
+
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 
 CACHES = {
@@ -161,3 +187,32 @@ CACHES = {
 }
 
 DEFAULT_AUTO_FIELD = 'django.db.models.AutoField'
+
+# Фрагменты лент инвалидируются версиями тегов (core.cache), поэтому
+# таймаут только ограничивает жизнь неиспользуемых записей
+FEED_CACHE_TIMEOUT = 60 * 60 * 24
+# Карточки постов: ключ включает Post.updated, старые версии просто
+# вытесняются по таймауту
+FRAGMENT_CACHE_TIMEOUT = 60 * 60 * 24 * 7
+# Страницы целиком для анонимов (core.middleware); 0 - выключено
+PAGE_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Доля запросов, для которых собирается статистика SQL (0 - выключено),
+# и сколько самых медленных запросов хранить
+QUERY_STATS_SAMPLE_RATE = 0.01
+QUERY_STATS_TOP = 10
+
+# Потоков для заранее создаваемых миниатюр (posts.thumbnails);
+# 0 - создавать сразу в том же потоке
+THUMBNAIL_WORKERS = 2
+
+# Как часто общее число постов для нумерации страниц главной
+# пересчитывается COUNT(*); между пересчётами оно меняется инкрементами
+TOTAL_POSTS_TIMEOUT = 60 * 60
+
+# 'pages' - нумерованные страницы, 'cursor' - «старее/новее» по (pub_date, id)
+POSTS_PAGINATION_MODE = 'pages'
+
+# С этого числа подписчиков посты автора не раскладываются по лентам,
+# а подмешиваются в ленту подписок при чтении
+FEED_CELEBRITY_FOLLOWERS = 10000
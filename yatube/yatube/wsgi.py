@@ -12,6 +12,9 @@ import os
 
 from django.core.wsgi import get_wsgi_application
 
+from core.staticfiles import StaticFilesApplication
+
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
 
-application = get_wsgi_application()
+# собранная статика отдаётся до Django, сжатой и с вечным кешем
+application = StaticFilesApplication(get_wsgi_application())